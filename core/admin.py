@@ -3,6 +3,8 @@ from .models import (
     User,
     Route,
     Notification,
+    NotificationArchive,
+    Broadcast,
     Report,
     RoutePoint,
     RouteDate,
@@ -10,6 +12,7 @@ from .models import (
     Community,
     RouteCommunity,
 )
+from .route_points import route_points_changed
 
 # =========================
 # USUARIOS
@@ -40,6 +43,20 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ('message', 'usuario__username')
 
 
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ('message', 'sender', 'recipient_count', 'deleted_globally', 'created_at')
+    list_filter = ('deleted_globally', 'created_at')
+    search_fields = ('message',)
+
+
+@admin.register(NotificationArchive)
+class NotificationArchiveAdmin(admin.ModelAdmin):
+    list_display = ('original_id', 'usuario_id', 'message', 'estado', 'reason', 'archived_at')
+    list_filter = ('reason', 'estado')
+    search_fields = ('message',)
+
+
 # =========================
 # REPORTES
 # =========================
@@ -58,6 +75,18 @@ class RoutePointAdmin(admin.ModelAdmin):
     list_display = ('route', 'latitude', 'longitude', 'order')
     list_filter = ('route',)
 
+    # Los borrados de puntos no disparan signals (ver core/signals.py)
+    def delete_model(self, request, obj):
+        route_id = obj.route_id
+        super().delete_model(request, obj)
+        route_points_changed(route_id)
+
+    def delete_queryset(self, request, queryset):
+        route_ids = set(queryset.values_list('route_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for route_id in route_ids:
+            route_points_changed(route_id)
+
 
 # =========================
 # FECHAS DE RUTA
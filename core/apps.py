@@ -4,3 +4,6 @@ class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
 
+    def ready(self):
+        # Registra los signals de invalidación de cache
+        from . import signals  # noqa: F401
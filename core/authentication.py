@@ -0,0 +1,112 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def add_user_claims(token, user):
+    token["role"] = user.role
+    token["username"] = user.username
+    token["user_id"] = user.id
+    return token
+
+
+def tokens_for_user(user):
+    """
+    Regresa (refresh, access). Los claims se ponen una sola vez en el refresh:
+    el access los copia al generarse.
+    """
+    refresh = add_user_claims(RefreshToken.for_user(user), user)
+    return refresh, refresh.access_token
+
+
+# ==========================
+# USUARIO DESDE EL TOKEN (sin query por petición)
+# ==========================
+# El token ya trae user_id / username / role. Lo único que puede cambiar después
+# de emitirlo es si la cuenta sigue activa (o su rol), así que eso se guarda en
+# cache unos segundos (AUTH_STATUS_TTL). core/signals.py borra la llave al
+# guardar o borrar el usuario.
+
+def auth_status_key(user_id):
+    return f"sc:auth_status:{user_id}"
+
+
+def get_auth_status(user_id):
+    """
+    {"is_active", "role", "is_staff", "is_superuser"} o None si el usuario no existe.
+    """
+    key = auth_status_key(user_id)
+    status = cache.get(key)
+    if status is None:
+        status = (
+            get_user_model().objects
+            .filter(pk=user_id)
+            .values("is_active", "role", "is_staff", "is_superuser")
+            .first()
+        ) or {"missing": True}
+        cache.set(key, status, timeout=getattr(settings, "AUTH_STATUS_TTL", 30))
+    return None if status.get("missing") else status
+
+
+class ClaimsUser(TokenUser):
+    """
+    request.user armado con los claims del token + el estado cacheado.
+    Tiene id, username, role, is_staff; no es una instancia del modelo:
+    para filtrar usar `usuario_id=request.user.id`, no `usuario=request.user`.
+    """
+
+    def __init__(self, token, status):
+        super().__init__(token)
+        self.status = status
+
+    @property
+    def role(self):
+        return self.status["role"]
+
+    @property
+    def is_active(self):
+        return self.status["is_active"]
+
+    @property
+    def is_staff(self):
+        return self.status["is_staff"]
+
+    @property
+    def is_superuser(self):
+        return self.status["is_superuser"]
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Igual que JWTAuthentication pero sin cargar el User: para endpoints de alta
+    frecuencia (telemetría, polling de notificaciones) que solo usan id y rol.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        status = get_auth_status(user_id)
+        if status is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not status["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return ClaimsUser(validated_token, status)
+
+
+def user_from_raw_token(raw_token):
+    """
+    ClaimsUser a partir del token crudo, para vistas fuera de DRF (SSE async).
+    Lanza InvalidToken / AuthenticationFailed.
+    """
+    authentication = ClaimsJWTAuthentication()
+    return authentication.get_user(authentication.get_validated_token(raw_token.encode()))
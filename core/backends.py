@@ -1,34 +1,53 @@
 # core/backends.py
-from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
 
 User = get_user_model()
 
+
+def get_user_by_identifier(identifier):
+    """
+    Busca por email o username sin importar mayúsculas, en UNA sola query.
+    LOWER(email) / LOWER(username) usan los índices de expresión de User.
+
+    Si el identificador coincide con el email de un usuario y el username de
+    otro, gana el email (mismo orden que el login original).
+    """
+    identifier = (identifier or "").strip().lower()
+    if not identifier:
+        return None
+
+    candidates = list(
+        User.objects
+        .filter(Q(Exact(Lower("email"), identifier)) | Q(Exact(Lower("username"), identifier)))
+        .order_by("id")[:5]
+    )
+    for user in candidates:
+        if (user.email or "").lower() == identifier:
+            return user
+    return candidates[0] if candidates else None
+
+
 class EmailOrUsernameModelBackend(ModelBackend):
     """
-    Permite autenticar usando email o username.
+    Permite autenticar usando email o username (mismo camino que login_view).
     """
     def authenticate(self, request, username=None, password=None, **kwargs):
         if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
             return None
 
-        # Si el 'username' contiene '@', lo tratamos como email
-        if '@' in username:
-            kwargs = {'email': username}
-        else:
-            kwargs = {'username': username}
-
-        try:
-            # Buscamos al usuario por email o username
-            user = User.objects.get(**kwargs)
-            # Verificamos la contraseña
-            if user.check_password(password):
-                return user
-        except User.DoesNotExist:
+        user = get_user_by_identifier(username)
+        if user is None:
+            # Igual que ModelBackend: corre el hasher para no delatar
+            # por tiempo de respuesta qué usuarios existen.
+            User().set_password(password)
             return None
 
-    def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
\ No newline at end of file
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,74 @@
+"""
+Utilidades compartidas por los comandos bench_* (solo para medir, no para producción).
+"""
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """
+    Corre el bloque dentro de una transacción que siempre se revierte:
+    los datos sintéticos del benchmark nunca quedan en la base.
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback()
+    except _Rollback:
+        pass
+
+
+@contextmanager
+def bench_client(user=None):
+    """
+    APIClient en proceso (sin red). Si se pasa user, queda autenticado.
+    """
+    with override_settings(ALLOWED_HOSTS=["*"]):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        yield client
+
+
+def measure(client, url, repeat=5, consume_stream=False, **extra):
+    """
+    Ejecuta GET url `repeat` veces y regresa latencia, queries y bytes.
+    Con consume_stream=True las respuestas streaming se leen completas dentro
+    del tiempo medido (no usar con SSE).
+    """
+    timings = []
+    queries = 0
+    size = 0
+    status = None
+
+    for _ in range(max(1, repeat)):
+        with CaptureQueriesContext(connection) as ctx:
+            t0 = time.perf_counter()
+            res = client.get(url, **extra)
+            if res.streaming and consume_stream:
+                size = sum(len(chunk) for chunk in res.streaming_content)
+            timings.append((time.perf_counter() - t0) * 1000)
+        queries = len(ctx.captured_queries)
+        status = res.status_code
+        if not res.streaming:
+            size = len(res.content)
+        elif not consume_stream:
+            size = 0
+
+    return {
+        "status": status,
+        "ms_p50": round(statistics.median(timings), 2),
+        "ms_min": round(min(timings), 2),
+        "queries": queries,
+        "bytes": size,
+    }
@@ -0,0 +1,69 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Broadcast, BroadcastRecipient, User
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def fan_out_broadcast(sender, message, chunk_size=None):
+    """
+    Envía un mismo mensaje a todos los usuarios activos.
+
+    - El texto se guarda una sola vez (Broadcast); por usuario solo se inserta
+      una fila angosta de BroadcastRecipient (ids + banderas).
+    - Recorre los ids de usuario por bloques (sin cargar objetos User completos).
+    - Inserta cada bloque con bulk_create (un INSERT por bloque, no uno por usuario).
+    - Todo corre dentro de una sola transacción: o se envía a todos o a nadie.
+
+    Regresa un dict con el total de destinatarios y el tiempo de cada bloque:
+        {"broadcast_id": 7, "sent": 12000, "chunks": [{"size": 2000, "ms": 41.2}, ...], "total_ms": 250.3}
+    """
+    chunk_size = int(chunk_size or getattr(settings, "BROADCAST_CHUNK_SIZE", DEFAULT_CHUNK_SIZE))
+    if chunk_size <= 0:
+        chunk_size = DEFAULT_CHUNK_SIZE
+
+    user_ids = (
+        User.objects
+        .filter(is_active=True)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+
+    sent = 0
+    chunks = []
+    started = time.perf_counter()
+
+    def _flush(broadcast_id, ids):
+        t0 = time.perf_counter()
+        BroadcastRecipient.objects.bulk_create(
+            [BroadcastRecipient(broadcast_id=broadcast_id, usuario_id=uid) for uid in ids],
+            batch_size=chunk_size,
+        )
+        chunks.append({"size": len(ids), "ms": round((time.perf_counter() - t0) * 1000, 2)})
+        return len(ids)
+
+    with transaction.atomic():
+        broadcast = Broadcast.objects.create(sender=sender, message=message)
+        batch = []
+        for uid in user_ids.iterator(chunk_size=chunk_size):
+            batch.append(uid)
+            if len(batch) >= chunk_size:
+                sent += _flush(broadcast.pk, batch)
+                batch = []
+        if batch:
+            sent += _flush(broadcast.pk, batch)
+        Broadcast.objects.filter(pk=broadcast.pk).update(recipient_count=sent)
+
+    total_ms = round((time.perf_counter() - started) * 1000, 2)
+    logger.info(
+        "Broadcast %s enviado: %s destinatarios en %s bloques (%.2f ms)",
+        broadcast.pk, sent, len(chunks), total_ms,
+    )
+
+    return {"broadcast_id": broadcast.pk, "sent": sent, "chunks": chunks, "total_ms": total_ms}
@@ -0,0 +1,174 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .renderers import render_json
+
+# ==========================
+# VERSIONES POR RECURSO
+# ==========================
+# Cada recurso cacheado tiene un contador de versión.
+# Los signals (core/signals.py) lo incrementan cuando cambia algún modelo
+# relacionado; así las llaves viejas simplemente dejan de usarse.
+#
+# ⚠️ Con LocMemCache (default en local) cada worker de gunicorn tiene su propio
+# cache, por lo que la versión solo se invalida en el worker que hizo la
+# escritura. En producción el default es redis (compartido); si se
+# usa locmem, los TTL bajan a segundos (settings.CACHE_SHARED).
+
+MAP_BUNDLE = "map_bundle"
+INBOX_BROADCASTS = "inbox_broadcasts"
+COMMUNITIES = "communities"
+ROUTES = "routes"
+ROUTE_DATES = "route_dates"
+ROUTE_SCHEDULES = "route_schedules"
+
+# Todo lo que incluye rutas anidadas (puntos + comunidades)
+ROUTE_RESOURCES = (MAP_BUNDLE, ROUTES, ROUTE_DATES, ROUTE_SCHEDULES)
+
+
+def _version_key(resource):
+    return f"sc:version:{resource}"
+
+
+def _fresh_version():
+    # Punto de partida basado en el reloj: si el cache se vacía (reinicio),
+    # no se reutilizan versiones que los clientes ya tengan en su ETag.
+    return int(time.time() * 1000)
+
+
+def _version_timeout():
+    return getattr(settings, "CACHE_VERSION_TTL", None)
+
+
+def get_version(resource):
+    key = _version_key(resource)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=_version_timeout())
+        version = cache.get(key) or _fresh_version()
+    return version
+
+
+def bump_version(*resources):
+    for resource in resources:
+        key = _version_key(resource)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_version(), timeout=_version_timeout())
+
+
+# ==========================
+# CACHE DE LECTURA (read-through)
+# ==========================
+# La respuesta se guarda ya renderizada (bytes JSON) bajo una llave con la
+# versión del recurso: un hit no toca la base ni vuelve a serializar.
+#
+# Los contadores de hits/misses viven en el cache (compartidos entre workers):
+# cada proceso acumula en memoria y los suma al cache cada
+# CACHE_STATS_FLUSH_EVERY accesos (y al consultar las estadísticas), así no
+# cuestan una escritura por petición. La suma es get_many + set_many: con
+# escrituras simultáneas de dos workers se puede perder un lote, es monitoreo.
+# Reiniciar cambia la "generación" de las llaves en lugar de borrarlas una a una.
+_STATS_GENERATION_KEY = "sc:cache_stats:generation"
+_pending = {}
+_pending_count = 0
+_stats_lock = threading.Lock()
+
+
+def _stats_generation():
+    generation = cache.get(_STATS_GENERATION_KEY)
+    if generation is None:
+        cache.add(_STATS_GENERATION_KEY, _fresh_version(), timeout=None)
+        generation = cache.get(_STATS_GENERATION_KEY) or _fresh_version()
+    return generation
+
+
+def _stats_key(generation, resource, field):
+    return f"sc:cache_stats:{generation}:{resource}:{field}"
+
+
+def _stats_index_key(generation):
+    return f"sc:cache_stats:{generation}:resources"
+
+
+def _flush_stats():
+    global _pending_count
+    with _stats_lock:
+        pending = {resource: dict(counters) for resource, counters in _pending.items()}
+        _pending.clear()
+        _pending_count = 0
+    if not pending:
+        return
+
+    generation = _stats_generation()
+    index_key = _stats_index_key(generation)
+    keys = [_stats_key(generation, r, f) for r in pending for f in ("hits", "misses")]
+    current = cache.get_many([index_key, *keys])
+
+    updates = {}
+    index = set(current.get(index_key) or ())
+    if not index.issuperset(pending):
+        updates[index_key] = sorted(index | set(pending))
+    for resource, counters in pending.items():
+        for field, delta in counters.items():
+            if delta:
+                key = _stats_key(generation, resource, field)
+                updates[key] = current.get(key, 0) + delta
+    cache.set_many(updates, timeout=None)
+
+
+def count_access(resource, hit):
+    global _pending_count
+    with _stats_lock:
+        counters = _pending.setdefault(resource, {"hits": 0, "misses": 0})
+        counters["hits" if hit else "misses"] += 1
+        _pending_count += 1
+        flush = _pending_count >= getattr(settings, "CACHE_STATS_FLUSH_EVERY", 50)
+    if flush:
+        _flush_stats()
+
+
+def cache_stats():
+    _flush_stats()
+    generation = _stats_generation()
+    resources = cache.get(_stats_index_key(generation)) or []
+    values = cache.get_many([_stats_key(generation, r, f) for r in resources for f in ("hits", "misses")])
+
+    snapshot = {}
+    for resource in resources:
+        hits = values.get(_stats_key(generation, resource, "hits"), 0)
+        misses = values.get(_stats_key(generation, resource, "misses"), 0)
+        total = hits + misses
+        snapshot[resource] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / total, 3) if total else None,
+        }
+    return snapshot
+
+
+def reset_cache_stats():
+    global _pending_count
+    with _stats_lock:
+        _pending.clear()
+        _pending_count = 0
+    cache.set(_STATS_GENERATION_KEY, _fresh_version(), timeout=None)
+
+
+def cached_json(resource, build, variant=""):
+    """
+    Regresa el JSON (bytes) de `resource`; si no está en cache llama a build()
+    y guarda el resultado. `variant` distingue respuestas del mismo recurso
+    (p.ej. parámetros de la consulta).
+    """
+    key = f"sc:{resource}:{get_version(resource)}:{variant}"
+    body = cache.get(key)
+    count_access(resource, hit=body is not None)
+    if body is None:
+        body = render_json(build())
+        cache.set(key, body, timeout=getattr(settings, "READ_CACHE_TTL", 60 * 60 * 24))
+    return body
@@ -0,0 +1,129 @@
+"""
+Compresión de las respuestas de la API según Accept-Encoding: brotli si el
+paquete está instalado y el cliente lo acepta, gzip si no.
+
+- Solo rutas /api/: los estáticos ya salen comprimidos por WhiteNoise.
+- Solo respuestas normales: SSE, PDF en streaming y descargas no se tocan.
+- Solo desde API_COMPRESSION_MIN_BYTES; abajo de eso no vale el CPU.
+- gzip con los mismos bytes aleatorios que GZipMiddleware de Django (BREACH).
+- Memoria LRU por contenido (API_COMPRESSION_MEMO entradas): un hit del cache
+  de lectura son exactamente los mismos bytes cada vez, no se vuelven a comprimir.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+_CODING = re.compile(r"^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$")
+
+
+def accepted_encodings(header):
+    """
+    "gzip, br;q=0.8, *;q=0" => {"gzip": 1.0, "br": 0.8, "*": 0.0}
+    """
+    accepted = {}
+    for part in header.split(","):
+        match = _CODING.match(part)
+        if not match:
+            continue
+        try:
+            accepted[match.group(1).lower()] = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+    return accepted
+
+
+def choose_encoding(header):
+    """
+    "br", "gzip" o None. Con el mismo q gana br.
+    """
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    best, best_q = None, 0.0
+    for encoding in ("br", "gzip") if brotli is not None else ("gzip",):
+        q = accepted.get(encoding, wildcard)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(content, encoding):
+    if encoding == "br":
+        return brotli.compress(content, quality=getattr(settings, "API_COMPRESSION_BROTLI_QUALITY", 5))
+    return compress_string(content, max_random_bytes=ApiCompressionMiddleware.max_random_bytes)
+
+
+def compress_cached(content, encoding):
+    """
+    compress() recordando los últimos resultados por hash del contenido.
+    """
+    size = getattr(settings, "API_COMPRESSION_MEMO", 32)
+    if size <= 0:
+        return compress(content, encoding)
+
+    key = (encoding, hashlib.blake2b(content, digest_size=16).digest())
+    with _memo_lock:
+        compressed = _memo.get(key)
+        if compressed is not None:
+            _memo.move_to_end(key)
+            return compressed
+
+    compressed = compress(content, encoding)
+    with _memo_lock:
+        _memo[key] = compressed
+        while len(_memo) > size:
+            _memo.popitem(last=False)
+    return compressed
+
+
+class ApiCompressionMiddleware:
+    max_random_bytes = 100
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if (
+            not request.path.startswith("/api/")
+            or response.streaming
+            or response.has_header("Content-Encoding")
+            or not response.get("Content-Type", "").startswith(COMPRESSIBLE_TYPES)
+            or len(response.content) < getattr(settings, "API_COMPRESSION_MIN_BYTES", 1024)
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        content = compress_cached(response.content, encoding)
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response["Content-Length"] = str(len(content))
+        response["Content-Encoding"] = encoding
+
+        # Igual que GZipMiddleware: el cuerpo ya no es idéntico byte a byte
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
@@ -0,0 +1,113 @@
+"""
+GET condicional (ETag / Last-Modified) para las APIs de lectura.
+
+Los validadores se calculan antes de la vista y son baratos; si el cliente ya
+tiene la versión vigente (If-None-Match / If-Modified-Since) se responde 304
+sin serializar nada. Dos tipos:
+
+- version_validator: versión del cache de lectura (core/cache.py). 0 queries.
+  Es exactamente la llave con la que se guardó el JSON que se sirve, así que
+  el ETag siempre corresponde al cuerpo cacheado.
+- aggregate_validator: max(updated_at) + count() de cada queryset. Una query
+  por queryset, sirve para lo que no pasa por el cache (calendario, buzón,
+  vehículo) y no depende de que el worker haya visto la escritura. El count
+  detecta borrados; Last-Modified (resolución de 1 s) no los ve, por eso el
+  ETag es el validador principal.
+
+⚠️ Un cliente que solo manda If-Modified-Since recibiría 304 después de un
+borrado físico (max(updated_at) no cambia). Last-Modified solo se emite donde
+los borrados son lógicos (last_modified=True); donde hay DELETE real, solo ETag.
+Las versiones de version_validator viven en el cache compartido (default en
+producción); con locmem expiran en segundos (CACHE_VERSION_TTL).
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .cache import get_version
+
+
+def version_validator(*resources):
+    """
+    ETag de las versiones de `resources`; sin Last-Modified.
+    """
+    def validator(request, *args, **kwargs):
+        versions = "-".join(str(get_version(resource)) for resource in resources)
+        return f'"{resources[0]}-{versions}"', None
+
+    return validator
+
+
+def aggregates(*querysets, salt=""):
+    """
+    (etag, last_modified) para una lista de querysets o (queryset, campo);
+    el campo por defecto es updated_at. `salt` entra en el ETag (p.ej. el
+    usuario, para que dos cuentas en el mismo navegador no compartan 304).
+    """
+    parts = [salt]
+    latest = None
+    for item in querysets:
+        queryset, field = item if isinstance(item, tuple) else (item, "updated_at")
+        row = queryset.aggregate(latest=Max(field), count=Count("pk"))
+        parts.append(f"{row['count']}@{row['latest'].isoformat() if row['latest'] else '-'}")
+        if row["latest"] is not None and (latest is None or row["latest"] > latest):
+            latest = row["latest"]
+
+    digest = hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"', latest
+
+
+def aggregate_validator(build_querysets, per_user=False, last_modified=True, salt=None):
+    """
+    build_querysets(request, *args, **kwargs) => querysets para aggregates().
+    - last_modified=False: solo ETag (los querysets tienen borrados físicos)
+    - salt(request) => texto extra para el ETag (p.ej. la fecha si la
+      respuesta depende de "hoy")
+    """
+    def validator(request, *args, **kwargs):
+        parts = [f"user:{request.user.id}" if per_user else "", salt(request) if salt else ""]
+        etag, latest = aggregates(*build_querysets(request, *args, **kwargs), salt="|".join(parts))
+        return etag, latest if last_modified else None
+
+    return validator
+
+
+def conditional_get(validator):
+    """
+    Decorador para vistas @api_view (va justo arriba del def): DRF ya revisó
+    autenticación y permisos cuando corre. Solo GET/HEAD; los demás métodos
+    pasan directo.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+
+            etag, latest = validator(request, *args, **kwargs)
+            last_modified = int(latest.timestamp()) if latest is not None else None
+
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return _with_validators(not_modified, etag, last_modified)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.has_header("ETag"):
+                _with_validators(response, etag, last_modified)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _with_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    # Siempre revalidar (los datos cambian) y nunca en caches compartidos (van con token)
+    response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,273 @@
+"""
+ETA del camión a cualquier punto de su ruta.
+
+- Perfil de ruta: coordenadas + distancia acumulada (m) por punto, calculado una
+  vez y guardado en cache hasta que cambian los puntos (route_points_changed).
+- Progreso del vehículo: cada fix se proyecta sobre la polilínea buscando primero
+  cerca del último segmento conocido (el camión avanza, no salta); solo si queda
+  lejos de la ruta se revisa la polilínea completa.
+- Velocidad: promedio exponencial de la velocidad reportada por el GPS o, si no
+  viene, del avance sobre la ruta entre fixes.
+
+Con eso, el ETA a un punto es (distancia_acumulada[destino] - progreso) / velocidad:
+una búsqueda binaria por `order` o una consulta al índice espacial por lat/lng.
+"""
+import math
+from bisect import bisect_left
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import RoutePoint, RouteSegmentCell
+from .spatial import METERS_PER_DEG_LAT, METERS_PER_DEG_LNG, cell_filter
+
+ROUTE_PROFILE_TTL = 60 * 60 * 24
+VEHICLE_PROGRESS_TTL = 60 * 60 * 6
+
+# Ventana de búsqueda alrededor del último segmento (en segmentos)
+SEARCH_BACK = 5
+SEARCH_AHEAD = 200
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def route_profile_key(route_id):
+    return f"sc:route_profile:{route_id}"
+
+
+def vehicle_progress_key(vehicle_id):
+    return f"sc:vehicle_progress:{vehicle_id}"
+
+
+# ==========================
+# PERFIL DE RUTA (distancias acumuladas)
+# ==========================
+def _segment_length_m(lat1, lng1, lat2, lng2):
+    kx = METERS_PER_DEG_LNG * math.cos(math.radians((lat1 + lat2) / 2))
+    return math.hypot((lng2 - lng1) * kx, (lat2 - lat1) * METERS_PER_DEG_LAT)
+
+
+def build_route_profile(route_id):
+    rows = list(
+        RoutePoint.objects
+        .filter(route_id=route_id)
+        .order_by("order", "id")
+        .values_list("latitude", "longitude", "order")
+    )
+    lats = [float(r[0]) for r in rows]
+    lngs = [float(r[1]) for r in rows]
+
+    cum = [0.0] * len(rows)
+    for i in range(1, len(rows)):
+        cum[i] = cum[i - 1] + _segment_length_m(lats[i - 1], lngs[i - 1], lats[i], lngs[i])
+
+    return {
+        "route_id": route_id,
+        "lats": lats,
+        "lngs": lngs,
+        "orders": [r[2] for r in rows],
+        "cum": cum,
+        "length_m": cum[-1] if cum else 0.0,
+    }
+
+
+def get_route_profile(route_id):
+    key = route_profile_key(route_id)
+    profile = cache.get(key)
+    if profile is None:
+        profile = build_route_profile(route_id)
+        cache.set(key, profile, timeout=ROUTE_PROFILE_TTL)
+    return profile
+
+
+def invalidate_route_profile(route_id):
+    cache.delete(route_profile_key(route_id))
+
+
+# ==========================
+# PROYECCIÓN SOBRE LA POLILÍNEA
+# ==========================
+def project(profile, lat, lng, first=0, last=None):
+    """
+    Proyecta (lat, lng) sobre los segmentos [first, last) del perfil.
+    Regresa (seq, along_m, offset_m): segmento, distancia recorrida sobre la ruta
+    y distancia perpendicular a ella. None si la ruta tiene menos de 2 puntos.
+    """
+    lats, lngs, cum = profile["lats"], profile["lngs"], profile["cum"]
+    n_segments = len(lats) - 1
+    if n_segments < 1:
+        return None
+
+    first = max(0, first)
+    last = n_segments if last is None else min(last, n_segments)
+
+    kx = METERS_PER_DEG_LNG * math.cos(math.radians(lat))
+    best = None
+    for i in range(first, last):
+        ax, ay = (lngs[i] - lng) * kx, (lats[i] - lat) * METERS_PER_DEG_LAT
+        dx = (lngs[i + 1] - lngs[i]) * kx
+        dy = (lats[i + 1] - lats[i]) * METERS_PER_DEG_LAT
+        seg2 = dx * dx + dy * dy
+        t = 0.0 if seg2 == 0 else max(0.0, min(1.0, -(ax * dx + ay * dy) / seg2))
+        offset = math.hypot(ax + t * dx, ay + t * dy)
+        if best is None or offset < best[2]:
+            best = (i, cum[i] + t * (cum[i + 1] - cum[i]), offset)
+    return best
+
+
+def _off_route_m():
+    return _setting("ETA_OFF_ROUTE_M", 100)
+
+
+def _project_incremental(profile, lat, lng, previous_seq):
+    if previous_seq is not None:
+        found = project(profile, lat, lng, previous_seq - SEARCH_BACK, previous_seq + SEARCH_AHEAD)
+        if found is not None and found[2] <= _off_route_m():
+            return found
+    return project(profile, lat, lng)
+
+
+# ==========================
+# PROGRESO DEL VEHÍCULO
+# ==========================
+def track_fix(vehicle_id, route_id, lat, lng, recorded_at, speed=None):
+    """
+    Actualiza el progreso del vehículo con un fix nuevo (lo llama la telemetría).
+    recorded_at: ISO string. Regresa el estado guardado o None si no hay ruta.
+    """
+    if not route_id:
+        cache.delete(vehicle_progress_key(vehicle_id))
+        return None
+
+    profile = get_route_profile(route_id)
+    previous = cache.get(vehicle_progress_key(vehicle_id))
+    if previous and previous["route_id"] != route_id:
+        previous = None
+
+    found = _project_incremental(profile, lat, lng, previous["seq"] if previous else None)
+    if found is None:
+        return None
+    seq, along, offset = found
+    off_route = offset > _off_route_m()
+
+    # Velocidad: GPS si viene, si no el avance sobre la ruta desde el fix anterior.
+    # ⚠️ Fuera de la ruta (desvío, base, relleno) la proyección no es avance real:
+    # se conserva la velocidad anterior, y el primer fix de regreso no cuenta como
+    # avance desde la proyección del desvío.
+    sample = None if off_route else speed
+    if sample is None and not off_route and previous and not previous.get("off_route"):
+        prev_at = parse_datetime(previous["at"])
+        dt = (parse_datetime(recorded_at) - prev_at).total_seconds()
+        if dt > 0 and along >= previous["along_m"]:
+            sample = (along - previous["along_m"]) / dt
+
+    previous_speed = previous["speed_mps"] if previous else None
+    if sample is None:
+        speed_mps = previous_speed
+    elif previous_speed is None:
+        speed_mps = sample
+    else:
+        alpha = _setting("ETA_SPEED_ALPHA", 0.3)
+        speed_mps = alpha * sample + (1 - alpha) * previous_speed
+
+    state = {
+        "vehicle_id": vehicle_id,
+        "route_id": route_id,
+        "seq": seq,
+        "along_m": along,
+        "offset_m": offset,
+        "off_route": off_route,
+        "speed_mps": speed_mps,
+        "at": recorded_at,
+    }
+    cache.set(vehicle_progress_key(vehicle_id), state, timeout=VEHICLE_PROGRESS_TTL)
+    return state
+
+
+def get_progress(vehicle_id, route_id, position=None):
+    """
+    Progreso guardado; si no hay (reinicio, vehículo sin fixes nuevos) se calcula
+    desde la posición actual, sin historial de velocidad.
+    """
+    state = cache.get(vehicle_progress_key(vehicle_id))
+    if state and state["route_id"] == route_id:
+        return state
+    if not position or not position.get("last_update"):
+        return None
+    return track_fix(vehicle_id, route_id, position["lat"], position["lng"], position["last_update"])
+
+
+# ==========================
+# DESTINO Y ETA
+# ==========================
+def target_from_order(profile, order):
+    """
+    Distancia acumulada del punto con ese `order` (búsqueda binaria). None si no existe.
+    """
+    orders = profile["orders"]
+    i = bisect_left(orders, order)
+    if i < len(orders) and orders[i] == order:
+        return {"along_m": profile["cum"][i], "offset_m": 0.0}
+    return None
+
+
+def target_from_location(profile, lat, lng):
+    """
+    Punto de la ruta más cercano a (lat, lng). Solo se revisan los segmentos de
+    las celdas vecinas (índice espacial), no toda la polilínea.
+    None si la ruta no pasa a menos de ETA_TARGET_MAX_OFFSET_M.
+    """
+    radius = _setting("ETA_TARGET_MAX_OFFSET_M", 300)
+    seqs = set(
+        RouteSegmentCell.objects
+        .filter(route_id=profile["route_id"], **cell_filter(lat, lng, radius))
+        .values_list("seq", flat=True)
+    )
+
+    best = None
+    for seq in seqs:
+        found = project(profile, lat, lng, seq, seq + 1)
+        if found is not None and (best is None or found[2] < best[2]):
+            best = found
+    if best is None or best[2] > radius:
+        return None
+    return {"along_m": best[1], "offset_m": best[2]}
+
+
+def estimate(state, target, now=None):
+    """
+    ETA de un vehículo (estado de track_fix) a un destino (target_from_*).
+    status: "on_route", "passed" o "off_route"; en los dos últimos no hay ETA
+    (fuera de la ruta, proyectar el avance daría una hora falsa).
+    """
+    now = now or timezone.now()
+    remaining = target["along_m"] - state["along_m"]
+    offset = state.get("offset_m", 0.0)
+    off_route = offset > _off_route_m()
+    speed = state["speed_mps"]
+    if speed is None:
+        speed = _setting("ETA_DEFAULT_SPEED_MPS", 4.0)
+    speed = max(speed, _setting("ETA_MIN_SPEED_MPS", 1.0))
+
+    result = {
+        "vehicle_id": state["vehicle_id"],
+        "progress_m": round(state["along_m"], 1),
+        "remaining_m": round(max(remaining, 0.0), 1),
+        "speed_mps": round(speed, 2),
+        "offset_m": round(offset, 1),
+        "updated_at": state["at"],
+        "passed": remaining < 0,
+        "status": "off_route" if off_route else "passed" if remaining < 0 else "on_route",
+        "eta_seconds": None,
+        "eta": None,
+    }
+    if result["status"] == "on_route":
+        arrival = parse_datetime(state["at"]) + timedelta(seconds=remaining / speed)
+        result["eta_seconds"] = max(0, int((arrival - now).total_seconds()))
+        result["eta"] = arrival.isoformat()
+    return result
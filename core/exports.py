@@ -0,0 +1,179 @@
+import io
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ExportJob, Report
+from .reports import filter_reports, stream_reports_pdf, write_reports_csv
+
+logger = logging.getLogger(__name__)
+
+# ==========================
+# MODOS DE EJECUCIÓN
+# ==========================
+# - "thread": pool de hilos dentro del mismo proceso web (default, sin infraestructura extra)
+# - "worker": el proceso web solo crea el job; lo ejecuta `manage.py run_export_jobs`
+#   (recomendado si no se quiere gastar CPU de los workers de gunicorn)
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, "EXPORT_JOBS_THREADS", 1),
+                thread_name_prefix="export-job",
+            )
+        return _executor
+
+
+def _run_in_thread(job_id):
+    close_old_connections()
+    try:
+        run_export_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def submit_export_job(job):
+    """
+    Encola el job según EXPORT_JOBS_MODE. Se dispara al confirmar la transacción
+    para que el hilo siempre vea la fila creada.
+
+    En modo "thread" no hay un proceso aparte que barra los huérfanos: de paso
+    se reencolan los que dejó un worker web que se cayó.
+    """
+    if getattr(settings, "EXPORT_JOBS_MODE", "thread") != "thread":
+        return
+
+    def submit():
+        executor = _get_executor()
+        for job_id in [job.pk, *orphaned_jobs()]:
+            executor.submit(_run_in_thread, job_id)
+
+    transaction.on_commit(submit)
+
+
+# ==========================
+# JOBS HUÉRFANOS (arrendamiento)
+# ==========================
+def _lease_cutoff(now):
+    return now - timedelta(minutes=getattr(settings, "EXPORT_JOBS_LEASE_MINUTES", 30))
+
+
+def reap_stale_jobs(now=None):
+    """
+    Los jobs "running" con started_at más viejo que EXPORT_JOBS_LEASE_MINUTES
+    son de un proceso que murió (nadie más los va a terminar):
+    - vuelven a "pending" si les quedan intentos (EXPORT_JOBS_MAX_ATTEMPTS);
+    - si no, quedan "failed" (un job que tumba al worker no se reintenta para siempre).
+
+    Regresa {"requeued": n, "failed": n}.
+    """
+    now = now or timezone.now()
+    stale = ExportJob.objects.filter(status="running", started_at__lt=_lease_cutoff(now))
+    max_attempts = getattr(settings, "EXPORT_JOBS_MAX_ATTEMPTS", 3)
+
+    failed = stale.filter(attempts__gte=max_attempts).update(
+        status="failed",
+        error="El proceso que generaba la exportación se detuvo.",
+        finished_at=now,
+    )
+    requeued = stale.filter(attempts__lt=max_attempts).update(status="pending", started_at=None)
+    if requeued or failed:
+        logger.warning("Exportaciones huérfanas: %s reencoladas, %s fallidas", requeued, failed)
+    return {"requeued": requeued, "failed": failed}
+
+
+def orphaned_jobs(now=None):
+    """
+    (Modo "thread") ids de jobs pendientes que ningún hilo va a tomar: los que
+    reap_stale_jobs acaba de reencolar y los que se crearon antes de que se
+    cayera el proceso. _claim() evita que corran dos veces.
+    """
+    now = now or timezone.now()
+    reap_stale_jobs(now)
+    return list(
+        ExportJob.objects
+        .filter(status="pending", created_at__lt=_lease_cutoff(now))
+        .order_by("created_at")
+        .values_list("id", flat=True)[:20]
+    )
+
+
+def claim_next_job():
+    """
+    Toma el job pendiente más viejo (para el worker). Regresa el id o None.
+    """
+    for job_id in (
+        ExportJob.objects
+        .filter(status="pending")
+        .order_by("created_at")
+        .values_list("id", flat=True)[:5]
+    ):
+        if _claim(job_id):
+            return job_id
+    return None
+
+
+def _claim(job_id):
+    # UPDATE condicional: si dos procesos compiten, solo uno gana
+    return ExportJob.objects.filter(pk=job_id, status="pending").update(
+        status="running", started_at=timezone.now(), attempts=F("attempts") + 1
+    ) == 1
+
+
+def run_export_job(job_id, claimed=False):
+    """
+    Genera el archivo del job y lo guarda en default_storage.
+    Escribe primero a un archivo temporal (memoria constante) y luego lo sube.
+    """
+    if not claimed and not _claim(job_id):
+        return None
+
+    job = ExportJob.objects.get(pk=job_id)
+
+    try:
+        reports = filter_reports(
+            Report.objects.order_by("-fecha"),
+            job.filters or {},
+        )
+
+        with tempfile.TemporaryFile() as tmp:
+            if job.formato == "pdf":
+                rows = reports.count()
+                for chunk in stream_reports_pdf(reports):
+                    tmp.write(chunk)
+            else:
+                text = io.TextIOWrapper(tmp, encoding="utf-8-sig", newline="")
+                rows = write_reports_csv(reports, text)
+                text.flush()
+                text.detach()
+
+            tmp.seek(0)
+            filename = f"reportes_{job.pk}_{timezone.now():%Y%m%d%H%M%S}.{job.formato}"
+            job.file.save(filename, File(tmp), save=False)
+
+        job.rows = rows
+        job.status = "done"
+        job.finished_at = timezone.now()
+        job.save(update_fields=["file", "rows", "status", "finished_at"])
+
+    except Exception as e:
+        logger.exception("ERROR en exportación %s: %s", job_id, repr(e))
+        job.status = "failed"
+        job.error = str(e)[:1000]
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "error", "finished_at"])
+
+    return job
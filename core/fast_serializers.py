@@ -0,0 +1,295 @@
+"""
+Serialización rápida (solo lectura) para los listados calientes: rutas con
+puntos y comunidades, fechas, horarios y notificaciones.
+
+Misma salida que los ModelSerializer de core/serializers.py, pero armada con
+dicts planos desde .values_list():
+- un "plan" por recurso (columnas + convertidor de cada una) que se arma una
+  sola vez al importar el módulo, no por fila;
+- tablas de búsqueda a nivel de módulo (días de la semana);
+- cada ruta se serializa una vez y se reutiliza en todas sus fechas/horarios
+  (en lugar de volver a pasar por RouteSerializer en cada fila).
+
+Los POST/PUT siguen usando los serializers de DRF (validación).
+core/tests.py compara la salida de ambos caminos; `manage.py bench_serializers`
+mide filas/segundo.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from .geometry import geometry_payload, get_route_geometry
+from .inbox import broadcast_key, sender_payload
+from .models import DIA_SEMANA, Route, RouteCommunity, RouteGeometry, RoutePoint
+
+
+# ==========================
+# CONVERTIDORES (mismo formato que los campos de DRF)
+# ==========================
+def _datetime(value):
+    # DRF: zona horaria actual + ISO 8601, "+00:00" => "Z"
+    if settings.USE_TZ:
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        else:
+            value = timezone.make_aware(value)
+    text = value.isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _decimal(model, field_name):
+    quantum = Decimal(1).scaleb(-model._meta.get_field(field_name).decimal_places)
+
+    def convert(value):
+        return format(value.quantize(quantum), "f")
+
+    return convert
+
+
+# ==========================
+# DÍAS DE LA SEMANA
+# ==========================
+DAY_ORDER = ("Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo")
+
+DAY_ALIASES = {
+    "lunes": "Lunes",
+    "martes": "Martes",
+    "miercoles": "Miércoles",
+    "jueves": "Jueves",
+    "viernes": "Viernes",
+    "sabado": "Sábado",
+    "domingo": "Domingo",
+    "monday": "Lunes",
+    "tuesday": "Martes",
+    "wednesday": "Miércoles",
+    "thursday": "Jueves",
+    "friday": "Viernes",
+    "saturday": "Sábado",
+    "sunday": "Domingo",
+}
+
+_ACCENTS = str.maketrans("áéíóúü", "aeiouu", ".")
+
+
+def canonical_day(value):
+    """
+    "miercoles", "Wednesday", "2", "Miércoles." => "Miércoles" (0 = Lunes).
+    None si no se reconoce.
+    """
+    if value is None:
+        return None
+    low = str(value).strip().lower().translate(_ACCENTS).strip()
+    if not low:
+        return None
+    if low.isdigit():
+        n = int(low)
+        return DAY_ORDER[n] if 0 <= n <= 6 else None
+    return DAY_ALIASES.get(low)
+
+
+# Valor guardado => texto canónico (lo que hacía get_day_of_week_display + _to_canonical_es)
+DAY_DISPLAY = {value: canonical_day(label) for value, label in DIA_SEMANA}
+
+
+def _day(value):
+    day = DAY_DISPLAY.get(value)
+    return day if day is not None else canonical_day(value)
+
+
+# ==========================
+# PLANES
+# ==========================
+class Plan:
+    """
+    Qué columnas leer con values_list() y cómo pasar cada una a JSON.
+    `fields` = (nombre en la salida, campo ORM, convertidor o None).
+    Los None no pasan por el convertidor.
+    """
+    def __init__(self, *fields):
+        self.names = tuple(name for name, _, _ in fields)
+        self.columns = tuple(column for _, column, _ in fields)
+        self.converters = tuple((i, convert) for i, (_, _, convert) in enumerate(fields) if convert)
+
+    def _convert(self, row):
+        row = list(row)
+        for i, convert in self.converters:
+            if row[i] is not None:
+                row[i] = convert(row[i])
+        return row
+
+    def dicts(self, queryset):
+        names, convert = self.names, self._convert
+        return [dict(zip(names, convert(row))) for row in queryset.values_list(*self.columns)]
+
+    def grouped(self, queryset, key):
+        """
+        {valor de `key`: [dict, ...]} respetando el orden del queryset.
+        """
+        names, convert = self.names, self._convert
+        groups = defaultdict(list)
+        for row in queryset.values_list(key, *self.columns):
+            groups[row[0]].append(dict(zip(names, convert(row[1:]))))
+        return groups
+
+
+ROUTE_PLAN = Plan(
+    ("id", "id", None),
+    ("day_of_week", "day_of_week", None),
+    ("name", "name", None),
+    ("description", "description", None),
+    ("start_time", "start_time", _isoformat),
+    ("end_time", "end_time", _isoformat),
+    ("completed", "completed", None),
+    ("created_at", "created_at", _datetime),
+)
+
+POINT_PLAN = Plan(
+    ("id", "id", None),
+    ("latitude", "latitude", _decimal(RoutePoint, "latitude")),
+    ("longitude", "longitude", _decimal(RoutePoint, "longitude")),
+    ("order", "order", None),
+)
+
+COMMUNITY_PLAN = Plan(
+    ("id", "community_id", None),
+    ("name", "community__name", None),
+    ("created_at", "community__created_at", _datetime),
+)
+
+
+# ==========================
+# RUTAS
+# ==========================
+def serialize_routes(queryset, geometry=None):
+    """
+    = RouteSerializer(queryset, many=True, context=geometry).data
+    3 queries (rutas, puntos, comunidades) sin importar cuántas rutas haya;
+    con geometry={"zoom": N} van las polilíneas en lugar de los puntos.
+    """
+    routes = ROUTE_PLAN.dicts(queryset)
+    ids = [route["id"] for route in routes]
+    if not ids:
+        return routes
+
+    communities = COMMUNITY_PLAN.grouped(
+        RouteCommunity.objects
+        .filter(route_id__in=ids, community__isnull=False)
+        .order_by("community__name", "id"),
+        "route_id",
+    )
+
+    if geometry is None:
+        points = POINT_PLAN.grouped(
+            RoutePoint.objects.filter(route_id__in=ids).order_by("order", "id"),
+            "route_id",
+        )
+        for route in routes:
+            route["points"] = points.get(route["id"], [])
+            route["communities"] = communities.get(route["id"], [])
+        return routes
+
+    zoom = geometry["zoom"]
+    geometries = {g.route_id: g for g in RouteGeometry.objects.filter(route_id__in=ids, zoom=zoom)}
+    for route in routes:
+        route["communities"] = communities.get(route["id"], [])
+        found = geometries.get(route["id"]) or get_route_geometry(route["id"], zoom)
+        route["geometry"] = geometry_payload(found)
+    return routes
+
+
+def _routes_by_id(route_ids):
+    route_ids = [pk for pk in route_ids if pk is not None]
+    if not route_ids:
+        return {}
+    return {route["id"]: route for route in serialize_routes(Route.objects.filter(id__in=route_ids))}
+
+
+# ==========================
+# FECHAS Y HORARIOS
+# ==========================
+def serialize_route_dates(queryset):
+    """
+    = RouteDateSerializer(queryset, many=True).data, con la ruta anidada
+    serializada una sola vez por ruta.
+    """
+    rows = list(queryset.values_list("id", "route_id", "date", "created_at"))
+    routes = _routes_by_id({row[1] for row in rows})
+    return [
+        {
+            "id": pk,
+            "route": routes.get(route_id),
+            "date": day.isoformat(),
+            "created_at": _datetime(created_at),
+        }
+        for pk, route_id, day, created_at in rows
+    ]
+
+
+def serialize_route_schedules(queryset):
+    """
+    = RouteScheduleSerializer(queryset, many=True).data
+    """
+    rows = list(queryset.values_list("id", "route_id", "day_of_week", "start_time", "end_time", "created_at"))
+    routes = _routes_by_id({row[1] for row in rows})
+    result = []
+    for pk, route_id, day, start, end, created_at in rows:
+        route = routes.get(route_id)
+        result.append({
+            "id": pk,
+            "route": route,
+            "day_of_week": _day(day),
+            "route_day_of_week": route["day_of_week"] if route else None,
+            "start_time": start.isoformat(),
+            "end_time": end.isoformat(),
+            "created_at": _datetime(created_at),
+        })
+    return result
+
+
+# ==========================
+# NOTIFICACIONES (buzón del ciudadano)
+# ==========================
+def serialize_notifications(queryset):
+    """
+    Mensajes directos como los muestra /api/my-notifications/. created_at queda
+    como datetime: merge_newest() ordena por él y el JSONRenderer lo formatea.
+    """
+    rows = queryset.values_list(
+        "id", "message", "estado", "created_at", "sender_id", "sender__username", "sender__email",
+    )
+    return [
+        {
+            "id": pk,
+            "message": message,
+            "estado": estado,
+            "created_at": created_at,
+            "sender": sender_payload(sender_id, username, email),
+        }
+        for pk, message, estado, created_at, sender_id, username, email in rows
+    ]
+
+
+def serialize_broadcast_recipients(queryset):
+    """
+    Mensajes masivos (BroadcastRecipient) con la misma forma que los directos.
+    """
+    rows = queryset.values_list(
+        "broadcast_id", "broadcast__message", "read", "broadcast__created_at",
+        "broadcast__sender_id", "broadcast__sender__username", "broadcast__sender__email",
+    )
+    return [
+        {
+            "id": broadcast_key(broadcast_id),
+            "message": message,
+            "estado": "leida" if read else "pendiente",
+            "created_at": created_at,
+            "sender": sender_payload(sender_id, username, email),
+        }
+        for broadcast_id, message, read, created_at, sender_id, username, email in rows
+    ]
@@ -0,0 +1,236 @@
+"""
+Geometría compacta de rutas para el mapa.
+
+Las rutas densas (miles de RoutePoint) pesan mucho como lista de objetos JSON.
+Aquí se precalcula, por nivel de zoom, una polilínea simplificada con
+Douglas-Peucker y se guarda en formato "encoded polyline" (el de Google Maps /
+Leaflet.encoded), que ocupa ~5-6 bytes por punto.
+
+RoutePoint sigue siendo la fuente de verdad: RouteGeometry se puede borrar y
+volver a calcular en cualquier momento.
+"""
+import math
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import RouteGeometry, RoutePoint
+
+# Niveles precalculados. Un zoom pedido se sirve con el primer nivel >= a él
+# (nunca con menos detalle del que se ve en pantalla).
+GEOMETRY_ZOOMS = (10, 12, 14, 16, 18)
+
+POLYLINE_PRECISION = 5
+
+
+# ==========================
+# ENCODED POLYLINE
+# ==========================
+def _encode_value(value, out):
+    value = ~(value << 1) if value < 0 else value << 1
+    while value >= 0x20:
+        out.append(chr((0x20 | (value & 0x1F)) + 63))
+        value >>= 5
+    out.append(chr(value + 63))
+
+
+def encode_polyline(coords, precision=POLYLINE_PRECISION):
+    """
+    coords: [(lat, lng), ...] => str con el algoritmo de Google.
+    """
+    factor = 10 ** precision
+    out = []
+    prev_lat = prev_lng = 0
+    for lat, lng in coords:
+        lat_i = int(round(lat * factor))
+        lng_i = int(round(lng * factor))
+        _encode_value(lat_i - prev_lat, out)
+        _encode_value(lng_i - prev_lng, out)
+        prev_lat, prev_lng = lat_i, lng_i
+    return "".join(out)
+
+
+def decode_polyline(encoded, precision=POLYLINE_PRECISION):
+    factor = 10 ** precision
+    coords = []
+    index = lat = lng = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                b = ord(encoded[index]) - 63
+                index += 1
+                result |= (b & 0x1F) << shift
+                shift += 5
+                if b < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coords.append((lat / factor, lng / factor))
+    return coords
+
+
+# ==========================
+# SIMPLIFICACIÓN (Douglas-Peucker)
+# ==========================
+def zoom_tolerance(zoom, lat=0.0):
+    """
+    Tamaño de un pixel (en grados de latitud) a ese zoom, en mosaicos de 256px.
+    GEOMETRY_TOLERANCE_PX permite ser más o menos agresivo.
+    """
+    px = getattr(settings, "GEOMETRY_TOLERANCE_PX", 1.0)
+    return px * 360.0 / (256 * 2 ** zoom) * math.cos(math.radians(lat))
+
+
+def simplify(coords, tolerance):
+    """
+    Douglas-Peucker iterativo (sin recursión, rutas de 10k+ puntos).
+    Las distancias se miden con la longitud escalada por cos(lat) para que
+    un grado "valga" lo mismo en ambos ejes cerca de la ruta.
+    """
+    n = len(coords)
+    if n < 3 or tolerance <= 0:
+        return list(coords)
+
+    scale = math.cos(math.radians(sum(c[0] for c in coords) / n))
+    xs = [c[1] * scale for c in coords]
+    ys = [c[0] for c in coords]
+    tol2 = tolerance * tolerance
+
+    keep = [False] * n
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+
+    while stack:
+        first, last = stack.pop()
+        ax, ay = xs[first], ys[first]
+        dx, dy = xs[last] - ax, ys[last] - ay
+        seg2 = dx * dx + dy * dy
+
+        max_d2 = -1.0
+        index = first
+        for i in range(first + 1, last):
+            px, py = xs[i] - ax, ys[i] - ay
+            if seg2 == 0:
+                d2 = px * px + py * py
+            else:
+                t = (px * dx + py * dy) / seg2
+                if t < 0:
+                    t = 0.0
+                elif t > 1:
+                    t = 1.0
+                ex, ey = px - t * dx, py - t * dy
+                d2 = ex * ex + ey * ey
+            if d2 > max_d2:
+                max_d2 = d2
+                index = i
+
+        if max_d2 > tol2:
+            keep[index] = True
+            if index - first > 1:
+                stack.append((first, index))
+            if last - index > 1:
+                stack.append((index, last))
+
+    return [c for c, k in zip(coords, keep) if k]
+
+
+# ==========================
+# PRECÁLCULO Y LECTURA
+# ==========================
+def zoom_level(zoom):
+    """
+    zoom pedido (int o None) => nivel precalculado. Sin zoom => máximo detalle.
+    """
+    if zoom is None:
+        return GEOMETRY_ZOOMS[-1]
+    for level in GEOMETRY_ZOOMS:
+        if zoom <= level:
+            return level
+    return GEOMETRY_ZOOMS[-1]
+
+
+def parse_geometry_params(params):
+    """
+    Lee ?geometry=encoded&zoom=N.
+    Regresa None (formato normal con `points`) o {"geometry": "encoded", "zoom": nivel}.
+    Lanza ValueError si los parámetros no son válidos.
+    """
+    geometry = (params.get("geometry") or "").strip().lower()
+    if geometry in ("", "points"):
+        return None
+    if geometry != "encoded":
+        raise ValueError("geometry debe ser points o encoded.")
+
+    zoom = params.get("zoom")
+    if zoom in (None, ""):
+        return {"geometry": "encoded", "zoom": zoom_level(None)}
+    try:
+        zoom = int(zoom)
+    except (TypeError, ValueError):
+        raise ValueError("zoom debe ser un entero.")
+    if not 0 <= zoom <= 22:
+        raise ValueError("zoom fuera de rango (0-22).")
+    return {"geometry": "encoded", "zoom": zoom_level(zoom)}
+
+
+def build_route_geometries(route_id):
+    """
+    Recalcula todos los niveles de una ruta a partir de sus puntos.
+    Regresa {zoom: RouteGeometry}.
+    """
+    coords = [
+        (float(lat), float(lng))
+        for lat, lng in (
+            RoutePoint.objects
+            .filter(route_id=route_id)
+            .order_by("order", "id")
+            .values_list("latitude", "longitude")
+        )
+    ]
+    ref_lat = coords[0][0] if coords else 0.0
+
+    rows = []
+    for zoom in GEOMETRY_ZOOMS:
+        simplified = simplify(coords, zoom_tolerance(zoom, ref_lat))
+        rows.append(RouteGeometry(
+            route_id=route_id,
+            zoom=zoom,
+            encoded=encode_polyline(simplified),
+            point_count=len(simplified),
+            source_count=len(coords),
+        ))
+
+    with transaction.atomic():
+        RouteGeometry.objects.filter(route_id=route_id).delete()
+        RouteGeometry.objects.bulk_create(rows)
+
+    return {row.zoom: row for row in rows}
+
+
+def invalidate_route_geometries(route_id):
+    RouteGeometry.objects.filter(route_id=route_id).delete()
+
+
+def get_route_geometry(route_id, zoom):
+    """
+    Geometría de un nivel; si aún no existe (ruta vieja o invalidada) se calcula y guarda.
+    """
+    geometry = RouteGeometry.objects.filter(route_id=route_id, zoom=zoom).first()
+    if geometry is None:
+        geometry = build_route_geometries(route_id)[zoom]
+    return geometry
+
+
+def geometry_payload(geometry):
+    return {
+        "format": "polyline",
+        "precision": POLYLINE_PRECISION,
+        "zoom": geometry.zoom,
+        "polyline": geometry.encoded,
+        "point_count": geometry.point_count,
+        "source_count": geometry.source_count,
+    }
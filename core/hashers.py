@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ConfigurablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2-SHA256 con iteraciones tomadas de PASSWORD_PBKDF2_ITERATIONS.
+
+    Mismo algoritmo ("pbkdf2_sha256") que el hasher de Django, así que los hashes
+    existentes siguen funcionando; al iniciar sesión Django los vuelve a generar
+    con el número de iteraciones configurado.
+    """
+
+    @property
+    def iterations(self):
+        return getattr(settings, "PASSWORD_PBKDF2_ITERATIONS", PBKDF2PasswordHasher.iterations)
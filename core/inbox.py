@@ -0,0 +1,413 @@
+"""
+Buzón del ciudadano: contador de no leídos cacheado, sincronización incremental
+(?since=cursor), páginas hacia atrás (?before=cursor) y marcado masivo como leído.
+
+El buzón junta dos fuentes:
+- Notification: mensajes directos (una fila completa por mensaje)
+- BroadcastRecipient: mensajes masivos (el texto vive una vez en Broadcast).
+  En la API su id es "b<broadcast_id>" para no chocar con los de Notification.
+
+El cursor guarda, por cada fuente, (updated_at, id) de la última fila que el
+cliente ya vio, incluyendo las que luego se borraron: así un polling sin
+cambios es una consulta por fuente al índice (usuario, updated_at, id) que no
+regresa filas.
+"""
+import heapq
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+from .cache import INBOX_BROADCASTS, bump_version, get_version
+from .models import Broadcast, BroadcastRecipient, Notification
+
+INBOX_DEFAULT_LIMIT = 50
+INBOX_MAX_LIMIT = 200
+UNREAD_TTL = 60 * 60 * 24
+
+_FIELDS = (
+    "id", "message", "estado", "created_at", "updated_at",
+    "deleted_globally", "deleted_by_user", "expired",
+    "sender_id", "sender__username", "sender__email",
+)
+
+_BROADCAST_FIELDS = (
+    "id", "broadcast_id", "read", "updated_at", "deleted_by_user",
+    "broadcast__message", "broadcast__created_at", "broadcast__deleted_globally",
+    "broadcast__sender_id", "broadcast__sender__username", "broadcast__sender__email",
+)
+
+BROADCAST_PREFIX = "b"
+
+
+def broadcast_key(broadcast_id):
+    return f"{BROADCAST_PREFIX}{broadcast_id}"
+
+
+def split_ids(values):
+    """
+    [1, "b7", "3"] => ([1, 3], [7]): ids de Notification y de Broadcast.
+    Lanza ValueError si alguno no es válido.
+    """
+    ids, broadcast_ids = [], []
+    for value in values:
+        if isinstance(value, str) and value.startswith(BROADCAST_PREFIX):
+            broadcast_ids.append(int(value[len(BROADCAST_PREFIX):]))
+        else:
+            ids.append(int(value))
+    return ids, broadcast_ids
+
+
+def visible_q():
+    return Q(deleted_globally=False, deleted_by_user=False, expired=False)
+
+
+# ⚠️ Estos filtros deben coincidir con la condición de los índices parciales de
+# Notification (core_notif_inbox_visible_idx / core_notif_admin_feed_idx);
+# si no, la base no puede usarlos.
+def inbox_queryset(user_id):
+    return (
+        Notification.objects
+        .filter(visible_q(), usuario_id=user_id)
+        .order_by("-created_at", "-id")
+    )
+
+
+def admin_feed_queryset():
+    return Notification.objects.filter(deleted_globally=False).order_by("-created_at")
+
+
+# broadcast_id crece con created_at: ordenar por él usa core_bcast_inbox_visible_idx
+def inbox_broadcasts_queryset(user_id):
+    return (
+        BroadcastRecipient.objects
+        .filter(usuario_id=user_id, deleted_by_user=False, broadcast__deleted_globally=False)
+        .order_by("-broadcast_id")
+    )
+
+
+def admin_broadcasts_queryset():
+    return Broadcast.objects.filter(deleted_globally=False).order_by("-created_at")
+
+
+def merge_newest(*sources, key=lambda item: item["created_at"], limit=None):
+    """
+    Junta listas ya ordenadas de la más nueva a la más vieja (sin reordenar todo).
+    """
+    merged = heapq.merge(*sources, key=key, reverse=True)
+    if limit is None:
+        return list(merged)
+    return [item for _, item in zip(range(limit), merged)]
+
+
+def sender_payload(sender_id, username, email):
+    return {"id": sender_id, "username": username, "email": email} if sender_id else None
+
+
+def _payload(row):
+    return {
+        "id": row["id"],
+        "message": row["message"],
+        "estado": row["estado"],
+        "created_at": row["created_at"],
+        "updated_at": row["updated_at"],
+        "sender": sender_payload(row["sender_id"], row["sender__username"], row["sender__email"]),
+    }
+
+
+def _broadcast_payload(row):
+    return {
+        "id": broadcast_key(row["broadcast_id"]),
+        "message": row["broadcast__message"],
+        "estado": "leida" if row["read"] else "pendiente",
+        "created_at": row["broadcast__created_at"],
+        "updated_at": row["updated_at"],
+        "sender": sender_payload(
+            row["broadcast__sender_id"],
+            row["broadcast__sender__username"],
+            row["broadcast__sender__email"],
+        ),
+    }
+
+
+# ==========================
+# CONTADOR DE NO LEÍDOS
+# ==========================
+# Un mensaje masivo cambia el contador de todos: en lugar de tocar N llaves se
+# sube la versión INBOX_BROADCASTS, que forma parte de cada llave.
+def _unread_key(user_id):
+    return f"sc:inbox_unread:{user_id}:{get_version(INBOX_BROADCASTS)}"
+
+
+def unread_count(user_id):
+    key = _unread_key(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = (
+            Notification.objects
+            .filter(visible_q(), usuario_id=user_id)
+            .exclude(estado="leida")
+            .count()
+        ) + inbox_broadcasts_queryset(user_id).filter(read=False).count()
+        cache.set(key, count, timeout=UNREAD_TTL)
+    return count
+
+
+def adjust_unread(user_id, delta):
+    """
+    Suma/resta al contador cuando se confirma la transacción.
+    Si la llave no existe no hace nada: el próximo unread_count() la recalcula.
+    """
+    if not delta:
+        return
+
+    def _apply():
+        try:
+            cache.incr(_unread_key(user_id), delta)
+        except ValueError:
+            pass
+
+    transaction.on_commit(_apply)
+
+
+# Se usa al enviar o borrar un mensaje masivo: cambia el contador de todos
+def broadcast_sent():
+    transaction.on_commit(lambda: bump_version(INBOX_BROADCASTS))
+
+
+# ==========================
+# CURSOR
+# ==========================
+# Posición por fuente: (updated_at, id) o None (= desde el principio)
+def _encode_position(position):
+    return f"{position[0].isoformat()}|{position[1]}" if position else ""
+
+
+def _decode_position(raw):
+    if not raw:
+        return None
+    ts, pk = raw.rsplit("|", 1)
+    updated_at = parse_datetime(ts)
+    if updated_at is None:
+        raise ValueError
+    return updated_at, int(pk)
+
+
+def encode_cursor(position, broadcast_position=None):
+    raw = f"{_encode_position(position)};{_encode_position(broadcast_position)}"
+    return urlsafe_base64_encode(force_bytes(raw))
+
+
+def decode_cursor(cursor):
+    """
+    Cursor opaco = base64("updated_at ISO|id;updated_at ISO|id"), una parte por fuente.
+    Regresa (posición_notificaciones, posición_masivos). Lanza ValueError si no es válido.
+    """
+    try:
+        raw = urlsafe_base64_decode(cursor).decode()
+        first, second = raw.split(";", 1)
+        position, broadcast_position = _decode_position(first), _decode_position(second)
+        if position is None and broadcast_position is None:
+            raise ValueError
+        return position, broadcast_position
+    except Exception:
+        raise ValueError("cursor inválido")
+
+
+def _latest(queryset):
+    return queryset.order_by("-updated_at", "-id").values_list("updated_at", "id").first()
+
+
+def _latest_cursor(user_id):
+    position = _latest(Notification.objects.filter(usuario_id=user_id))
+    broadcast_position = _latest(BroadcastRecipient.objects.filter(usuario_id=user_id))
+    if position is None and broadcast_position is None:
+        return None
+    return encode_cursor(position, broadcast_position)
+
+
+def _after(queryset, position):
+    if position is None:
+        return queryset
+    updated_at, pk = position
+    return queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk))
+
+
+# ==========================
+# PÁGINAS HACIA ATRÁS (?before=)
+# ==========================
+# Keyset en el mismo orden que los índices del buzón: (created_at, id) para
+# Notification y broadcast_id para los masivos. None = desde el más nuevo; una
+# fuente de la que la página no usó nada se queda en None (todas sus filas
+# visibles son más viejas que lo mostrado).
+def encode_before(position, broadcast_id=None):
+    raw = f"{_encode_position(position)};{broadcast_id or ''}"
+    return urlsafe_base64_encode(force_bytes(raw))
+
+
+def decode_before(cursor):
+    """
+    Cursor opaco = base64("created_at ISO|id;broadcast_id").
+    Regresa (posición_notificaciones, broadcast_id). Lanza ValueError si no es válido.
+    """
+    try:
+        first, second = urlsafe_base64_decode(cursor).decode().split(";", 1)
+        position = _decode_position(first)
+        broadcast_id = int(second) if second else None
+        if position is None and broadcast_id is None:
+            raise ValueError
+        return position, broadcast_id
+    except Exception:
+        raise ValueError("cursor inválido")
+
+
+def _page(user_id, position, broadcast_id, limit):
+    """
+    Las `limit` visibles más recientes anteriores a la posición de cada fuente.
+    Se leen limit+1 filas por fuente para saber si quedan más.
+    """
+    direct_qs = inbox_queryset(user_id)
+    if position is not None:
+        created_at, pk = position
+        direct_qs = direct_qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    broadcasts_qs = inbox_broadcasts_queryset(user_id)
+    if broadcast_id is not None:
+        broadcasts_qs = broadcasts_qs.filter(broadcast_id__lt=broadcast_id)
+
+    direct = list(direct_qs.values(*_FIELDS)[:limit + 1])
+    broadcasts = list(broadcasts_qs.values(*_BROADCAST_FIELDS)[:limit + 1])
+    rows = merge_newest(
+        ((0, r) for r in direct),
+        ((1, r) for r in broadcasts),
+        key=lambda item: item[1]["created_at"] if item[0] == 0 else item[1]["broadcast__created_at"],
+        limit=limit,
+    )
+
+    results = []
+    for source, row in rows:
+        if source == 0:
+            position = (row["created_at"], row["id"])
+            results.append(_payload(row))
+        else:
+            broadcast_id = row["broadcast_id"]
+            results.append(_broadcast_payload(row))
+
+    has_more = len(rows) < len(direct) + len(broadcasts)
+    return {
+        "results": results,
+        "has_more": has_more,
+        "before": encode_before(position, broadcast_id) if has_more else None,
+    }
+
+
+# ==========================
+# LECTURA
+# ==========================
+def inbox_snapshot(user_id, limit=INBOX_DEFAULT_LIMIT):
+    """
+    Primera carga: las `limit` notificaciones visibles más recientes (directas y
+    masivas), el cursor desde el que hay que sincronizar después y, si hay más,
+    el cursor `before` para pedir las anteriores.
+    """
+    cursor = _latest_cursor(user_id)
+    page = _page(user_id, None, None, limit)
+    return {
+        "results": page["results"],
+        "deleted": [],
+        "unread": unread_count(user_id),
+        "next_cursor": cursor,
+        "has_more": page["has_more"],
+        "before": page["before"],
+    }
+
+
+def inbox_older(user_id, before, limit=INBOX_DEFAULT_LIMIT):
+    """
+    Página anterior a `before` (cursor de inbox_snapshot o de la página previa).
+    No mueve el cursor de sincronización: lo viejo que cambie llega por ?since=.
+    """
+    position, broadcast_id = decode_before(before)
+    page = _page(user_id, position, broadcast_id, limit)
+    page["unread"] = unread_count(user_id)
+    return page
+
+
+def inbox_changes(user_id, cursor, limit=INBOX_DEFAULT_LIMIT):
+    """
+    Todo lo que cambió después del cursor, en orden (updated_at, id):
+    - results: nuevas o modificadas (p.ej. marcadas como leídas)
+    - deleted: ids que el cliente debe quitar
+
+    Se leen limit+1 filas de cada fuente y se toman las `limit` primeras en
+    conjunto; cada parte del cursor avanza solo hasta la última fila usada de su fuente.
+    """
+    position, broadcast_position = decode_cursor(cursor)
+    direct = list(
+        _after(Notification.objects.filter(usuario_id=user_id), position)
+        .order_by("updated_at", "id")
+        .values(*_FIELDS)[:limit + 1]
+    )
+    broadcasts = list(
+        _after(BroadcastRecipient.objects.filter(usuario_id=user_id), broadcast_position)
+        .order_by("updated_at", "id")
+        .values(*_BROADCAST_FIELDS)[:limit + 1]
+    )
+
+    rows = heapq.merge(
+        ((r["updated_at"], 0, r["id"], r) for r in direct),
+        ((r["updated_at"], 1, r["id"], r) for r in broadcasts),
+        key=lambda item: item[:3],
+    )
+    consumed = [item for _, item in zip(range(limit), rows)]
+    has_more = len(consumed) < len(direct) + len(broadcasts)
+
+    results = []
+    deleted = []
+    for updated_at, source, pk, row in consumed:
+        if source == 0:
+            position = (updated_at, pk)
+            if row["deleted_globally"] or row["deleted_by_user"] or row["expired"]:
+                deleted.append(row["id"])
+            else:
+                results.append(_payload(row))
+        else:
+            broadcast_position = (updated_at, pk)
+            if row["broadcast__deleted_globally"] or row["deleted_by_user"]:
+                deleted.append(broadcast_key(row["broadcast_id"]))
+            else:
+                results.append(_broadcast_payload(row))
+
+    return {
+        "results": results,
+        "deleted": deleted,
+        "unread": unread_count(user_id),
+        "next_cursor": encode_cursor(position, broadcast_position) if consumed else cursor,
+        "has_more": has_more,
+    }
+
+
+# ==========================
+# ESCRITURA
+# ==========================
+def mark_read(user_id, ids=None, broadcast_ids=None):
+    """
+    Marca como leídas con un UPDATE por fuente: todas (sin ids) o solo
+    `ids` (Notification) / `broadcast_ids` (Broadcast).
+    Regresa cuántas cambiaron.
+    """
+    qs = Notification.objects.filter(visible_q(), usuario_id=user_id).exclude(estado="leida")
+    broadcasts_qs = inbox_broadcasts_queryset(user_id).filter(read=False).order_by()
+    if ids is not None or broadcast_ids is not None:
+        qs = qs.filter(id__in=ids or [])
+        broadcasts_qs = broadcasts_qs.filter(broadcast_id__in=broadcast_ids or [])
+
+    now = timezone.now()
+    with transaction.atomic():
+        updated = qs.update(estado="leida", updated_at=now)
+        updated += broadcasts_qs.update(read=True, updated_at=now)
+        adjust_unread(user_id, -updated)
+    return updated
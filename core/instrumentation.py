@@ -0,0 +1,169 @@
+"""
+Instrumentación por petición: tiempo total, número y tiempo de queries, tiempo
+de render (serialización de la Response de DRF) y bytes de respuesta.
+
+- Header Server-Timing en cada petición medida (DevTools > Network > Timing).
+- Ventana móvil en memoria por método + patrón de URL, con p50/p95/p99:
+  /api/admin/metrics/.
+
+Con INSTRUMENTATION_SAMPLE_RATE < 1 solo se mide esa fracción de peticiones;
+las demás no pagan más que un random(). Igual que los contadores del cache de
+lectura, los números son del proceso (worker) que responde.
+"""
+import logging
+import math
+import random
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# (total_ms, db_ms, queries, render_ms, bytes)
+_windows = {}
+_lock = threading.Lock()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class QueryTimer:
+    """
+    execute_wrapper que cuenta queries y su tiempo (funciona con DEBUG=False).
+    """
+    def __init__(self):
+        self.count = 0
+        self.ms = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        t0 = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.ms += (time.perf_counter() - t0) * 1000
+
+
+# ==========================
+# VENTANA MÓVIL Y PERCENTILES
+# ==========================
+def record(pattern, sample):
+    with _lock:
+        window = _windows.get(pattern)
+        if window is None:
+            window = _windows[pattern] = deque(maxlen=_setting("INSTRUMENTATION_WINDOW", 1000))
+        window.append(sample)
+
+
+def reset_metrics():
+    with _lock:
+        _windows.clear()
+
+
+def percentile(sorted_values, p):
+    """
+    Percentil por rango más cercano sobre una lista ya ordenada.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _summary(values, points=(50, 95, 99)):
+    values = sorted(values)
+    summary = {f"p{p}": round(percentile(values, p), 2) for p in points}
+    summary["max"] = round(values[-1], 2)
+    return summary
+
+
+def metrics_snapshot():
+    """
+    [{pattern, count, total_ms, db_ms, render_ms, queries, bytes}, ...]
+    de la más lenta (p95) a la más rápida.
+    """
+    with _lock:
+        windows = {pattern: list(window) for pattern, window in _windows.items()}
+
+    result = []
+    for pattern, samples in windows.items():
+        total, db, queries, render, size = zip(*samples)
+        result.append({
+            "pattern": pattern,
+            "count": len(samples),
+            "total_ms": _summary(total),
+            "db_ms": _summary(db),
+            "render_ms": _summary(render),
+            "queries": _summary(queries, points=(50, 95)),
+            "bytes": _summary(size, points=(50,)),
+        })
+    result.sort(key=lambda item: item["total_ms"]["p95"], reverse=True)
+    return result
+
+
+# ==========================
+# MIDDLEWARE
+# ==========================
+def _pattern(request):
+    match = getattr(request, "resolver_match", None)
+    route = match.route if match is not None else "(sin ruta)"
+    return f"{request.method} {route}"
+
+
+def _server_timing(total_ms, db_ms, queries, render_ms):
+    app_ms = max(total_ms - db_ms - render_ms, 0.0)
+    return (
+        f'app;dur={app_ms:.1f}, db;dur={db_ms:.1f};desc="{queries} queries", '
+        f"render;dur={render_ms:.1f}, total;dur={total_ms:.1f}"
+    )
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        rate = _setting("INSTRUMENTATION_SAMPLE_RATE", 1.0)
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        request._metrics_render_ms = 0.0
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        render_ms = request._metrics_render_ms
+
+        if _setting("INSTRUMENTATION_SERVER_TIMING", True):
+            response["Server-Timing"] = _server_timing(total_ms, timer.ms, timer.count, render_ms)
+
+        # SSE / PDF en streaming / descargas: el tiempo hasta los headers no dice nada del endpoint
+        if response.streaming:
+            return response
+
+        pattern = _pattern(request)
+        size = len(response.content)
+        record(pattern, (total_ms, timer.ms, timer.count, render_ms, size))
+
+        if total_ms >= _setting("INSTRUMENTATION_SLOW_MS", 1000):
+            logger.warning(
+                "Petición lenta %s: %.1f ms, %d queries (%.1f ms en base), %d bytes",
+                pattern, total_ms, timer.count, timer.ms, size,
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # Django llama a response.render() justo después de esto
+        if hasattr(request, "_metrics_render_ms"):
+            t0 = time.perf_counter()
+
+            def _rendered(_response):
+                request._metrics_render_ms = (time.perf_counter() - t0) * 1000
+
+            response.add_post_render_callback(_rendered)
+        return response
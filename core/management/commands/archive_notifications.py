@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.retention import archive_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve a NotificationArchive las notificaciones borradas y las leídas expiradas, "
+        "y marca como expiradas las leídas antiguas, en lotes acotados. Con --interval se queda corriendo como tarea programada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Filas por lote (NOTIFICATIONS_ARCHIVE_BATCH).")
+        parser.add_argument("--max-batches", type=int, default=None, help="Tope de lotes por corrida.")
+        parser.add_argument("--interval", type=float, default=None, help="Segundos entre corridas; sin él corre una vez.")
+        parser.add_argument("--dry-run", action="store_true", help="Solo cuenta candidatas.")
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            stats = archive_notifications(
+                batch_size=options["batch_size"],
+                max_batches=options["max_batches"],
+                dry_run=options["dry_run"],
+            )
+
+            verb = "Candidatas" if options["dry_run"] else "Archivadas"
+            self.stdout.write(
+                f"{verb}: {stats['deleted']} borradas, {stats['read']} leídas, "
+                f"{stats['expired']} marcadas como expiradas, "
+                f"{stats['recipients']} destinatarios de masivos "
+                f"({stats['batches']} lotes, {stats['seconds']}s)"
+            )
+
+            if options["interval"] is None:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS("✅ Archivo de notificaciones terminado."))
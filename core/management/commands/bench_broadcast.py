@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import rolled_back
+from core.broadcasts import fan_out_broadcast
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el tiempo de un mensaje masivo (fan-out) con N usuarios sintéticos. "
+        "Todo corre dentro de una transacción que se revierte al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="1000,10000,100000",
+            help="Cantidades de usuarios a probar, separadas por coma.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in str(options["sizes"]).split(",") if s.strip()]
+        chunk_size = options["chunk_size"]
+
+        self.stdout.write(f"{'usuarios':>10} {'destin.':>10} {'bloques':>8} {'total ms':>10} {'ms/1k':>8}")
+
+        for size in sizes:
+            with rolled_back():
+                sender = User.objects.create(
+                    username=f"bench_sender_{size}",
+                    email=f"bench_sender_{size}@bench.local",
+                    role="admin",
+                )
+                User.objects.bulk_create(
+                    [
+                        User(
+                            username=f"bench_{size}_{i}",
+                            email=f"bench_{size}_{i}@bench.local",
+                            password="!",
+                        )
+                        for i in range(size)
+                    ],
+                    batch_size=5000,
+                )
+
+                t0 = time.perf_counter()
+                result = fan_out_broadcast(sender, "Mensaje de prueba", chunk_size=chunk_size)
+                elapsed_ms = (time.perf_counter() - t0) * 1000
+
+                per_k = elapsed_ms / max(result["sent"] / 1000, 1)
+                self.stdout.write(
+                    f"{size:>10} {result['sent']:>10} {len(result['chunks']):>8} "
+                    f"{elapsed_ms:>10.1f} {per_k:>8.2f}"
+                )
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark terminado (datos revertidos)."))
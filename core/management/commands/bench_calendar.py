@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import bench_client, measure, rolled_back
+from core.models import User, Route, RoutePoint, RouteDate
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara /api/calendar/ con un año de historial completo vs. la ventana por defecto "
+        "y una de un mes. "
+        "Los datos sintéticos se revierten al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--routes", type=int, default=20)
+        parser.add_argument("--points", type=int, default=50)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        n_routes = options["routes"]
+        n_points = options["points"]
+        n_days = options["days"]
+        start = date.today() - timedelta(days=n_days // 2)
+
+        with rolled_back():
+            user = User.objects.create(username="bench_calendar", email="bench_calendar@bench.local")
+
+            routes = Route.objects.bulk_create([Route(name=f"Bench {i}") for i in range(n_routes)])
+            RoutePoint.objects.bulk_create(
+                [
+                    RoutePoint(route=r, latitude=14.8 + j / 10000, longitude=-91.5 - j / 10000, order=j)
+                    for r in routes
+                    for j in range(n_points)
+                ],
+                batch_size=5000,
+            )
+            RouteDate.objects.bulk_create(
+                [
+                    RouteDate(route=r, date=start + timedelta(days=d))
+                    for r in routes
+                    for d in range(n_days)
+                ],
+                batch_size=5000,
+            )
+
+            window_from = date.today().replace(day=1)
+            window_to = window_from + timedelta(days=31)
+
+            end = start + timedelta(days=n_days)
+            cases = [
+                ("historial completo", f"/api/calendar/?from={start}&to={end}"),
+                ("sin parámetros", "/api/calendar/"),
+                ("ventana 1 mes", f"/api/calendar/?from={window_from}&to={window_to}"),
+                ("página keyset (100)", f"/api/calendar/?from={window_from}&limit=100"),
+            ]
+
+            self.stdout.write(f"{n_routes} rutas × {n_days} días = {n_routes * n_days} fechas")
+            self.stdout.write(f"{'caso':<22} {'ms p50':>9} {'queries':>8} {'bytes':>12}")
+
+            with bench_client(user) as client:
+                for label, url in cases:
+                    r = measure(client, url, repeat=options["repeat"])
+                    self.stdout.write(f"{label:<22} {r['ms_p50']:>9.1f} {r['queries']:>8} {r['bytes']:>12}")
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark terminado (datos revertidos)."))
@@ -0,0 +1,239 @@
+import json
+import re
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import URLResolver, get_resolver
+
+from core.benchmarks import bench_client, measure, rolled_back
+from core.models import (
+    Broadcast, Community, ExportJob, Notification, Report, Route, RouteCommunity,
+    RouteDate, RoutePoint, RouteSchedule, User, Vehicle,
+)
+from core.synthetic import DEFAULTS, seed_municipality
+
+LABEL = "bench"
+DEFAULT_OUTPUT = Path(settings.BASE_DIR) / "bench" / "endpoints.json"
+
+# Modelo del que sale <pk> según lo que va antes en la ruta
+PK_SOURCES = {
+    "api/my-reports/": Report,
+    "api/my-notifications/": Notification,
+    "api/my-notifications/b": Broadcast,
+    "api/admin/reports/": Report,
+    "api/admin/exports/": ExportJob,
+    "api/admin/routes/": Route,
+    "api/admin/route-dates/": RouteDate,
+    "api/admin/route-schedules/": RouteSchedule,
+    "api/admin/messages/": Notification,
+    "api/admin/messages/b": Broadcast,
+    "api/admin/communities/": Community,
+    "api/admin/route-communities/": RouteCommunity,
+}
+
+# Variantes con query string que vale la pena medir aparte
+EXTRA_CASES = (
+    ("api/routes/", "geometry=encoded&zoom=12"),
+    ("api/admin/routes/", "geometry=encoded&zoom=14"),
+    ("api/calendar/", "from={today}&to={month}"),
+    ("api/calendar/", "limit=100"),
+    ("api/citizen/routes/near/", "lat={lat}&lng={lng}&radius=500"),
+    ("api/routes/<int:route_id>/eta/", "point={point}"),
+    ("api/admin/route-communities/", "route_id={route_id}"),
+    ("api/admin/messages/", "limit=50"),
+    ("api/inbox/", "limit=50"),
+)
+
+# SSE: la respuesta no termina, no se puede medir así
+SKIP = re.compile(r"/stream/$")
+PARAM = re.compile(r"<(?:\w+:)?(\w+)>")
+
+
+def api_patterns(patterns=None, prefix=""):
+    """
+    Todas las rutas de smart_collector/urls.py que empiezan con api/.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from api_patterns(pattern.url_patterns, route)
+        elif route.startswith("api/"):
+            yield route
+
+
+def _first_pk(model, **filters):
+    return model.objects.filter(**filters).order_by("pk").values_list("pk", flat=True).first() or 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide con el test client todas las rutas api/ (GET) sobre un municipio sintético "
+        "y guarda latencia, queries y bytes en un JSON base. Los datos se revierten al final."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULTS.items():
+            parser.add_argument(f"--{name}", type=int, default=default)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--only", default="", help="Solo rutas que contengan este texto.")
+        parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="Archivo JSON de salida ('-' = no guardar).")
+        parser.add_argument("--compare", default=None, help="JSON base contra el cual comparar.")
+        parser.add_argument(
+            "--fail-on-regression", action="store_true",
+            help="Termina con error si algún endpoint hace más queries que en --compare.",
+        )
+
+    def handle(self, *args, **options):
+        sizes = {name: options[name] for name in DEFAULTS}
+
+        with rolled_back():
+            seed_municipality(label=LABEL, seed=options["seed"], **sizes)
+            results = self._run_all(options)
+
+        baseline = {
+            "database": connection.vendor,
+            "dataset": {**sizes, "seed": options["seed"]},
+            "repeat": options["repeat"],
+            "endpoints": results,
+        }
+
+        if options["output"] != "-":
+            output = Path(options["output"])
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(json.dumps(baseline, indent=2, sort_keys=True, ensure_ascii=False) + "\n")
+            self.stdout.write(f"Guardado en {output}")
+
+        if options["compare"]:
+            regressions = self._compare(json.loads(Path(options["compare"]).read_text()), baseline)
+            if regressions and options["fail_on_regression"]:
+                raise CommandError(f"{regressions} endpoint(s) con más queries que la base.")
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark terminado (datos revertidos)."))
+
+    # ==========================
+    # CASOS
+    # ==========================
+    def _context(self, citizen):
+        route_id = _first_pk(Route, name__startswith=f"{LABEL} ")
+        first_point = RoutePoint.objects.filter(route_id=route_id).order_by("order").first()
+        today = date.today()
+        return {
+            "route_id": route_id,
+            "vehicle_id": _first_pk(Vehicle, name__startswith=f"{LABEL} "),
+            "lat": float(first_point.latitude) if first_point else 0,
+            "lng": float(first_point.longitude) if first_point else 0,
+            "point": RoutePoint.objects.filter(route_id=route_id).count() // 2,
+            "today": today.isoformat(),
+            "month": (today + timedelta(days=31)).isoformat(),
+            "citizen": citizen,
+        }
+
+    def _url(self, route, ctx):
+        def fill(match):
+            name = match.group(1)
+            if name != "pk":
+                return str(ctx[name])
+            model = PK_SOURCES.get(route[:match.start()])
+            if model is None:
+                return "0"
+            if model in (Report, Notification) and route.startswith("api/my-"):
+                owner = {"user": ctx["citizen"]} if model is Report else {"usuario": ctx["citizen"]}
+                return str(_first_pk(model, **owner))
+            return str(_first_pk(model))
+
+        return "/" + PARAM.sub(fill, route)
+
+    def _run_all(self, options):
+        admin = User.objects.get(username=f"{LABEL}_admin")
+        citizen = User.objects.filter(username__startswith=f"{LABEL}_0").order_by("pk").first()
+        ctx = self._context(citizen)
+
+        # La llave usa la plantilla (no los valores) para que el JSON no cambie
+        # con la fecha o con los ids que asigne la base
+        cases = [(route, "") for route in api_patterns()]
+        cases += list(EXTRA_CASES)
+        if options["only"]:
+            cases = [c for c in cases if options["only"] in c[0]]
+
+        self.stdout.write(
+            f"{'endpoint':<58} {'st':>3} {'frío ms':>8} {'ms p50':>8} {'q frío':>6} {'q':>4} {'bytes':>9}"
+        )
+
+        results = {}
+        # Sin instrumentación: se mide el endpoint, no el middleware
+        with override_settings(INSTRUMENTATION_SAMPLE_RATE=0), \
+                bench_client(admin) as admin_client, bench_client(citizen) as citizen_client:
+            for route, query in cases:
+                key = f"GET {route}" + (f"?{query}" if query else "")
+                if SKIP.search(route):
+                    results[key] = {"skipped": "SSE"}
+                    continue
+
+                client = admin_client if route.startswith("api/admin/") else citizen_client
+                url = self._url(route, ctx) + (f"?{query.format(**ctx)}" if query else "")
+                try:
+                    cache.clear()
+                    cold = measure(client, url, repeat=1, consume_stream=True)
+                    warm = measure(client, url, repeat=options["repeat"], consume_stream=True)
+                except Exception as e:
+                    results[key] = {"error": repr(e)}
+                    self.stdout.write(self.style.ERROR(f"{key:<58} {e!r}"))
+                    continue
+
+                results[key] = {
+                    "status": warm["status"],
+                    "cold_ms": cold["ms_p50"],
+                    "ms_p50": warm["ms_p50"],
+                    "ms_min": warm["ms_min"],
+                    "queries_cold": cold["queries"],
+                    "queries": warm["queries"],
+                    "bytes": warm["bytes"],
+                }
+                self.stdout.write(
+                    f"{key[:58]:<58} {warm['status']:>3} {cold['ms_p50']:>8.1f} {warm['ms_p50']:>8.1f} "
+                    f"{cold['queries']:>6} {warm['queries']:>4} {warm['bytes']:>9}"
+                )
+        return results
+
+    # ==========================
+    # COMPARACIÓN CON LA BASE
+    # ==========================
+    def _compare(self, old, new):
+        """
+        Imprime lo que cambió. Regresa cuántos endpoints subieron de queries.
+        """
+        regressions = 0
+        self.stdout.write("")
+        self.stdout.write(f"{'cambios vs. base':<58} {'queries':>12} {'bytes':>20} {'ms p50':>16}")
+        for key, now in sorted(new["endpoints"].items()):
+            before = old.get("endpoints", {}).get(key)
+            if before is None or "status" not in now or "status" not in before:
+                if before is None:
+                    self.stdout.write(f"{key[:58]:<58} (nuevo)")
+                continue
+
+            more_queries = now["queries_cold"] > before["queries_cold"] or now["queries"] > before["queries"]
+            slower = now["ms_p50"] > before["ms_p50"] * 1.5 and now["ms_p50"] - before["ms_p50"] > 2
+            if not (more_queries or slower or now["bytes"] != before["bytes"] or now["status"] != before["status"]):
+                continue
+
+            regressions += more_queries
+            mark = "⚠️ " if more_queries or slower else "  "
+            self.stdout.write(
+                f"{mark}{key[:56]:<56} "
+                f"{before['queries_cold']:>5}→{now['queries_cold']:<5} "
+                f"{before['bytes']:>9}→{now['bytes']:<9} "
+                f"{before['ms_p50']:>7.1f}→{now['ms_p50']:<7.1f}"
+            )
+
+        for key in sorted(set(old.get("endpoints", {})) - set(new["endpoints"])):
+            self.stdout.write(f"{key[:58]:<58} (ya no existe)")
+        return regressions
@@ -0,0 +1,81 @@
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmarks import bench_client, measure, rolled_back
+from core.compression import brotli, compress
+from core.fast_serializers import serialize_routes
+from core.models import Route, User
+from core.renderers import FastJSONRenderer, orjson
+from core.synthetic import seed_municipality
+
+
+def _ms(fn, repeat):
+    timings = []
+    result = None
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(timings), result
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide /api/routes/ con distintos tamaños: tiempo de codificar el JSON (stdlib vs orjson), "
+        "de comprimir (gzip / br) y bytes en el cable. Los datos se revierten al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--routes", type=int, default=20)
+        parser.add_argument("--points", type=int, nargs="+", default=[50, 200, 1000])
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("⚠️ orjson no está instalado: solo se mide stdlib."))
+        encodings = ("gzip", "br") if brotli is not None else ("gzip",)
+
+        self.stdout.write(
+            f"{'puntos':>6} {'JSON bytes':>11} {'stdlib ms':>10} {'orjson ms':>10} "
+            + " ".join(f"{e + ' bytes':>10} {e + ' ms':>8}" for e in encodings)
+            + f" {'GET ms':>8} {'GET ' + encodings[0] + ' ms':>12}"
+        )
+
+        for n_points in options["points"]:
+            with rolled_back():
+                seed_municipality(
+                    label="bench", users=1, routes=options["routes"], points=n_points, days=0,
+                    notifications=0, broadcasts=0, reports=0, vehicles=0,
+                )
+                self.stdout.write(self._row(n_points, encodings, options["repeat"]))
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark terminado (datos revertidos)."))
+
+    def _row(self, n_points, encodings, repeat):
+        data = serialize_routes(Route.objects.order_by("id"))
+
+        stdlib_ms, body = _ms(lambda: JSONRenderer().render(data), repeat)
+        if orjson is not None:
+            with override_settings(JSON_RENDERER="orjson"):
+                orjson_ms, _ = _ms(lambda: FastJSONRenderer().render(data), repeat)
+        else:
+            orjson_ms = float("nan")
+
+        row = f"{n_points:>6} {len(body):>11} {stdlib_ms:>10.1f} {orjson_ms:>10.1f}"
+        for encoding in encodings:
+            ms, compressed = _ms(lambda: compress(body, encoding), repeat)
+            row += f" {len(compressed):>10} {ms:>8.1f}"
+
+        # De punta a punta: cache de lectura caliente, con y sin compresión
+        user = User.objects.get(username="bench_00000")
+        cache.clear()
+        with override_settings(INSTRUMENTATION_SAMPLE_RATE=0), bench_client(user) as client:
+            measure(client, "/api/routes/", repeat=1)
+            plain = measure(client, "/api/routes/", repeat=repeat)
+            packed = measure(client, "/api/routes/", repeat=repeat, HTTP_ACCEPT_ENCODING=encodings[0])
+        return row + f" {plain['ms_p50']:>8.1f} {packed['ms_p50']:>12.1f}"
@@ -0,0 +1,98 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from core.benchmarks import bench_client
+from core.models import User
+
+PASSWORD = "bench-login-123"
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga de login: N peticiones a /api/login/ con C hilos concurrentes, para cada "
+        "número de iteraciones PBKDF2. Crea usuarios bench_login_* y los borra al final "
+        "(los hilos usan su propia conexión, no se puede revertir con una transacción)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument(
+            "--iterations",
+            default="1000000,600000,260000",
+            help="Iteraciones PBKDF2 a comparar, separadas por coma.",
+        )
+
+    def _login(self, identifier):
+        close_old_connections()
+        try:
+            with bench_client() as client:
+                t0 = time.perf_counter()
+                res = client.post("/api/login/", {"identifier": identifier, "password": PASSWORD}, format="json")
+                return (time.perf_counter() - t0) * 1000, res.status_code
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        n_users = options["users"]
+        n_requests = options["requests"]
+        iterations = [int(i) for i in str(options["iterations"]).split(",") if i.strip()]
+
+        User.objects.filter(username__startswith="bench_login_").delete()
+        User.objects.bulk_create(
+            [
+                User(username=f"bench_login_{i}", email=f"Bench_Login_{i}@bench.local", password="!")
+                for i in range(n_users)
+            ],
+            batch_size=5000,
+        )
+
+        try:
+            # Una query por login, sin importar mayúsculas ni si es email o username
+            User.objects.filter(username="bench_login_0").update(password=make_password(PASSWORD))
+            with bench_client() as client, CaptureQueriesContext(connection) as ctx:
+                client.post("/api/login/", {"identifier": "bench_login_0@BENCH.local", "password": PASSWORD}, format="json")
+            self.stdout.write(f"Queries por login: {len(ctx.captured_queries)}")
+
+            self.stdout.write(
+                f"{'iteraciones':>12} {'ok':>6} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+            )
+            for n_iter in iterations:
+                with override_settings(PASSWORD_PBKDF2_ITERATIONS=n_iter):
+                    # Mismo hash para todos: solo importa el costo de verificarlo
+                    User.objects.filter(username__startswith="bench_login_").update(
+                        password=make_password(PASSWORD)
+                    )
+                    identifiers = [
+                        f"bench_login_{i % n_users}" if i % 2 else f"BENCH_LOGIN_{i % n_users}@bench.local"
+                        for i in range(n_requests)
+                    ]
+
+                    t0 = time.perf_counter()
+                    with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                        results = list(pool.map(self._login, identifiers))
+                    wall = time.perf_counter() - t0
+
+                timings = [ms for ms, _ in results]
+                ok = sum(1 for _, status in results if status == 200)
+                self.stdout.write(
+                    f"{n_iter:>12} {ok:>6} {len(results) / wall:>8.1f} "
+                    f"{statistics.median(timings):>9.1f} {_percentile(timings, 95):>9.1f} "
+                    f"{_percentile(timings, 99):>9.1f}"
+                )
+        finally:
+            User.objects.filter(username__startswith="bench_login_").delete()
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark terminado (usuarios de prueba borrados)."))
@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import bench_client, measure, rolled_back
+from core.models import User, Route, RoutePoint, Vehicle
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara peticiones/seg de /api/vehicles/<id>/ (serializer completo) contra "
+        "/api/vehicles/<id>/position/ (cache) y el caso 304. Datos revertidos al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--points", type=int, default=500)
+        parser.add_argument("--requests", type=int, default=300)
+
+    def _rps(self, client, url, n, **extra):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            client.get(url, **extra)
+        return n / (time.perf_counter() - t0)
+
+    def handle(self, *args, **options):
+        n = options["requests"]
+
+        with rolled_back():
+            user = User.objects.create(username="bench_position", email="bench_position@bench.local")
+            route = Route.objects.create(name="Bench")
+            RoutePoint.objects.bulk_create([
+                RoutePoint(route=route, latitude=14.8 + i / 10000, longitude=-91.5, order=i)
+                for i in range(options["points"])
+            ])
+            vehicle = Vehicle.objects.create(name="Bench", latitude=14.88, longitude=-91.51, route=route)
+
+            with bench_client(user) as client:
+                detail_url = f"/api/vehicles/{vehicle.id}/"
+                pos_url = f"/api/vehicles/{vehicle.id}/position/"
+
+                first = client.get(pos_url)
+                etag = first["ETag"]
+
+                cases = [
+                    ("vehicle_detail", detail_url, {}),
+                    ("position (200)", pos_url, {}),
+                    ("position (304)", pos_url, {"HTTP_IF_NONE_MATCH": etag}),
+                ]
+
+                self.stdout.write(f"{'endpoint':<16} {'req/s':>9} {'queries':>8} {'bytes':>8} {'status':>7}")
+                for label, url, extra in cases:
+                    info = measure(client, url, repeat=1, **extra)
+                    rps = self._rps(client, url, n, **extra)
+                    self.stdout.write(
+                        f"{label:<16} {rps:>9.0f} {info['queries']:>8} {info['bytes']:>8} {info['status']:>7}"
+                    )
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark terminado (datos revertidos)."))
@@ -0,0 +1,66 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import bench_client, rolled_back
+from core.models import User, Report
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara memoria pico (tracemalloc) y tiempo del PDF de reportes: streaming vs. "
+        "reportlab en memoria, para N reportes sintéticos. Datos revertidos al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,50000")
+
+    def _run(self, client, url):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        first_byte_ms = None
+        total = 0
+
+        res = client.get(url)
+        if res.streaming:
+            for chunk in res.streaming_content:
+                if first_byte_ms is None:
+                    first_byte_ms = (time.perf_counter() - t0) * 1000
+                total += len(chunk)  # el chunk se descarta: simula envío al cliente
+        else:
+            first_byte_ms = (time.perf_counter() - t0) * 1000
+            total = len(res.content)
+
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return elapsed_ms, first_byte_ms, peak / (1024 * 1024), total
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in str(options["sizes"]).split(",") if s.strip()]
+
+        self.stdout.write(
+            f"{'reportes':>9} {'modo':<10} {'total ms':>9} {'1er byte ms':>12} {'pico MiB':>9} {'bytes':>10}"
+        )
+        for size in sizes:
+            with rolled_back():
+                admin = User.objects.create(
+                    username="bench_pdf", email="bench_pdf@bench.local", role="admin", is_staff=True,
+                )
+                Report.objects.bulk_create(
+                    [Report(user=admin, detalle=f"Basura acumulada en la esquina {i}") for i in range(size)],
+                    batch_size=5000,
+                )
+
+                with bench_client(admin) as client:
+                    for label, url in (
+                        ("streaming", "/api/admin/reports/generate-pdf/"),
+                        ("reportlab", "/api/admin/reports/generate-pdf/?stream=0"),
+                    ):
+                        ms, first_ms, peak_mib, total = self._run(client, url)
+                        self.stdout.write(
+                            f"{size:>9} {label:<10} {ms:>9.0f} {first_ms:>12.0f} {peak_mib:>9.1f} {total:>10}"
+                        )
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark terminado (datos revertidos)."))
@@ -0,0 +1,70 @@
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import bench_client, measure, rolled_back
+from core.geometry import GEOMETRY_ZOOMS, build_route_geometries
+from core.models import User, Route, RoutePoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara /api/routes/ con puntos completos vs. ?geometry=encoded en una ruta densa "
+        "(10k puntos por defecto). Los datos sintéticos se revierten al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--points", type=int, default=10000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=7)
+
+    def _trace(self, n, seed):
+        # Recorrido tipo GPS: avanza ~5 m por punto, gira poco a poco y con algo de ruido
+        rnd = random.Random(seed)
+        lat, lng, heading = 14.834, -91.518, 0.0
+        coords = []
+        for _ in range(n):
+            heading += rnd.gauss(0, 0.15)
+            lat += math.cos(heading) * 0.000045 + rnd.gauss(0, 0.000002)
+            lng += math.sin(heading) * 0.000045 + rnd.gauss(0, 0.000002)
+            coords.append((round(lat, 6), round(lng, 6)))
+        return coords
+
+    def handle(self, *args, **options):
+        n_points = options["points"]
+
+        with rolled_back():
+            user = User.objects.create(username="bench_geometry", email="bench_geometry@bench.local")
+            route = Route.objects.create(name="Bench geometría")
+            RoutePoint.objects.bulk_create(
+                [
+                    RoutePoint(route=route, latitude=lat, longitude=lng, order=i)
+                    for i, (lat, lng) in enumerate(self._trace(n_points, options["seed"]))
+                ],
+                batch_size=5000,
+            )
+
+            t0 = time.perf_counter()
+            geometries = build_route_geometries(route.pk)
+            build_ms = (time.perf_counter() - t0) * 1000
+            self.stdout.write(f"Precálculo de {len(GEOMETRY_ZOOMS)} niveles: {build_ms:.1f} ms")
+
+            cases = [("points (completo)", "/api/routes/", n_points)]
+            for zoom in GEOMETRY_ZOOMS:
+                cases.append((
+                    f"encoded zoom {zoom}",
+                    f"/api/routes/?geometry=encoded&zoom={zoom}",
+                    geometries[zoom].point_count,
+                ))
+
+            self.stdout.write(f"{'caso':<20} {'puntos':>8} {'ms p50':>9} {'queries':>8} {'bytes':>12}")
+            with bench_client(user) as client:
+                for label, url, count in cases:
+                    r = measure(client, url, repeat=options["repeat"])
+                    self.stdout.write(
+                        f"{label:<20} {count:>8} {r['ms_p50']:>9.1f} {r['queries']:>8} {r['bytes']:>12}"
+                    )
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark terminado (datos revertidos)."))
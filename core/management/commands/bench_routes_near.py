@@ -0,0 +1,60 @@
+import random
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import bench_client, measure, rolled_back
+from core.models import User, Route, RoutePoint
+from core.spatial import rebuild_route_cells
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara /api/citizen/routes/near/ con descargar /api/routes/ completo. "
+        "Los datos sintéticos se revierten al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--routes", type=int, default=50)
+        parser.add_argument("--points", type=int, default=500)
+        parser.add_argument("--radius", type=int, default=300)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        n_routes = options["routes"]
+        n_points = options["points"]
+        rnd = random.Random(3)
+
+        with rolled_back():
+            user = User.objects.create(username="bench_near", email="bench_near@bench.local")
+            routes = Route.objects.bulk_create([Route(name=f"Bench {i}") for i in range(n_routes)])
+
+            # Rutas repartidas en ~10x10 km alrededor de Quetzaltenango
+            points = []
+            for r in routes:
+                lat, lng = 14.80 + rnd.random() * 0.09, -91.56 + rnd.random() * 0.09
+                for j in range(n_points):
+                    lat += rnd.uniform(-0.0001, 0.0001)
+                    lng += rnd.uniform(-0.0001, 0.0001)
+                    points.append(RoutePoint(route=r, latitude=round(lat, 6), longitude=round(lng, 6), order=j))
+            RoutePoint.objects.bulk_create(points, batch_size=5000)
+
+            cells = sum(rebuild_route_cells(r.pk) for r in routes)
+            self.stdout.write(f"{n_routes} rutas × {n_points} puntos, {cells} celdas")
+
+            origin = points[len(points) // 2]
+            cases = [
+                ("/api/routes/ (todo)", "/api/routes/"),
+                (
+                    f"near {options['radius']} m",
+                    f"/api/citizen/routes/near/?lat={origin.latitude}&lng={origin.longitude}"
+                    f"&radius={options['radius']}",
+                ),
+            ]
+
+            self.stdout.write(f"{'caso':<22} {'ms p50':>9} {'queries':>8} {'bytes':>12}")
+            with bench_client(user) as client:
+                for label, url in cases:
+                    r = measure(client, url, repeat=options["repeat"])
+                    self.stdout.write(f"{label:<22} {r['ms_p50']:>9.1f} {r['queries']:>8} {r['bytes']:>12}")
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark terminado (datos revertidos)."))
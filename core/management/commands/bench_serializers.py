@@ -0,0 +1,126 @@
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.benchmarks import rolled_back
+from core.fast_serializers import (
+    serialize_broadcast_recipients, serialize_notifications, serialize_route_dates,
+    serialize_route_schedules, serialize_routes,
+)
+from core.inbox import broadcast_key, inbox_broadcasts_queryset, inbox_queryset
+from core.models import Route, RouteDate, RouteSchedule, User
+from core.serializers import RouteDateSerializer, RouteScheduleSerializer, RouteSerializer
+from core.synthetic import seed_municipality
+
+
+def _drf_notifications(user_id):
+    # Lo que hacía /api/my-notifications/: instancias + select_related
+    def sender(s):
+        return {"id": s.id, "username": s.username, "email": s.email} if s else None
+
+    direct = [
+        {"id": m.id, "message": m.message, "estado": m.estado, "created_at": m.created_at, "sender": sender(m.sender)}
+        for m in inbox_queryset(user_id).select_related("sender")
+    ]
+    broadcasts = [
+        {
+            "id": broadcast_key(r.broadcast_id), "message": r.broadcast.message,
+            "estado": "leida" if r.read else "pendiente",
+            "created_at": r.broadcast.created_at, "sender": sender(r.broadcast.sender),
+        }
+        for r in inbox_broadcasts_queryset(user_id).select_related("broadcast__sender")
+    ]
+    return direct + broadcasts
+
+
+def _fast_notifications(user_id):
+    return (
+        serialize_notifications(inbox_queryset(user_id))
+        + serialize_broadcast_recipients(inbox_broadcasts_queryset(user_id))
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara filas/segundo de los serializers de DRF contra core/fast_serializers.py "
+        "sobre un municipio sintético (incluye las queries). Los datos se revierten al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--routes", type=int, default=20)
+        parser.add_argument("--points", type=int, default=200)
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--notifications", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            seed_municipality(
+                label="bench", users=1, routes=options["routes"], points=options["points"],
+                days=options["days"], notifications=options["notifications"], broadcasts=20,
+            )
+            user_id = User.objects.get(username="bench_00000").id
+
+            routes = Route.objects.order_by("id")
+            dates = RouteDate.objects.order_by("date", "id")
+            schedules = RouteSchedule.objects.order_by("id")
+            encoded = {"geometry": "encoded", "zoom": 14}
+
+            cases = [
+                (
+                    "rutas + puntos",
+                    lambda: RouteSerializer(routes.prefetch_related("points", "route_communities__community"), many=True).data,
+                    lambda: serialize_routes(routes),
+                ),
+                (
+                    "rutas (polilínea)",
+                    lambda: RouteSerializer(routes.prefetch_related("route_communities__community"), many=True, context=encoded).data,
+                    lambda: serialize_routes(routes, geometry=encoded),
+                ),
+                (
+                    "fechas",
+                    lambda: RouteDateSerializer(
+                        dates.select_related("route").prefetch_related("route__points", "route__route_communities__community"),
+                        many=True,
+                    ).data,
+                    lambda: serialize_route_dates(dates),
+                ),
+                (
+                    "horarios",
+                    lambda: RouteScheduleSerializer(
+                        schedules.select_related("route").prefetch_related("route__points", "route__route_communities__community"),
+                        many=True,
+                    ).data,
+                    lambda: serialize_route_schedules(schedules),
+                ),
+                ("notificaciones", lambda: _drf_notifications(user_id), lambda: _fast_notifications(user_id)),
+            ]
+
+            self.stdout.write(
+                f"{'recurso':<20} {'filas':>7} {'DRF ms':>9} {'rápido ms':>10} "
+                f"{'DRF filas/s':>12} {'rápido filas/s':>15} {'x':>6}  igual"
+            )
+            for label, slow, fast in cases:
+                slow_ms, slow_data = self._time(slow, options["repeat"])
+                fast_ms, fast_data = self._time(fast, options["repeat"])
+                rows = len(fast_data)
+                same = json.loads(JSONRenderer().render(slow_data)) == json.loads(JSONRenderer().render(fast_data))
+                self.stdout.write(
+                    f"{label:<20} {rows:>7} {slow_ms:>9.1f} {fast_ms:>10.1f} "
+                    f"{rows / slow_ms * 1000:>12.0f} {rows / fast_ms * 1000:>15.0f} "
+                    f"{slow_ms / fast_ms:>6.1f}  {'✅' if same else '⚠️'}"
+                )
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark terminado (datos revertidos)."))
+
+    def _time(self, build, repeat):
+        timings = []
+        data = None
+        for _ in range(max(1, repeat)):
+            t0 = time.perf_counter()
+            data = build()
+            timings.append((time.perf_counter() - t0) * 1000)
+        return statistics.median(timings), data
@@ -0,0 +1,101 @@
+import asyncio
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from core.pubsub import hub, vehicle_topic
+from core.streams import position_events
+
+
+class Command(BaseCommand):
+    help = (
+        "Carga local de la posición en vivo: N streams SSE (generadores async en un solo "
+        "event loop, como un worker uvicorn) reciben M publicaciones hechas desde otro hilo "
+        "(como la telemetría); mide latencia de entrega."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subscribers", default="100,1000,5000")
+        parser.add_argument("--messages", type=int, default=20)
+        parser.add_argument("--rate", type=float, default=10.0, help="Publicaciones por segundo.")
+        parser.add_argument("--max-p99-ms", type=float, default=250.0)
+
+    async def _run(self, n_subscribers, n_messages, rate):
+        vehicle_id = 1
+        topic = vehicle_topic(vehicle_id)
+        latencies = []
+        ready = asyncio.Event()
+
+        async def subscriber():
+            stream = position_events(topic, [vehicle_id])
+            received = 0
+            try:
+                await anext(stream)  # retry: => ya está suscrito
+                if hub.subscriber_count(topic) >= n_subscribers:
+                    ready.set()
+                while received < n_messages:
+                    chunk = await asyncio.wait_for(anext(stream), timeout=10)
+                    if not chunk.startswith(b"event:"):
+                        continue
+                    data = json.loads(chunk.split(b"data: ", 1)[1])
+                    latencies.append((time.perf_counter() - data["sent"]) * 1000)
+                    received += 1
+            except (asyncio.TimeoutError, StopAsyncIteration):
+                pass
+            finally:
+                await stream.aclose()
+
+        publish_ms = []
+
+        def publisher():
+            for i in range(n_messages):
+                t0 = time.perf_counter()
+                hub.publish(topic, {
+                    "vehicle_id": vehicle_id, "lat": 14.88, "lng": -91.51,
+                    "last_update": f"seq-{i}", "sent": t0,
+                })
+                publish_ms.append((time.perf_counter() - t0) * 1000)
+                time.sleep(1.0 / rate)
+
+        tasks = [asyncio.ensure_future(subscriber()) for _ in range(n_subscribers)]
+        await asyncio.wait_for(ready.wait(), timeout=30)
+        await asyncio.to_thread(publisher)
+        await asyncio.gather(*tasks)
+
+        latencies.sort()
+        delivered = len(latencies)
+        p99 = latencies[int(delivered * 0.99) - 1] if delivered else float("inf")
+        return {
+            "delivered": delivered,
+            "expected": n_subscribers * n_messages,
+            "publish_ms": statistics.median(publish_ms),
+            "p50": statistics.median(latencies) if latencies else float("inf"),
+            "p99": p99,
+        }
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in str(options["subscribers"]).split(",") if s.strip()]
+        max_p99 = options["max_p99_ms"]
+
+        self.stdout.write(
+            f"{'subs':>7} {'entregados':>12} {'publish ms':>11} {'p50 ms':>8} {'p99 ms':>8}  ok"
+        )
+        sustained = 0
+        # Solo el hub en memoria (sin sincronización por cache) y sin heartbeats
+        with override_settings(CACHE_SHARED=False, SSE_HEARTBEAT_SECONDS=60, SSE_MAX_SECONDS=600):
+            for n in sizes:
+                r = asyncio.run(self._run(n, options["messages"], options["rate"]))
+                ok = r["delivered"] == r["expected"] and r["p99"] <= max_p99
+                if ok:
+                    sustained = n
+                self.stdout.write(
+                    f"{n:>7} {r['delivered']:>6}/{r['expected']:<6} {r['publish_ms']:>10.2f} "
+                    f"{r['p50']:>8.1f} {r['p99']:>8.1f}  {'✅' if ok else '❌'}"
+                )
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Máximo sostenido (p99 <= {max_p99:.0f} ms): {sustained} suscriptores por worker")
+        )
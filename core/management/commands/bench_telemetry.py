@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import bench_client, rolled_back
+from core.models import User, Vehicle, VehiclePosition
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula N camiones enviando telemetría y reporta peticiones/seg que aguanta un worker. "
+        "Los datos sintéticos se revierten al final."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--trucks", type=int, default=40)
+        parser.add_argument("--pings", type=int, default=25, help="Peticiones por camión.")
+        parser.add_argument("--fixes", type=int, default=1, help="Fixes por petición (lote).")
+        parser.add_argument("--interval", type=float, default=2.0, help="Segundos entre pings reales.")
+
+    def handle(self, *args, **options):
+        n_trucks = options["trucks"]
+        n_pings = options["pings"]
+        n_fixes = options["fixes"]
+
+        with rolled_back():
+            driver = User.objects.create(
+                username="bench_recolector", email="bench_recolector@bench.local", role="recolector",
+            )
+            vehicles = Vehicle.objects.bulk_create([Vehicle(name=f"Bench {i}") for i in range(n_trucks)])
+
+            with bench_client(driver) as client:
+                t0 = time.perf_counter()
+                for ping in range(n_pings):
+                    for v in vehicles:
+                        fixes = [
+                            {
+                                "lat": 14.88 + (ping * n_fixes + k) / 100000,
+                                "lng": -91.51,
+                                "speed": 4.2,
+                                "heading": 90,
+                            }
+                            for k in range(n_fixes)
+                        ]
+                        res = client.post(f"/api/vehicles/{v.id}/telemetry/", {"fixes": fixes}, format="json")
+                        assert res.status_code == 201, res.content
+                elapsed = time.perf_counter() - t0
+
+            total_requests = n_trucks * n_pings
+            rps = total_requests / elapsed
+            needed = n_trucks / options["interval"]
+
+            self.stdout.write(f"camiones={n_trucks} pings={n_pings} fixes/petición={n_fixes}")
+            self.stdout.write(f"filas de historial: {VehiclePosition.objects.filter(vehicle__in=vehicles).count()}")
+            self.stdout.write(f"peticiones/seg (1 worker): {rps:.1f}")
+            self.stdout.write(f"necesario para {n_trucks} camiones cada {options['interval']}s: {needed:.1f} req/s")
+            self.stdout.write(f"holgura: {rps / needed:.1f}x")
+
+        self.stdout.write(self.style.SUCCESS("✅ Benchmark terminado (datos revertidos)."))
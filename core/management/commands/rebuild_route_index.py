@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.geometry import build_route_geometries
+from core.models import Route
+from core.spatial import rebuild_route_cells
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula la geometría simplificada y el índice espacial (celdas) de las rutas. "
+        "Útil después de cargar puntos con bulk_create sin pasar por core/route_points.py "
+        "(las rutas existentes se indexan en la migración 0018)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--route", type=int, action="append", help="Solo esta ruta (se puede repetir).")
+
+    def handle(self, *args, **options):
+        route_ids = options["route"] or list(Route.objects.order_by("id").values_list("id", flat=True))
+
+        for route_id in route_ids:
+            Route.objects.filter(pk=route_id, cells_dirty=True).update(cells_dirty=False)
+            build_route_geometries(route_id)
+            cells = rebuild_route_cells(route_id)
+            self.stdout.write(f"Ruta {route_id}: {cells} celdas")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(route_ids)} rutas indexadas."))
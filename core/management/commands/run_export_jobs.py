@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.exports import claim_next_job, reap_stale_jobs, run_export_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Worker de exportaciones: procesa los ExportJob pendientes y reencola (o marca "
+        "fallidos) los que quedaron en proceso de un worker caído. "
+        "Usar con EXPORT_JOBS_MODE=worker para no ocupar los workers web."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Procesa lo pendiente y termina.")
+        parser.add_argument("--interval", type=float, default=5.0, help="Segundos entre revisiones.")
+
+    def handle(self, *args, **options):
+        self.stdout.write("Worker de exportaciones iniciado.")
+
+        while True:
+            close_old_connections()
+            reaped = reap_stale_jobs()
+            if reaped["requeued"] or reaped["failed"]:
+                self.stdout.write(
+                    f"Huérfanas: {reaped['requeued']} reencoladas, {reaped['failed']} fallidas"
+                )
+            job_id = claim_next_job()
+
+            if job_id is None:
+                if options["once"]:
+                    break
+                time.sleep(options["interval"])
+                continue
+
+            job = run_export_job(job_id, claimed=True)
+            self.stdout.write(f"Exportación {job_id}: {job.status} ({job.rows} filas)")
+
+        self.stdout.write(self.style.SUCCESS("✅ Sin exportaciones pendientes."))
@@ -1,33 +1,60 @@
+import time
+
 from django.core.management.base import BaseCommand
-from core.models import User, Route
+from django.db import transaction
+
+from core.models import User
+from core.synthetic import DEFAULTS, reset_municipality, seed_municipality
+
 
 class Command(BaseCommand):
-    help = 'Carga datos de prueba iniciales'
-
-    def handle(self, *args, **kwargs):
-        # Crear ruta de prueba
-        route, created = Route.objects.get_or_create(
-            id=1,
-            defaults={
-                'sector': 'Centro Histórico',
-                'horario': '8:00 AM - 12:00 PM',
-                'estado': 'pendiente',
-                'path': [
-                    [14.789, -91.852],  # Coordenadas de Olintepeque
-                    [14.790, -91.853],
-                    [14.791, -91.854],
-                    [14.792, -91.855]
-                ]
-            }
+    help = (
+        "Carga un municipio sintético (usuarios, rutas con puntos, comunidades, fechas, "
+        "horarios, notificaciones, reportes y vehículos) con inserts en bloque."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULTS.items():
+            parser.add_argument(f"--{name}", type=int, default=default)
+        parser.add_argument("--label", default="demo", help="Prefijo de nombres (para --reset).")
+        parser.add_argument("--seed", type=int, default=42, help="Semilla del generador.")
+        parser.add_argument("--password", default="demo12345", help="Contraseña de todos los usuarios sintéticos.")
+        parser.add_argument("--reset", action="store_true", help="Borra antes lo creado con el mismo --label.")
+
+    def handle(self, *args, **options):
+        label = options["label"]
+
+        if options["reset"]:
+            deleted = reset_municipality(label)
+            self.stdout.write(f"Borradas {deleted} filas de '{label}'.")
+        elif User.objects.filter(username=f"{label}_admin").exists():
+            self.stdout.write(self.style.WARNING(
+                f"Ya existe un municipio '{label}'. Usa --reset o otro --label."
+            ))
+            return
+
+        t0 = time.perf_counter()
+        counts = seed_municipality(
+            label=label,
+            seed=options["seed"],
+            password=options["password"],
+            **{name: options[name] for name in DEFAULTS},
         )
+        elapsed = time.perf_counter() - t0
+
+        for name, count in counts.items():
+            self.stdout.write(f"{name:>18}: {count}")
 
-        # Crear usuario ciudadano de prueba
-        if not User.objects.filter(username='ciudadano').exists():
-            User.objects.create_user(
-                username='ciudadano',
-                email='ciudadano@olintepeque.gt',
-                password='ciudadano123',
-                role='ciudadano'
-            )
+        # Cuenta de prueba de siempre para el frontend
+        with transaction.atomic():
+            if not User.objects.filter(username="ciudadano").exists():
+                User.objects.create_user(
+                    username="ciudadano",
+                    email="ciudadano@olintepeque.gt",
+                    password="ciudadano123",
+                    role="ciudadano",
+                )
 
-        self.stdout.write(self.style.SUCCESS('✅ ¡Datos de prueba cargados!'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ ¡Datos de prueba cargados en {elapsed:.1f}s! Admin: {label}_admin"
+        ))
@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import MAP_BUNDLE, count_access, get_version
+from .models import Route, RouteDate, RouteSchedule
+from .fast_serializers import serialize_routes
+from .renderers import render_json
+
+
+def map_bundle_etag(version):
+    return f'"map-{version}"'
+
+
+def _payload_key(version):
+    return f"sc:map_bundle:{version}"
+
+
+def build_map_bundle(version):
+    """
+    Arma el paquete completo del mapa ciudadano:
+    rutas (con puntos y comunidades) + fechas + horarios.
+
+    Las fechas y horarios van "planos" (route_id) para no repetir
+    la ruta anidada en cada fila.
+    """
+    dates = list(
+        RouteDate.objects
+        .order_by("date", "id")
+        .values("id", "route_id", "date")
+    )
+
+    schedules = list(
+        RouteSchedule.objects
+        .filter(route__isnull=False)
+        .order_by("route_id", "start_time")
+        .values("id", "route_id", "day_of_week", "start_time", "end_time")
+    )
+
+    return {
+        "version": version,
+        "routes": serialize_routes(Route.objects.order_by("id")),
+        "dates": dates,
+        "schedules": schedules,
+    }
+
+
+def get_map_bundle():
+    """
+    Regresa (version, body_json) usando el cache.
+    El JSON ya va renderizado: un hit de cache = una respuesta lista.
+    """
+    version = get_version(MAP_BUNDLE)
+    key = _payload_key(version)
+
+    body = cache.get(key)
+    count_access(MAP_BUNDLE, hit=body is not None)
+    if body is None:
+        body = render_json(build_map_bundle(version))
+        cache.set(key, body, timeout=getattr(settings, "MAP_BUNDLE_TTL", 60 * 60 * 24))
+
+    return version, body
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_alter_routeschedule_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='routedate',
+            index=models.Index(fields=['date', 'id'], name='core_routedate_date_id_idx'),
+        ),
+    ]
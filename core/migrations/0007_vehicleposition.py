@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_routedate_date_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehiclePosition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recorded_at', models.DateTimeField(verbose_name='Tomada el')),
+                ('latitude', models.FloatField(verbose_name='Latitud')),
+                ('longitude', models.FloatField(verbose_name='Longitud')),
+                ('speed', models.FloatField(blank=True, null=True, verbose_name='Velocidad (m/s)')),
+                ('heading', models.FloatField(blank=True, null=True, verbose_name='Rumbo (grados)')),
+                ('accuracy', models.FloatField(blank=True, null=True, verbose_name='Precisión (m)')),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='positions', to='core.vehicle', verbose_name='Vehículo')),
+            ],
+            options={
+                'verbose_name': 'Posición de vehículo',
+                'verbose_name_plural': 'Posiciones de vehículo',
+                'indexes': [models.Index(fields=['vehicle', 'recorded_at'], name='core_vehicl_vehicle_21814d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_exportjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteGeometry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('zoom', models.PositiveSmallIntegerField(verbose_name='Zoom')),
+                ('encoded', models.TextField(verbose_name='Polilínea codificada')),
+                ('point_count', models.PositiveIntegerField(default=0, verbose_name='Puntos simplificados')),
+                ('source_count', models.PositiveIntegerField(default=0, verbose_name='Puntos originales')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizada el')),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='geometries', to='core.route')),
+            ],
+            options={
+                'verbose_name': 'Geometría de ruta',
+                'verbose_name_plural': 'Geometrías de ruta',
+                'unique_together': {('route', 'zoom')},
+            },
+        ),
+    ]
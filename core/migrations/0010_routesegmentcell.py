@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_routegeometry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteSegmentCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell_x', models.IntegerField(verbose_name='Celda X (longitud)')),
+                ('cell_y', models.IntegerField(verbose_name='Celda Y (latitud)')),
+                ('seq', models.PositiveIntegerField(verbose_name='Segmento')),
+                ('lat1', models.FloatField()),
+                ('lng1', models.FloatField()),
+                ('lat2', models.FloatField()),
+                ('lng2', models.FloatField()),
+                ('route', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segment_cells', to='core.route')),
+            ],
+            options={
+                'verbose_name': 'Celda de segmento',
+                'verbose_name_plural': 'Celdas de segmento',
+                'indexes': [models.Index(fields=['cell_x', 'cell_y'], name='core_segcell_xy_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_user_lower_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Actualizada el'),
+            preserve_default=False,
+        ),
+        # Filas existentes: arrancan con su fecha de creación (o de borrado, si es posterior)
+        migrations.RunSQL(
+            "UPDATE core_notification SET updated_at = COALESCE(deleted_at, created_at)",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['usuario', 'updated_at', 'id'], name='core_notif_user_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_notification_updated_at'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='core_notifi_deleted_cb0602_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='core_notifi_deleted_a517f1_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('deleted_by_user', False), ('deleted_globally', False)), fields=['usuario', '-created_at', '-id'], name='core_notif_inbox_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('deleted_globally', False)), fields=['-created_at'], name='core_notif_admin_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_notification_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original_id', models.BigIntegerField(unique=True, verbose_name='ID original')),
+                ('usuario_id', models.BigIntegerField(db_index=True, verbose_name='Usuario')),
+                ('sender_id', models.BigIntegerField(blank=True, null=True, verbose_name='Remitente')),
+                ('message', models.CharField(max_length=150)),
+                ('estado', models.CharField(max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('deleted_by_user', models.BooleanField(default=False)),
+                ('deleted_globally', models.BooleanField(default=False)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('reason', models.CharField(choices=[('deleted', 'Borrada'), ('read', 'Leída antigua')], max_length=10)),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Archivada el')),
+            ],
+            options={
+                'verbose_name': 'Notificación archivada',
+                'verbose_name_plural': 'Notificaciones archivadas',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('deleted_globally', True), ('deleted_by_user', True), _connector='OR'), fields=['deleted_at'], name='core_notif_deleted_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('estado', 'leida')), fields=['created_at'], name='core_notif_read_idx'),
+        ),
+    ]
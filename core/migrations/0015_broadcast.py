@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_notification_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Broadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message', models.CharField(max_length=150)),
+                ('recipient_count', models.PositiveIntegerField(default=0, verbose_name='Destinatarios')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('deleted_globally', models.BooleanField(default=False, verbose_name='Borrado por admin (global)')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de borrado')),
+                ('sender', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sent_broadcasts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Mensaje masivo',
+                'verbose_name_plural': 'Mensajes masivos',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastRecipient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read', models.BooleanField(default=False, verbose_name='Leído')),
+                ('deleted_by_user', models.BooleanField(default=False, verbose_name='Borrado por usuario')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de borrado')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Actualizado el')),
+                ('broadcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipients', to='core.broadcast')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcast_receipts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Destinatario de mensaje masivo',
+                'verbose_name_plural': 'Destinatarios de mensajes masivos',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='broadcast',
+            index=models.Index(condition=models.Q(('deleted_globally', False)), fields=['-created_at'], name='core_broadcast_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='broadcastrecipient',
+            index=models.Index(fields=['usuario', 'updated_at', 'id'], name='core_bcast_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='broadcastrecipient',
+            index=models.Index(condition=models.Q(('deleted_by_user', False)), fields=['usuario', '-broadcast'], name='core_bcast_inbox_visible_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='broadcastrecipient',
+            constraint=models.UniqueConstraint(fields=('broadcast', 'usuario'), name='core_broadcast_recipient_uniq'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_broadcast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='community',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Actualizada el'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='route',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Actualizada el'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='routedate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Actualizada el'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='routeschedule',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Actualizada el'),
+            preserve_default=False,
+        ),
+        # Filas existentes: arrancan con su fecha de creación
+        migrations.RunSQL(
+            "UPDATE core_community SET updated_at = created_at",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            "UPDATE core_route SET updated_at = created_at",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            "UPDATE core_routedate SET updated_at = created_at",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            "UPDATE core_routeschedule SET updated_at = created_at",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:52
+
+from django.db import migrations, models
+
+
+def mark_missing_cells(apps, schema_editor):
+    """
+    Las rutas que ya existían antes de 0010 nunca pasaron por rebuild_route_cells:
+    se marcan como pendientes y la primera consulta de /api/citizen/routes/near/
+    las indexa (spatial.rebuild_dirty_route_cells). Sin importar código de la app:
+    la migración no depende de cómo cambie core.spatial.
+    """
+    Route = apps.get_model("core", "Route")
+    RouteSegmentCell = apps.get_model("core", "RouteSegmentCell")
+
+    indexed = RouteSegmentCell.objects.values("route_id")
+    Route.objects.exclude(id__in=indexed).update(cells_dirty=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_exportjob_attempts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='route',
+            name='cells_dirty',
+            field=models.BooleanField(default=False, verbose_name='Celdas por recalcular'),
+        ),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(condition=models.Q(('cells_dirty', True)), fields=['id'], name='core_route_cells_dirty_idx'),
+        ),
+        migrations.RunPython(mark_missing_cells, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_route_cells_dirty'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='core_notif_inbox_visible_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notification',
+            name='core_notif_deleted_idx',
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='expired',
+            field=models.BooleanField(default=False, verbose_name='Expirada por retención'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('deleted_by_user', False), ('deleted_globally', False), ('expired', False)), fields=['usuario', '-created_at', '-id'], name='core_notif_inbox_visible_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(condition=models.Q(('deleted_globally', True), ('deleted_by_user', True), ('expired', True), _connector='OR'), fields=['deleted_at'], name='core_notif_deleted_idx'),
+        ),
+    ]
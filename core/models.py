@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Lower
 from django.utils import timezone
 
 # ==========================
@@ -37,6 +38,11 @@ class User(AbstractUser):
     class Meta:
         verbose_name = "Usuario"
         verbose_name_plural = "Usuarios"
+        indexes = [
+            # ✅ Login por email o username sin importar mayúsculas (core/backends.py)
+            models.Index(Lower("email"), name="core_user_email_lower_idx"),
+            models.Index(Lower("username"), name="core_user_username_lower_idx"),
+        ]
 
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
@@ -63,10 +69,19 @@ class Route(models.Model):
 
     completed = models.BooleanField(default=False, verbose_name="Completada")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Creada el")
+    # ✅ Validadores de GET condicional (core/conditional.py); también se toca
+    # cuando cambian los puntos de la ruta (core/route_points.py)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Actualizada el")
+    # ✅ Índice espacial pendiente: un save() suelto de un punto solo marca la
+    # ruta; las celdas se rehacen una vez, en la siguiente búsqueda (core/spatial.py)
+    cells_dirty = models.BooleanField(default=False, verbose_name="Celdas por recalcular")
 
     class Meta:
         verbose_name = "Ruta"
         verbose_name_plural = "Rutas"
+        indexes = [
+            models.Index(fields=["id"], condition=models.Q(cells_dirty=True), name="core_route_cells_dirty_idx"),
+        ]
 
     def __str__(self):
         # Para que no truene si están en None
@@ -91,12 +106,60 @@ class RoutePoint(models.Model):
         return f"Punto {self.order} de {self.route.name}"
 
 
+class RouteGeometry(models.Model):
+    """
+    Polilínea simplificada de una ruta para un nivel de zoom (formato "encoded polyline").
+    Se calcula a partir de RoutePoint, que sigue siendo la fuente de verdad.
+    """
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="geometries")
+    zoom = models.PositiveSmallIntegerField(verbose_name="Zoom")
+    encoded = models.TextField(verbose_name="Polilínea codificada")
+    point_count = models.PositiveIntegerField(default=0, verbose_name="Puntos simplificados")
+    source_count = models.PositiveIntegerField(default=0, verbose_name="Puntos originales")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Actualizada el")
+
+    class Meta:
+        verbose_name = "Geometría de ruta"
+        verbose_name_plural = "Geometrías de ruta"
+        unique_together = ("route", "zoom")
+
+    def __str__(self):
+        return f"{self.route_id} z{self.zoom} ({self.point_count}/{self.source_count})"
+
+
+class RouteSegmentCell(models.Model):
+    """
+    Índice espacial en cuadrícula (sin PostGIS): una fila por cada celda que toca
+    un segmento de la ruta, con los extremos del segmento para medir la distancia
+    exacta sin cargar todos los puntos. Se recalcula desde RoutePoint.
+    """
+    route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name="segment_cells")
+    cell_x = models.IntegerField(verbose_name="Celda X (longitud)")
+    cell_y = models.IntegerField(verbose_name="Celda Y (latitud)")
+    seq = models.PositiveIntegerField(verbose_name="Segmento")
+    lat1 = models.FloatField()
+    lng1 = models.FloatField()
+    lat2 = models.FloatField()
+    lng2 = models.FloatField()
+
+    class Meta:
+        verbose_name = "Celda de segmento"
+        verbose_name_plural = "Celdas de segmento"
+        indexes = [
+            models.Index(fields=["cell_x", "cell_y"], name="core_segcell_xy_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.route_id} ({self.cell_x}, {self.cell_y}) #{self.seq}"
+
+
 # ==========================
 # NUEVO: COMUNIDADES
 # ==========================
 class Community(models.Model):
     name = models.CharField(max_length=150, unique=True, verbose_name="Nombre de la comunidad")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Creada el")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Actualizada el")
 
     class Meta:
         verbose_name = "Comunidad"
@@ -157,6 +220,13 @@ class Notification(models.Model):
     deleted_by_user = models.BooleanField(default=False, verbose_name="Borrado por usuario")
     deleted_globally = models.BooleanField(default=False, verbose_name="Borrado por admin (global)")
     deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de borrado")
+    # ✅ Leída antigua retirada por la retención (core/retention.py): sale del buzón
+    # como borrada (lápida para ?since=) y se archiva con reason="read".
+    expired = models.BooleanField(default=False, verbose_name="Expirada por retención")
+
+    # ✅ Sincronización incremental del buzón (?since=cursor): cambia al crear,
+    # leer o borrar. Ojo: queryset.update() debe ponerlo a mano.
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Actualizada el")
 
     class Meta:
         verbose_name = "Notificación"
@@ -164,14 +234,107 @@ class Notification(models.Model):
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["usuario", "created_at"]),
-            models.Index(fields=["deleted_globally", "created_at"]),
-            models.Index(fields=["deleted_by_user", "created_at"]),
+            models.Index(fields=["usuario", "updated_at", "id"], name="core_notif_user_updated_idx"),
+            # ✅ Índices parciales con el mismo predicado que las consultas calientes:
+            # solo contienen filas visibles, así que no crecen con lo borrado.
+            # Buzón: usuario=X AND no borrada AND no expirada ORDER BY -created_at
+            models.Index(
+                fields=["usuario", "-created_at", "-id"],
+                condition=models.Q(deleted_globally=False, deleted_by_user=False, expired=False),
+                name="core_notif_inbox_visible_idx",
+            ),
+            # Historial del admin: deleted_globally=False ORDER BY -created_at
+            models.Index(
+                fields=["-created_at"],
+                condition=models.Q(deleted_globally=False),
+                name="core_notif_admin_feed_idx",
+            ),
+            # Candidatas a archivo (core/retention.py): borradas / expiradas y leídas viejas
+            models.Index(
+                fields=["deleted_at"],
+                condition=models.Q(deleted_globally=True) | models.Q(deleted_by_user=True) | models.Q(expired=True),
+                name="core_notif_deleted_idx",
+            ),
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(estado="leida"),
+                name="core_notif_read_idx",
+            ),
         ]
 
     def __str__(self):
         return f"Notificación para {self.usuario.username}: {self.message}"
 
 
+class Broadcast(models.Model):
+    """
+    Mensaje masivo: el texto se guarda una sola vez. El estado de cada
+    destinatario (leído / borrado) vive en BroadcastRecipient, sin copiar el texto.
+    """
+    message = models.CharField(max_length=150)
+    sender = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='sent_broadcasts'
+    )
+    recipient_count = models.PositiveIntegerField(default=0, verbose_name="Destinatarios")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    deleted_globally = models.BooleanField(default=False, verbose_name="Borrado por admin (global)")
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de borrado")
+
+    class Meta:
+        verbose_name = "Mensaje masivo"
+        verbose_name_plural = "Mensajes masivos"
+        ordering = ["-created_at"]
+        indexes = [
+            # Historial del admin (mismo predicado que core_notif_admin_feed_idx)
+            models.Index(
+                fields=["-created_at"],
+                condition=models.Q(deleted_globally=False),
+                name="core_broadcast_feed_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Mensaje masivo: {self.message}"
+
+
+class BroadcastRecipient(models.Model):
+    """
+    Fila angosta por destinatario de un Broadcast: solo llaves, banderas y fechas.
+    """
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name='recipients')
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='broadcast_receipts')
+    read = models.BooleanField(default=False, verbose_name="Leído")
+    deleted_by_user = models.BooleanField(default=False, verbose_name="Borrado por usuario")
+    deleted_at = models.DateTimeField(null=True, blank=True, verbose_name="Fecha de borrado")
+
+    # Igual que Notification.updated_at: cursor de ?since= (queryset.update() lo pone a mano)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Actualizado el")
+
+    class Meta:
+        verbose_name = "Destinatario de mensaje masivo"
+        verbose_name_plural = "Destinatarios de mensajes masivos"
+        constraints = [
+            models.UniqueConstraint(fields=["broadcast", "usuario"], name="core_broadcast_recipient_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["usuario", "updated_at", "id"], name="core_bcast_user_updated_idx"),
+            # Buzón: broadcast_id crece con created_at, así que sirve para ordenar
+            models.Index(
+                fields=["usuario", "-broadcast"],
+                condition=models.Q(deleted_by_user=False),
+                name="core_bcast_inbox_visible_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.broadcast_id} → {self.usuario_id}"
+
+
 class Report(models.Model):
     TIPOS = (
         ('incidencias', 'Incidencias'),
@@ -206,15 +369,50 @@ class Report(models.Model):
         return f"Reporte de {self.get_tipo_display()} por {self.user.username}"
 
 
+class NotificationArchive(models.Model):
+    """
+    Notificaciones borradas o leídas hace tiempo, fuera de la tabla caliente.
+    Sin llaves foráneas: el archivo no se ve afectado si luego se borra el usuario.
+    """
+    REASONS = (
+        ('deleted', 'Borrada'),
+        ('read', 'Leída antigua'),
+    )
+
+    original_id = models.BigIntegerField(unique=True, verbose_name="ID original")
+    usuario_id = models.BigIntegerField(db_index=True, verbose_name="Usuario")
+    sender_id = models.BigIntegerField(null=True, blank=True, verbose_name="Remitente")
+    message = models.CharField(max_length=150)
+    estado = models.CharField(max_length=20)
+    created_at = models.DateTimeField()
+    deleted_by_user = models.BooleanField(default=False)
+    deleted_globally = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    reason = models.CharField(max_length=10, choices=REASONS)
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Archivada el")
+
+    class Meta:
+        verbose_name = "Notificación archivada"
+        verbose_name_plural = "Notificaciones archivadas"
+
+    def __str__(self):
+        return f"{self.original_id} ({self.reason})"
+
+
 class RouteDate(models.Model):
     route = models.ForeignKey(Route, on_delete=models.CASCADE, related_name='dates')
     date = models.DateField(verbose_name="Fecha")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Creada el")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Actualizada el")
 
     class Meta:
         verbose_name = "Fecha de Ruta"
         verbose_name_plural = "Fechas de Ruta"
         unique_together = ('route', 'date')
+        indexes = [
+            # ✅ Paginación keyset del calendario: ORDER BY date, id
+            models.Index(fields=["date", "id"], name="core_routedate_date_id_idx"),
+        ]
 
     def __str__(self):
         return f"{self.route.name} - {self.date}"
@@ -236,6 +434,7 @@ class RouteSchedule(models.Model):
     start_time = models.TimeField(verbose_name="Hora de inicio")
     end_time = models.TimeField(verbose_name="Hora de fin")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Creada el")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Actualizada el")
 
     class Meta:
         verbose_name = "Horario de Ruta"
@@ -270,4 +469,81 @@ class Vehicle(models.Model):
         verbose_name_plural = "Vehículos"
 
     def __str__(self):
-        return f"{self.name} (lat={self.latitude}, lng={self.longitude})"
\ No newline at end of file
+        return f"{self.name} (lat={self.latitude}, lng={self.longitude})"
+
+
+class VehiclePosition(models.Model):
+    """
+    Historial de posiciones GPS de un vehículo (solo se agregan filas, nunca se editan).
+    La posición "actual" sigue viviendo en Vehicle.latitude / longitude.
+    """
+    vehicle = models.ForeignKey(
+        Vehicle,
+        on_delete=models.CASCADE,
+        related_name="positions",
+        verbose_name="Vehículo"
+    )
+    recorded_at = models.DateTimeField(verbose_name="Tomada el")
+    latitude = models.FloatField(verbose_name="Latitud")
+    longitude = models.FloatField(verbose_name="Longitud")
+    speed = models.FloatField(null=True, blank=True, verbose_name="Velocidad (m/s)")
+    heading = models.FloatField(null=True, blank=True, verbose_name="Rumbo (grados)")
+    accuracy = models.FloatField(null=True, blank=True, verbose_name="Precisión (m)")
+
+    class Meta:
+        verbose_name = "Posición de vehículo"
+        verbose_name_plural = "Posiciones de vehículo"
+        indexes = [
+            models.Index(fields=["vehicle", "recorded_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.vehicle_id} @ {self.recorded_at} ({self.latitude}, {self.longitude})"
+
+
+class ExportJob(models.Model):
+    """
+    Exportación de reportes en segundo plano (CSV / PDF).
+    El archivo final se guarda en default_storage y se descarga cuando status = done.
+    """
+    FORMATOS = (
+        ('csv', 'CSV'),
+        ('pdf', 'PDF'),
+    )
+    ESTADOS = (
+        ('pending', 'Pendiente'),
+        ('running', 'En proceso'),
+        ('done', 'Terminado'),
+        ('failed', 'Fallido'),
+    )
+
+    formato = models.CharField(max_length=10, choices=FORMATOS, default='csv')
+    filters = models.JSONField(default=dict, blank=True, verbose_name="Filtros")
+    status = models.CharField(max_length=20, choices=ESTADOS, default='pending')
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='export_jobs'
+    )
+    file = models.FileField(upload_to='exports/', null=True, blank=True, verbose_name="Archivo")
+    rows = models.PositiveIntegerField(default=0, verbose_name="Filas exportadas")
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Arrendamiento: un job "running" con started_at muy viejo quedó huérfano
+    # (proceso caído) y core.exports.reap_stale_jobs lo reintenta o lo marca fallido
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+
+    class Meta:
+        verbose_name = "Exportación"
+        verbose_name_plural = "Exportaciones"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Exportación {self.id} ({self.formato}, {self.status})"
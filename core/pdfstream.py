@@ -0,0 +1,126 @@
+"""
+Escritor de PDF mínimo que va entregando bytes página por página.
+
+reportlab arma todo el documento en memoria antes de guardarlo; para informes
+grandes eso duplica la memoria del worker y retrasa la descarga. Aquí cada
+página se emite en cuanto se llena, y solo se guardan los offsets (xref).
+
+Solo soporta lo que usa el informe: texto con Helvetica / Helvetica-Bold.
+"""
+import zlib
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+
+# Objetos fijos: 1 catálogo, 2 árbol de páginas (se escribe al final), 3-4 fuentes
+_CATALOG, _PAGES, _FONT, _FONT_BOLD = 1, 2, 3, 4
+_FIRST_PAGE_OBJ = 5
+
+
+def _pdf_text(text):
+    raw = str(text).encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+class StreamingPDFWriter:
+    def __init__(self, compress=True):
+        self.compress = compress
+        self.offsets = {}
+        self.position = 0
+        self.page_ids = []
+        self.next_obj = _FIRST_PAGE_OBJ
+
+    def _emit(self, data):
+        self.position += len(data)
+        return data
+
+    def _object(self, number, body):
+        self.offsets[number] = self.position
+        return self._emit(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+
+    def begin(self):
+        out = self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        out += self._object(_CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % _PAGES)
+        out += self._object(
+            _FONT,
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        )
+        out += self._object(
+            _FONT_BOLD,
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+        )
+        return out
+
+    def page(self, lines):
+        """
+        lines: lista de (x, y, tamaño, negrita, texto). Regresa los bytes de la página.
+        """
+        ops = [b"BT"]
+        for x, y, size, bold, text in lines:
+            font = b"/F2" if bold else b"/F1"
+            ops.append(b"%s %d Tf 1 0 0 1 %d %d Tm (%s) Tj" % (font, size, x, y, _pdf_text(text)))
+        ops.append(b"ET")
+        content = b"\n".join(ops)
+
+        if self.compress:
+            content = zlib.compress(content)
+            stream_dict = b"<< /Length %d /Filter /FlateDecode >>" % len(content)
+        else:
+            stream_dict = b"<< /Length %d >>" % len(content)
+
+        content_id = self.next_obj
+        page_id = self.next_obj + 1
+        self.next_obj += 2
+        self.page_ids.append(page_id)
+
+        out = self._object(content_id, stream_dict + b"\nstream\n" + content + b"\nendstream")
+        out += self._object(
+            page_id,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+            % (_PAGES, PAGE_WIDTH, PAGE_HEIGHT, _FONT, _FONT_BOLD, content_id),
+        )
+        return out
+
+    def end(self):
+        kids = b" ".join(b"%d 0 R" % pid for pid in self.page_ids)
+        out = self._object(
+            _PAGES,
+            b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids)),
+        )
+
+        xref_at = self.position
+        size = self.next_obj
+        xref = [b"xref\n0 %d\n" % size, b"0000000000 65535 f \n"]
+        for number in range(1, size):
+            xref.append(b"%010d 00000 n \n" % self.offsets[number])
+        out += self._emit(b"".join(xref))
+        out += self._emit(
+            b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, _CATALOG, xref_at)
+        )
+        return out
+
+
+def stream_text_pdf(title, lines):
+    """
+    Generador de bytes: título en la primera página y una línea de texto cada 20pt,
+    igual que el informe original con reportlab.
+    `lines` puede ser un iterador (no se materializa completo).
+    """
+    writer = StreamingPDFWriter()
+    yield writer.begin()
+
+    page = [(50, 800, 14, True, title)]
+    y = 770
+    for text in lines:
+        page.append((50, y, 10, False, text))
+        y -= 20
+        if y < 50:
+            yield writer.page(page)
+            page = []
+            y = 800
+
+    if page or not writer.page_ids:
+        yield writer.page(page)
+
+    yield writer.end()
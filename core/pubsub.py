@@ -0,0 +1,83 @@
+"""
+Pub/sub en memoria del proceso para la posición en vivo (SSE servido por ASGI).
+
+- publish() se llama desde código sync (la telemetría, en el hilo de la
+  petición) y hace UNA pasada: un call_soon_threadsafe por event loop, que
+  reparte el mensaje a todas las colas de ese loop. No toca la base de datos.
+- Cada suscriptor es una asyncio.Queue acotada; si se llena (cliente lento)
+  se descarta el mensaje más viejo: para posiciones solo importa la última.
+
+⚠️ No cruza procesos: lo que se publica en otro worker llega por
+core/streams.py, que lee la posición del cache compartido una vez por tópico
+(no por suscriptor).
+"""
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+
+def _offer(queues, message):
+    # Corre dentro del event loop de los suscriptores
+    for q in queues:
+        if q.full():
+            q.get_nowait()
+        q.put_nowait(message)
+
+
+class PubSub:
+    def __init__(self, max_queue=32):
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._topics = {}  # tópico => {loop: {colas}}
+
+    def publish(self, topic, message):
+        """
+        Regresa a cuántos suscriptores se le entregó.
+        """
+        with self._lock:
+            targets = [(loop, tuple(queues)) for loop, queues in self._topics.get(topic, {}).items()]
+
+        delivered = 0
+        for loop, queues in targets:
+            try:
+                loop.call_soon_threadsafe(_offer, queues, message)
+            except RuntimeError:  # loop ya cerrado
+                continue
+            delivered += len(queues)
+        return delivered
+
+    @asynccontextmanager
+    async def subscribe(self, *topics):
+        loop = asyncio.get_running_loop()
+        q = asyncio.Queue(maxsize=self.max_queue)
+        with self._lock:
+            for topic in topics:
+                self._topics.setdefault(topic, {}).setdefault(loop, set()).add(q)
+        try:
+            yield q
+        finally:
+            with self._lock:
+                for topic in topics:
+                    by_loop = self._topics.get(topic, {})
+                    queues = by_loop.get(loop)
+                    if queues is not None:
+                        queues.discard(q)
+                        if not queues:
+                            del by_loop[loop]
+                    if not by_loop:
+                        self._topics.pop(topic, None)
+
+    def subscriber_count(self, topic):
+        with self._lock:
+            return sum(len(queues) for queues in self._topics.get(topic, {}).values())
+
+
+hub = PubSub()
+
+
+def vehicle_topic(vehicle_id):
+    return f"vehicle:{vehicle_id}"
+
+
+def route_topic(route_id):
+    return f"route:{route_id}"
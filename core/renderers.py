@@ -0,0 +1,52 @@
+"""
+JSON de la API: orjson si está instalado, json de la librería estándar si no.
+
+JSON_RENDERER = "orjson" (default) | "stdlib". Con orjson la salida es la misma
+que la del JSONRenderer de DRF (compacta, UTF-8, fechas ISO 8601 con "Z",
+U+2028/U+2029 escapados); lo que orjson no sabe codificar (Decimal, textos
+lazy, ...) pasa por el mismo JSONEncoder de DRF. Si orjson no puede con algo
+(enteros de más de 64 bits) o se pide indentación, se usa el renderer de DRF.
+"""
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_default = JSONEncoder().default
+
+
+def orjson_enabled():
+    return orjson is not None and getattr(settings, "JSON_RENDERER", "orjson") == "orjson"
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        if (
+            not orjson_enabled()
+            or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            body = orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Igual que DRF: JSON que también sea JavaScript válido
+        return body.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+def render_json(data):
+    """
+    bytes listos para HttpResponse (cache de lectura, paquete del mapa).
+    """
+    return FastJSONRenderer().render(data)
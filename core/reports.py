@@ -0,0 +1,87 @@
+import csv
+from datetime import datetime
+
+from django.conf import settings
+
+from .models import Report
+from .pdfstream import stream_text_pdf
+
+REPORTS_PDF_TITLE = "Reporte General – Smart Collector"
+
+REPORTS_CSV_HEADER = ["id", "fecha", "tipo", "status", "usuario", "admin", "detalle"]
+
+# Excel / LibreOffice interpretan como fórmula las celdas que empiezan así
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def filter_reports(qs, params):
+    """
+    Filtros opcionales para los informes (params = query params o dict guardado):
+    - from / to (YYYY-MM-DD, inclusive, sobre fecha)
+    - status (pending / resolved / unresolved)
+    - tipo (incidencias / rutas / usuarios)
+    Lanza ValueError con el mensaje para el cliente si algo es inválido.
+    """
+    try:
+        date_from = params.get("from")
+        if date_from:
+            qs = qs.filter(fecha__date__gte=datetime.strptime(date_from, "%Y-%m-%d").date())
+        date_to = params.get("to")
+        if date_to:
+            qs = qs.filter(fecha__date__lte=datetime.strptime(date_to, "%Y-%m-%d").date())
+    except (TypeError, ValueError):
+        raise ValueError("from/to deben tener formato YYYY-MM-DD.")
+
+    status_val = params.get("status")
+    if status_val:
+        if status_val not in dict(Report.ESTADOS):
+            raise ValueError("status inválido.")
+        qs = qs.filter(status=status_val)
+
+    tipo = params.get("tipo") or params.get("type")
+    if tipo:
+        if tipo not in dict(Report.TIPOS):
+            raise ValueError("tipo inválido.")
+        qs = qs.filter(tipo=tipo)
+
+    return qs
+
+
+def _chunk_size():
+    return getattr(settings, "REPORTS_PDF_CHUNK_SIZE", 500)
+
+
+def report_pdf_lines(reports):
+    # .values() + iterator(): sin instancias de modelo ni cache del queryset
+    rows = reports.values_list("fecha", "user__username", "detalle").iterator(chunk_size=_chunk_size())
+    for fecha, username, detalle in rows:
+        yield f"{fecha} — {username}: {detalle[:60]}..."
+
+
+def stream_reports_pdf(reports):
+    return stream_text_pdf(REPORTS_PDF_TITLE, report_pdf_lines(reports))
+
+
+def _csv_cell(value):
+    # ⚠️ detalle y usuario son texto libre: se neutralizan fórmulas (CSV injection)
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def write_reports_csv(reports, fileobj):
+    """
+    Escribe el CSV en fileobj (texto) fila por fila. Regresa cuántas filas escribió.
+    """
+    writer = csv.writer(fileobj)
+    writer.writerow(REPORTS_CSV_HEADER)
+
+    rows = reports.values_list(
+        "id", "fecha", "tipo", "status", "user__username", "admin__username", "detalle",
+    ).iterator(chunk_size=_chunk_size())
+
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_cell(value) for value in row])
+        count += 1
+    return count
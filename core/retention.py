@@ -0,0 +1,159 @@
+"""
+Retención de notificaciones: mueve a NotificationArchive las borradas (por el
+usuario o globalmente), en lotes acotados, para que la tabla Notification y sus
+índices se queden chicos.
+
+Las leídas antiguas no se borran directo: primero se marcan como expiradas
+(expired + deleted_at + updated_at, sin tocar deleted_by_user: el ciudadano no
+las borró). Esa lápida es lo que un cliente con ?since=cursor recibe en
+`deleted`; la fila se archiva con reason="read" pasados
+NOTIFICATIONS_ARCHIVE_DELETED_DAYS.
+
+De los mensajes masivos solo se purgan las filas de BroadcastRecipient ya
+borradas: el texto sigue en Broadcast, no hay nada más que archivar.
+
+Cada lote es su propia transacción (INSERT en el archivo + DELETE por id), así
+un corte a la mitad no deja filas duplicadas ni perdidas y los bloqueos duran poco.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BroadcastRecipient, Notification, NotificationArchive
+
+_FIELDS = (
+    "id", "usuario_id", "sender_id", "message", "estado", "created_at",
+    "deleted_by_user", "deleted_globally", "deleted_at",
+)
+
+# Fuentes en orden: lo ya vencido se archiva antes de marcar lo nuevo
+SOURCES = ("deleted", "read", "expired", "recipients")
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+# ⚠️ Deben coincidir con la condición de core_notif_deleted_idx / core_notif_read_idx
+def deleted_candidates(now):
+    cutoff = now - timedelta(days=_setting("NOTIFICATIONS_ARCHIVE_DELETED_DAYS", 30))
+    return Notification.objects.filter(
+        Q(deleted_globally=True) | Q(deleted_by_user=True),
+        deleted_at__lt=cutoff,
+    )
+
+
+def expired_candidates(now):
+    cutoff = now - timedelta(days=_setting("NOTIFICATIONS_ARCHIVE_DELETED_DAYS", 30))
+    return Notification.objects.filter(
+        expired=True, deleted_globally=False, deleted_by_user=False,
+        deleted_at__lt=cutoff,
+    )
+
+
+def read_candidates(now):
+    cutoff = now - timedelta(days=_setting("NOTIFICATIONS_ARCHIVE_READ_DAYS", 90))
+    return Notification.objects.filter(
+        estado="leida", created_at__lt=cutoff,
+        deleted_globally=False, deleted_by_user=False, expired=False,
+    )
+
+
+def deleted_recipients(now):
+    cutoff = now - timedelta(days=_setting("NOTIFICATIONS_ARCHIVE_DELETED_DAYS", 30))
+    return BroadcastRecipient.objects.filter(
+        Q(deleted_by_user=True, deleted_at__lt=cutoff)
+        | Q(broadcast__deleted_globally=True, broadcast__deleted_at__lt=cutoff)
+    )
+
+
+def _archive_batch(queryset, reason, batch_size):
+    """
+    Mueve hasta batch_size filas. Regresa cuántas movió.
+    """
+    with transaction.atomic():
+        rows = list(queryset.order_by("id").values(*_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        NotificationArchive.objects.bulk_create(
+            [
+                NotificationArchive(
+                    original_id=r["id"],
+                    usuario_id=r["usuario_id"],
+                    sender_id=r["sender_id"],
+                    message=r["message"],
+                    estado=r["estado"],
+                    created_at=r["created_at"],
+                    deleted_by_user=r["deleted_by_user"],
+                    deleted_globally=r["deleted_globally"],
+                    deleted_at=r["deleted_at"],
+                    reason=reason,
+                )
+                for r in rows
+            ],
+            ignore_conflicts=True,
+        )
+        Notification.objects.filter(id__in=[r["id"] for r in rows]).delete()
+    return len(rows)
+
+
+def _expire_batch(queryset, now, batch_size):
+    """
+    Marca como expiradas hasta batch_size filas (lápida para ?since=). Regresa cuántas.
+    """
+    with transaction.atomic():
+        ids = list(queryset.order_by("id").values_list("id", flat=True)[:batch_size])
+        if ids:
+            Notification.objects.filter(id__in=ids).update(expired=True, deleted_at=now, updated_at=now)
+    return len(ids)
+
+
+def _purge_batch(queryset, batch_size):
+    with transaction.atomic():
+        ids = list(queryset.order_by("id").values_list("id", flat=True)[:batch_size])
+        if ids:
+            BroadcastRecipient.objects.filter(id__in=ids).delete()
+    return len(ids)
+
+
+def archive_notifications(batch_size=None, max_batches=None, dry_run=False, now=None):
+    """
+    Archiva lo que ya cumplió su tiempo de retención.
+    - max_batches: tope de lotes por corrida (None = hasta terminar)
+    - dry_run: solo cuenta candidatas, no mueve nada
+
+    Regresa {"deleted": n, "read": n, "expired": n, "recipients": n, "batches": n,
+    "seconds": s}: "deleted" / "read" archivadas con ese reason, "expired" leídas
+    antiguas marcadas en esta corrida (se archivan como "read" en una corrida posterior).
+    """
+    now = now or timezone.now()
+    batch_size = batch_size or _setting("NOTIFICATIONS_ARCHIVE_BATCH", 1000)
+    sources = (
+        ("deleted", deleted_candidates(now), lambda qs: _archive_batch(qs, "deleted", batch_size)),
+        ("read", expired_candidates(now), lambda qs: _archive_batch(qs, "read", batch_size)),
+        ("expired", read_candidates(now), lambda qs: _expire_batch(qs, now, batch_size)),
+        ("recipients", deleted_recipients(now), lambda qs: _purge_batch(qs, batch_size)),
+    )
+
+    started = time.perf_counter()
+    stats = {name: 0 for name in SOURCES}
+    stats["batches"] = 0
+
+    if dry_run:
+        for name, queryset, _ in sources:
+            stats[name] = queryset.count()
+    else:
+        for name, queryset, run_batch in sources:
+            while max_batches is None or stats["batches"] < max_batches:
+                moved = run_batch(queryset)
+                if not moved:
+                    break
+                stats[name] += moved
+                stats["batches"] += 1
+
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    return stats
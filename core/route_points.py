@@ -0,0 +1,144 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import ROUTE_RESOURCES, bump_version
+from .eta import invalidate_route_profile
+from .geometry import build_route_geometries
+from .spatial import rebuild_route_cells
+from .models import Route, RoutePoint
+
+_COORD = Decimal("0.000001")  # 6 decimales, igual que el modelo
+
+POINTS_MODES = ("replace", "diff")
+
+
+def _coord(value, name, limit):
+    try:
+        d = Decimal(str(value))
+        # NaN / Infinity: quantize() deja pasar NaN y la comparación de abajo revienta
+        if not d.is_finite():
+            raise ValueError
+        d = d.quantize(_COORD)
+    except (InvalidOperation, TypeError, ValueError):
+        raise ValueError(f"{name} inválida.")
+    if abs(d) > limit:
+        raise ValueError(f"{name} fuera de rango.")
+    return d
+
+
+def parse_points(points):
+    """
+    Normaliza la lista de puntos que manda el admin.
+    Regresa [{"latitude": Decimal, "longitude": Decimal, "order": int}, ...]
+    Lanza ValueError si algún punto no es válido.
+    """
+    if not isinstance(points, list):
+        raise ValueError("Debe ser una lista.")
+
+    parsed = []
+    for idx, p in enumerate(points):
+        if not isinstance(p, dict):
+            raise ValueError(f"Punto {idx}: debe ser un objeto.")
+        try:
+            order = int(p.get("order", idx))
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"Punto {idx}: order inválido.")
+        try:
+            parsed.append({
+                "latitude": _coord(p.get("latitude"), "latitud", 90),
+                "longitude": _coord(p.get("longitude"), "longitud", 180),
+                "order": order,
+            })
+        except ValueError as e:
+            raise ValueError(f"Punto {idx}: {e}")
+    return parsed
+
+
+def route_points_changed(route_id):
+    """
+    Punto único de aviso cuando cambian los puntos de una ruta.
+    bulk_create / bulk_update no disparan signals, así que se llama a mano.
+    """
+    # Los validadores de GET condicional miran Route.updated_at
+    Route.objects.filter(pk=route_id).update(updated_at=timezone.now())
+    bump_version(*ROUTE_RESOURCES)
+    build_route_geometries(route_id)
+    rebuild_route_cells(route_id)
+    invalidate_route_profile(route_id)
+
+
+def replace_route_points(route, points):
+    """
+    Borra todos los puntos y los vuelve a insertar con un solo bulk_create.
+    """
+    with transaction.atomic():
+        deleted, _ = RoutePoint.objects.filter(route=route).delete()
+        RoutePoint.objects.bulk_create(
+            [RoutePoint(route=route, **p) for p in points],
+            batch_size=1000,
+        )
+        transaction.on_commit(lambda: route_points_changed(route.pk))
+
+    return {"mode": "replace", "inserted": len(points), "updated": 0, "deleted": deleted}
+
+
+def diff_route_points(route, points):
+    """
+    Solo escribe lo que cambió, comparando por `order`:
+    - order nuevo      => INSERT
+    - lat/lng distinta => UPDATE
+    - order que ya no viene => DELETE
+
+    Si hay órdenes repetidos (en la base o en el payload) no hay forma segura
+    de emparejar, así que se cae a replace.
+    """
+    incoming = {p["order"]: p for p in points}
+    if len(incoming) != len(points):
+        return replace_route_points(route, points)
+
+    existing = list(
+        RoutePoint.objects
+        .filter(route=route)
+        .only("id", "latitude", "longitude", "order")
+    )
+    by_order = {rp.order: rp for rp in existing}
+    if len(by_order) != len(existing):
+        return replace_route_points(route, points)
+
+    to_create = []
+    to_update = []
+    for order, p in incoming.items():
+        current = by_order.get(order)
+        if current is None:
+            to_create.append(RoutePoint(route=route, **p))
+        elif (current.latitude, current.longitude) != (p["latitude"], p["longitude"]):
+            current.latitude = p["latitude"]
+            current.longitude = p["longitude"]
+            to_update.append(current)
+
+    to_delete = [rp.id for order, rp in by_order.items() if order not in incoming]
+
+    with transaction.atomic():
+        if to_delete:
+            RoutePoint.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            RoutePoint.objects.bulk_update(to_update, ["latitude", "longitude"], batch_size=1000)
+        if to_create:
+            RoutePoint.objects.bulk_create(to_create, batch_size=1000)
+        if to_delete or to_update or to_create:
+            transaction.on_commit(lambda: route_points_changed(route.pk))
+
+    return {
+        "mode": "diff",
+        "inserted": len(to_create),
+        "updated": len(to_update),
+        "deleted": len(to_delete),
+    }
+
+
+def save_route_points(route, points, mode="replace"):
+    if mode == "diff":
+        return diff_route_points(route, points)
+    return replace_route_points(route, points)
@@ -9,8 +9,11 @@ from .models import (
     RouteSchedule,
     Vehicle,
     Community,
-    RouteCommunity
+    RouteCommunity,
+    ExportJob
 )
+from .geometry import geometry_payload, get_route_geometry
+from .fast_serializers import canonical_day
 
 # ==========================
 # USUARIOS
@@ -84,13 +87,33 @@ class RouteSerializer(serializers.ModelSerializer):
             'communities',
         ]
 
+    def get_fields(self):
+        fields = super().get_fields()
+        # ?geometry=encoded => polilínea simplificada en lugar de la lista de puntos
+        if self.context.get("geometry") == "encoded":
+            fields.pop("points", None)
+            fields["geometry"] = serializers.SerializerMethodField(read_only=True)
+        return fields
+
+    def get_geometry(self, obj):
+        return geometry_payload(get_route_geometry(obj.pk, self.context["zoom"]))
+
     def get_communities(self, obj):
-        links = (
-            RouteCommunity.objects
-            .filter(route=obj)
-            .select_related("community")
-            .order_by("community__name")
-        )
+        # ✅ Si la vista ya hizo prefetch de route_communities__community,
+        # usamos esos datos (evita 1 query extra por cada ruta serializada).
+        prefetched = getattr(obj, "_prefetched_objects_cache", {})
+        if "route_communities" in prefetched:
+            links = sorted(
+                (rc for rc in obj.route_communities.all() if rc.community_id),
+                key=lambda rc: rc.community.name,
+            )
+        else:
+            links = (
+                RouteCommunity.objects
+                .filter(route=obj)
+                .select_related("community")
+                .order_by("community__name")
+            )
         communities = [rc.community for rc in links if rc.community_id]
         return CommunitySerializer(communities, many=True).data
 
@@ -138,6 +161,14 @@ class RouteDateSerializer(serializers.ModelSerializer):
 # ==========================
 # HORARIOS DE RUTA
 # ==========================
+# Campo real del día en el modelo; se resuelve una vez, no en cada fila
+REAL_DAY_FIELD = next(
+    (name for name in ("day_of_week", "day", "weekday")
+     if name in {f.name for f in RouteSchedule._meta.fields}),
+    None,
+)
+
+
 class RouteScheduleSerializer(serializers.ModelSerializer):
     route = RouteSerializer(read_only=True, allow_null=True)
 
@@ -177,58 +208,10 @@ class RouteScheduleSerializer(serializers.ModelSerializer):
     # Helpers
     # -----------------------------
     def _real_day_field_name(self):
-        model_fields = {f.name for f in RouteSchedule._meta.fields}
-        if 'day_of_week' in model_fields:
-            return 'day_of_week'
-        if 'day' in model_fields:
-            return 'day'
-        if 'weekday' in model_fields:
-            return 'weekday'
-        return None
+        return REAL_DAY_FIELD
 
     def _to_canonical_es(self, value):
-        if value is None:
-            return None
-        s = str(value).strip()
-        if not s:
-            return None
-
-        low = (
-            s.lower()
-             .replace("á","a").replace("é","e").replace("í","i")
-             .replace("ó","o").replace("ú","u").replace("ü","u")
-             .replace(".","")
-             .strip()
-        )
-
-        mapping = {
-            "lunes":"Lunes",
-            "martes":"Martes",
-            "miercoles":"Miércoles",
-            "miércoles":"Miércoles",
-            "jueves":"Jueves",
-            "viernes":"Viernes",
-            "sabado":"Sábado",
-            "sábado":"Sábado",
-            "domingo":"Domingo",
-            "monday":"Lunes",
-            "tuesday":"Martes",
-            "wednesday":"Miércoles",
-            "thursday":"Jueves",
-            "friday":"Viernes",
-            "saturday":"Sábado",
-            "sunday":"Domingo",
-        }
-
-        # numérico 0-6 (asumimos 0=Lunes)
-        if low.isdigit():
-            n = int(low)
-            order = ["Lunes","Martes","Miércoles","Jueves","Viernes","Sábado","Domingo"]
-            if 0 <= n <= 6:
-                return order[n]
-            return None
-
-        return mapping.get(low)
+        return canonical_day(value)
 
     # -----------------------------
     # GET: representación
@@ -339,4 +322,31 @@ class VehicleSerializer(serializers.ModelSerializer):
             'longitude',
             'last_update',
             'route'
-        ]
\ No newline at end of file
+        ]
+
+
+# ==========================
+# EXPORTACIONES (JOBS)
+# ==========================
+class ExportJobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField(read_only=True)
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id',
+            'formato',
+            'filters',
+            'status',
+            'rows',
+            'error',
+            'created_at',
+            'started_at',
+            'finished_at',
+            'download_url',
+        ]
+
+    def get_download_url(self, obj):
+        if obj.status != "done" or not obj.file:
+            return None
+        return f"/api/admin/exports/{obj.id}/download/"
@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+
+from .authentication import auth_status_key
+from .cache import COMMUNITIES, ROUTE_DATES, ROUTE_RESOURCES, ROUTE_SCHEDULES, MAP_BUNDLE, bump_version
+from .eta import invalidate_route_profile
+from .geometry import invalidate_route_geometries
+from .spatial import mark_route_cells_dirty
+from .models import (
+    Route, RoutePoint, RouteDate, RouteSchedule,
+    Community, RouteCommunity, Vehicle, User,
+)
+from .telemetry import position_cache_key
+
+# ==========================
+# INVALIDACIÓN DE LISTADOS CACHEADOS (mapa ciudadano, rutas, fechas, horarios, comunidades)
+# ==========================
+# ⚠️ bulk_create / update() / delete() de queryset NO disparan estos signals:
+# quien los use debe llamar bump_version(...) manualmente.
+CACHED_RESOURCES_BY_MODEL = {
+    Route: ROUTE_RESOURCES,
+    RoutePoint: ROUTE_RESOURCES,
+    RouteCommunity: ROUTE_RESOURCES,
+    Community: ROUTE_RESOURCES + (COMMUNITIES,),
+    RouteDate: (MAP_BUNDLE, ROUTE_DATES),
+    RouteSchedule: (MAP_BUNDLE, ROUTE_SCHEDULES),
+}
+
+
+def invalidate_cached_resources(sender, **kwargs):
+    bump_version(*CACHED_RESOURCES_BY_MODEL[sender])
+
+
+for _model in CACHED_RESOURCES_BY_MODEL:
+    post_save.connect(invalidate_cached_resources, sender=_model, dispatch_uid=f"cached_resources_save_{_model.__name__}")
+
+    # RoutePoint sin post_delete a propósito: un receiver obliga a Django a cargar
+    # cada punto antes de borrarlo (rutas de miles de puntos). Los borrados de puntos
+    # pasan por core/route_points.py, que avisa con route_points_changed().
+    if _model is not RoutePoint:
+        post_delete.connect(invalidate_cached_resources, sender=_model, dispatch_uid=f"cached_resources_delete_{_model.__name__}")
+
+
+# ==========================
+# Route.updated_at (GET condicional, core/conditional.py)
+# ==========================
+# Asignar o quitar una comunidad, o mover un punto, cambia lo que se sirve de
+# la ruta. Los cambios de puntos en bloque avisan desde core/route_points.py.
+def touch_route(sender, instance, **kwargs):
+    Route.objects.filter(pk=instance.route_id).update(updated_at=timezone.now())
+
+
+post_save.connect(touch_route, sender=RouteCommunity, dispatch_uid="touch_route_community_save")
+post_delete.connect(touch_route, sender=RouteCommunity, dispatch_uid="touch_route_community_delete")
+post_save.connect(touch_route, sender=RoutePoint, dispatch_uid="touch_route_point_save")
+
+
+# ==========================
+# GEOMETRÍA SIMPLIFICADA E ÍNDICE ESPACIAL DE RUTAS
+# ==========================
+# Un save() suelto de un punto (p.ej. desde el admin de Django) solo borra la
+# geometría; se vuelve a calcular la próxima vez que alguien la pida.
+# Las celdas del índice espacial igual: la ruta queda marcada y la siguiente
+# búsqueda por cercanía la reconstruye una sola vez (no una por punto).
+def invalidate_route_geometry(sender, instance, **kwargs):
+    invalidate_route_geometries(instance.route_id)
+    invalidate_route_profile(instance.route_id)
+    mark_route_cells_dirty(instance.route_id)
+
+
+post_save.connect(invalidate_route_geometry, sender=RoutePoint, dispatch_uid="route_geometry_point_save")
+
+
+# ==========================
+# POSICIÓN CACHEADA DEL VEHÍCULO
+# ==========================
+# La telemetría escribe el cache directamente; esto cubre cambios hechos
+# por otras vías (admin, create_default_vehicle, cambio de ruta asignada).
+def invalidate_vehicle_position(sender, instance, **kwargs):
+    cache.delete(position_cache_key(instance.pk))
+
+
+post_save.connect(invalidate_vehicle_position, sender=Vehicle, dispatch_uid="vehicle_position_save")
+post_delete.connect(invalidate_vehicle_position, sender=Vehicle, dispatch_uid="vehicle_position_delete")
+
+
+# ==========================
+# ESTADO DE AUTENTICACIÓN CACHEADO
+# ==========================
+# Desactivar un usuario o cambiarle el rol se nota en la siguiente petición
+# (en este worker; en los demás al vencer AUTH_STATUS_TTL).
+def invalidate_auth_status(sender, instance, **kwargs):
+    cache.delete(auth_status_key(instance.pk))
+
+
+post_save.connect(invalidate_auth_status, sender=User, dispatch_uid="auth_status_save")
+post_delete.connect(invalidate_auth_status, sender=User, dispatch_uid="auth_status_delete")
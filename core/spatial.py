@@ -0,0 +1,222 @@
+"""
+"¿Qué rutas pasan cerca de mí?" sin PostGIS.
+
+Cada segmento de ruta (punto i -> i+1) se registra en las celdas de una
+cuadrícula fija de SPATIAL_CELL_DEGREES grados (RouteSegmentCell). Una consulta
+por radio solo lee las celdas que cubren el círculo (índice cell_x, cell_y) y
+mide la distancia exacta punto-segmento en Python sobre esos pocos segmentos.
+
+Funciona igual en PostgreSQL plano y en SQLite.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .fast_serializers import DAY_ORDER
+from .models import Route, RouteDate, RoutePoint, RouteSchedule, RouteSegmentCell
+
+METERS_PER_DEG_LAT = 110540.0
+METERS_PER_DEG_LNG = 111320.0
+
+# day_of_week => date.weekday()
+DAY_INDEX = {day: index for index, day in enumerate(DAY_ORDER)}
+
+
+def _cell_size():
+    return getattr(settings, "SPATIAL_CELL_DEGREES", 0.005)
+
+
+def _segment_cells(lat1, lng1, lat2, lng2, size):
+    """
+    Celdas que toca un segmento. Se parte en tramos de a lo más una celda y se
+    toma la caja de cada tramo: segmentos largos no llenan toda su caja.
+    """
+    steps = max(1, int(math.ceil(max(abs(lat2 - lat1), abs(lng2 - lng1)) / size)))
+    cells = set()
+    for i in range(steps):
+        a = i / steps
+        b = (i + 1) / steps
+        la, lb = lat1 + (lat2 - lat1) * a, lat1 + (lat2 - lat1) * b
+        ga, gb = lng1 + (lng2 - lng1) * a, lng1 + (lng2 - lng1) * b
+        for cx in range(math.floor(min(ga, gb) / size), math.floor(max(ga, gb) / size) + 1):
+            for cy in range(math.floor(min(la, lb) / size), math.floor(max(la, lb) / size) + 1):
+                cells.add((cx, cy))
+    return cells
+
+
+def rebuild_route_cells(route_id):
+    """
+    Recalcula las celdas de una ruta. Regresa cuántas filas escribió.
+    """
+    coords = [
+        (float(lat), float(lng))
+        for lat, lng in (
+            RoutePoint.objects
+            .filter(route_id=route_id)
+            .order_by("order", "id")
+            .values_list("latitude", "longitude")
+        )
+    ]
+    if len(coords) == 1:
+        # Ruta de un solo punto: segmento degenerado para que también aparezca
+        coords = coords * 2
+
+    size = _cell_size()
+    rows = []
+    for seq, ((lat1, lng1), (lat2, lng2)) in enumerate(zip(coords, coords[1:])):
+        for cx, cy in _segment_cells(lat1, lng1, lat2, lng2, size):
+            rows.append(RouteSegmentCell(
+                route_id=route_id, cell_x=cx, cell_y=cy, seq=seq,
+                lat1=lat1, lng1=lng1, lat2=lat2, lng2=lng2,
+            ))
+
+    with transaction.atomic():
+        RouteSegmentCell.objects.filter(route_id=route_id).delete()
+        RouteSegmentCell.objects.bulk_create(rows, batch_size=1000)
+
+    return len(rows)
+
+
+def mark_route_cells_dirty(route_id):
+    """
+    Aviso barato para un save() suelto de un punto: N saves seguidos (admin,
+    scripts) = una sola reconstrucción, no N.
+    """
+    Route.objects.filter(pk=route_id).update(cells_dirty=True)
+
+
+def rebuild_dirty_route_cells():
+    """
+    Rehace las celdas de las rutas marcadas. La bandera se apaga antes de leer
+    los puntos: un save que llegue durante la reconstrucción la vuelve a prender.
+    """
+    rebuilt = 0
+    for route_id in Route.objects.filter(cells_dirty=True).values_list("id", flat=True):
+        if Route.objects.filter(pk=route_id, cells_dirty=True).update(cells_dirty=False):
+            rebuild_route_cells(route_id)
+            rebuilt += 1
+    return rebuilt
+
+
+def _distance_to_segment_m(lat, lng, lat1, lng1, lat2, lng2):
+    # Proyección equirectangular local centrada en el punto consultado (error < 0.1% a pocos km)
+    kx = METERS_PER_DEG_LNG * math.cos(math.radians(lat))
+    ax, ay = (lng1 - lng) * kx, (lat1 - lat) * METERS_PER_DEG_LAT
+    bx, by = (lng2 - lng) * kx, (lat2 - lat) * METERS_PER_DEG_LAT
+    dx, dy = bx - ax, by - ay
+    seg2 = dx * dx + dy * dy
+    t = 0.0 if seg2 == 0 else max(0.0, min(1.0, -(ax * dx + ay * dy) / seg2))
+    return math.hypot(ax + t * dx, ay + t * dy)
+
+
+def cell_filter(lat, lng, radius_m):
+    """
+    Filtro (kwargs) de las celdas que cubren el círculo de radius_m alrededor del punto.
+    """
+    size = _cell_size()
+    dlat = radius_m / METERS_PER_DEG_LAT
+    dlng = radius_m / (METERS_PER_DEG_LNG * max(math.cos(math.radians(lat)), 0.01))
+    return {
+        "cell_x__gte": math.floor((lng - dlng) / size),
+        "cell_x__lte": math.floor((lng + dlng) / size),
+        "cell_y__gte": math.floor((lat - dlat) / size),
+        "cell_y__lte": math.floor((lat + dlat) / size),
+    }
+
+
+def routes_near(lat, lng, radius_m):
+    """
+    Regresa [(route_id, distancia_m), ...] de rutas a menos de radius_m,
+    de la más cercana a la más lejana.
+    """
+    rebuild_dirty_route_cells()
+
+    segments = (
+        RouteSegmentCell.objects
+        .filter(**cell_filter(lat, lng, radius_m))
+        .values_list("route_id", "seq", "lat1", "lng1", "lat2", "lng2")
+    )
+
+    best = {}
+    seen = set()
+    for route_id, seq, lat1, lng1, lat2, lng2 in segments:
+        if (route_id, seq) in seen:
+            continue
+        seen.add((route_id, seq))
+        d = _distance_to_segment_m(lat, lng, lat1, lng1, lat2, lng2)
+        if d <= radius_m and d < best.get(route_id, float("inf")):
+            best[route_id] = d
+
+    return sorted(best.items(), key=lambda item: item[1])
+
+
+def _next_schedules(route_ids, now):
+    """
+    Próxima ocurrencia de cada ruta según sus horarios semanales.
+    Hoy cuenta mientras el horario no haya terminado.
+    """
+    today = now.date()
+    result = {}
+    for s in (
+        RouteSchedule.objects
+        .filter(route_id__in=route_ids)
+        .values("id", "route_id", "day_of_week", "start_time", "end_time")
+    ):
+        if s["day_of_week"] not in DAY_INDEX:
+            continue
+        delta = (DAY_INDEX[s["day_of_week"]] - today.weekday()) % 7
+        if delta == 0 and s["end_time"] <= now.time():
+            delta = 7
+        when = today + timedelta(days=delta)
+
+        current = result.get(s["route_id"])
+        if current is None or (when, s["start_time"]) < (current["date"], current["start_time"]):
+            result[s["route_id"]] = {**s, "date": when}
+
+    return {
+        route_id: {
+            "id": s["id"],
+            "day_of_week": s["day_of_week"],
+            "date": s["date"].isoformat(),
+            "start_time": s["start_time"].isoformat(),
+            "end_time": s["end_time"].isoformat(),
+        }
+        for route_id, s in result.items()
+    }
+
+
+def nearby_routes_with_next_service(lat, lng, radius_m, limit=10):
+    """
+    Rutas cercanas + su próxima fecha (RouteDate) y próximo horario (RouteSchedule).
+    Número de queries constante: celdas, nombres, fechas y horarios.
+    """
+    found = routes_near(lat, lng, radius_m)[:limit]
+    route_ids = [route_id for route_id, _ in found]
+    if not route_ids:
+        return []
+
+    now = timezone.localtime()
+    names = dict(Route.objects.filter(id__in=route_ids).values_list("id", "name"))
+    next_dates = dict(
+        RouteDate.objects
+        .filter(route_id__in=route_ids, date__gte=now.date())
+        .values("route_id")
+        .annotate(next_date=Min("date"))
+        .values_list("route_id", "next_date")
+    )
+    next_schedules = _next_schedules(route_ids, now)
+
+    return [
+        {
+            "route_id": route_id,
+            "name": names.get(route_id),
+            "distance_m": round(distance, 1),
+            "next_date": next_dates[route_id].isoformat() if route_id in next_dates else None,
+            "next_schedule": next_schedules.get(route_id),
+        }
+        for route_id, distance in found
+    ]
@@ -0,0 +1,133 @@
+"""
+Posición en vivo por Server-Sent Events (vistas async, servidas por ASGI).
+
+Cada conexión es un generador async en el event loop del worker: no ocupa un
+hilo ni un worker mientras espera. El flujo:
+
+1. telemetry.publish_position() publica el delta en core/pubsub.hub
+   (vehículo y ruta): una escritura + un reparto en memoria.
+2. Para lo que llega por OTRO worker, cada tópico activo tiene una tarea por
+   proceso que lee las posiciones del cache compartido cada SSE_SYNC_SECONDS y
+   publica las que cambiaron. Es una lectura por tópico, no por suscriptor; con
+   locmem (un solo proceso en local) no hace falta y no corre.
+3. El generador descarta repetidos (mismo vehículo y last_update), manda un
+   comentario cada SSE_HEARTBEAT_SECONDS y cierra a los SSE_MAX_SECONDS;
+   EventSource se reconecta solo (retry).
+
+⚠️ Con WSGI (runserver, gunicorn sync) Django junta todo el stream antes de
+mandarlo: en local usar `uvicorn smart_collector.asgi:application`.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Vehicle
+from .pubsub import hub, route_topic, vehicle_topic
+from .renderers import render_json
+from .telemetry import position_cache_key
+
+# Cada cuánto se vuelve a leer qué vehículos tiene una ruta (tópico route:<id>)
+ROUTE_VEHICLES_REFRESH_SECONDS = 60
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _route_vehicle_ids(route_id):
+    return list(Vehicle.objects.filter(route_id=route_id).values_list("id", flat=True))
+
+
+# ==========================
+# SINCRONIZACIÓN ENTRE WORKERS (vía cache compartido)
+# ==========================
+_syncers = {}  # (loop, tópico) => [tarea, suscriptores]
+
+
+async def _sync_topic(topic, vehicle_ids):
+    """
+    Publica en este proceso las posiciones que otro worker escribió en el cache.
+    `vehicle_ids`: lista fija (tópico de vehículo) o route_id (se relee cada tanto).
+    """
+    seen = {}
+    ids, refreshed_at = None, None
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(_setting("SSE_SYNC_SECONDS", 2))
+        if not isinstance(vehicle_ids, int):
+            ids = vehicle_ids
+        elif refreshed_at is None or loop.time() - refreshed_at > ROUTE_VEHICLES_REFRESH_SECONDS:
+            ids = await sync_to_async(_route_vehicle_ids)(vehicle_ids)
+            refreshed_at = loop.time()
+
+        positions = await sync_to_async(cache.get_many)([position_cache_key(v) for v in ids])
+        for key, position in positions.items():
+            if seen.get(key) != position.get("last_update"):
+                seen[key] = position.get("last_update")
+                hub.publish(topic, position)
+
+
+@asynccontextmanager
+async def _synced(topic, vehicle_ids):
+    if not _setting("CACHE_SHARED", False):
+        yield
+        return
+
+    key = (asyncio.get_running_loop(), topic)
+    entry = _syncers.get(key)
+    if entry is None:
+        entry = _syncers[key] = [asyncio.ensure_future(_sync_topic(topic, vehicle_ids)), 0]
+    entry[1] += 1
+    try:
+        yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            entry[0].cancel()
+            _syncers.pop(key, None)
+
+
+# ==========================
+# EVENTOS SSE
+# ==========================
+def sse_event(event, data):
+    return b"event: " + event.encode() + b"\ndata: " + render_json(data) + b"\n\n"
+
+
+async def position_events(topic, vehicle_ids, snapshots=()):
+    """
+    Generador SSE: las posiciones actuales (`snapshots`) y luego cada delta
+    publicado en `topic`.
+    """
+    heartbeat = _setting("SSE_HEARTBEAT_SECONDS", 15)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + _setting("SSE_MAX_SECONDS", 300)
+    sent = {}
+
+    async with hub.subscribe(topic) as q, _synced(topic, vehicle_ids):
+        yield b"retry: 3000\n\n"
+        for position in snapshots:
+            sent[position["vehicle_id"]] = position["last_update"]
+            yield sse_event("position", position)
+
+        while (remaining := deadline - loop.time()) > 0:
+            try:
+                delta = await asyncio.wait_for(q.get(), timeout=min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if sent.get(delta["vehicle_id"]) == delta["last_update"]:
+                continue
+            sent[delta["vehicle_id"]] = delta["last_update"]
+            yield sse_event("position", delta)
+
+
+def vehicle_events(vehicle_id, snapshot):
+    return position_events(vehicle_topic(vehicle_id), [vehicle_id], [snapshot])
+
+
+def route_events(route_id, snapshots):
+    return position_events(route_topic(route_id), route_id, snapshots)
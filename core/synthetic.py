@@ -0,0 +1,203 @@
+"""
+Municipio sintético para benchmarks y desarrollo local (manage.py seed_data,
+manage.py bench_endpoints).
+
+Todo se inserta con bulk_create y una semilla fija: la misma configuración
+produce siempre los mismos datos. Los nombres llevan un prefijo (`label`) para
+poder borrar solo lo sintético con reset_municipality().
+"""
+import math
+import random
+from datetime import date, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .broadcasts import fan_out_broadcast
+from .cache import COMMUNITIES, ROUTE_RESOURCES, bump_version
+from .geometry import build_route_geometries
+from .spatial import DAY_INDEX, rebuild_route_cells
+from .models import (
+    Broadcast, Community, Notification, Report, Route, RouteCommunity, RouteDate,
+    RoutePoint, RouteSchedule, User, Vehicle,
+)
+
+# Centro aproximado de Nahualá, Sololá
+CENTER = (14.8430, -91.3170)
+
+DEFAULTS = {
+    "users": 200,
+    "routes": 20,
+    "points": 200,
+    "communities": 10,
+    "days": 365,
+    "notifications": 5,
+    "broadcasts": 3,
+    "reports": 1,
+    "vehicles": 3,
+}
+
+DAYS = list(DAY_INDEX)
+SHIFTS = ((time(6, 0), time(10, 0)), (time(8, 0), time(12, 0)), (time(13, 0), time(17, 0)))
+
+
+def _route_points(rng, n_points):
+    """
+    Caminata aleatoria de ~10 m por paso que sale de un punto distinto por ruta.
+    """
+    lat = CENTER[0] + rng.uniform(-0.03, 0.03)
+    lng = CENTER[1] + rng.uniform(-0.03, 0.03)
+    heading = rng.uniform(-math.pi, math.pi)
+    points = []
+    for _ in range(n_points):
+        heading += rng.uniform(-0.4, 0.4)
+        step = 0.00009 * rng.uniform(0.5, 1.5)
+        lat += step * math.sin(heading)
+        lng += step * math.cos(heading)
+        points.append((round(lat, 6), round(lng, 6)))
+    return points
+
+
+def reset_municipality(label):
+    """
+    Borra lo que creó seed_municipality() con ese label. Regresa cuántas filas borró.
+    """
+    with transaction.atomic():
+        deleted = 0
+        deleted += Vehicle.objects.filter(name__startswith=f"{label} ").delete()[0]
+        deleted += Broadcast.objects.filter(sender__username=f"{label}_admin").delete()[0]
+        deleted += Route.objects.filter(name__startswith=f"{label} ").delete()[0]
+        deleted += Community.objects.filter(name__startswith=f"{label} ").delete()[0]
+        deleted += User.objects.filter(username__startswith=f"{label}_").delete()[0]
+        transaction.on_commit(lambda: bump_version(COMMUNITIES, *ROUTE_RESOURCES))
+    return deleted
+
+
+def seed_municipality(label="demo", seed=42, password="demo12345", **sizes):
+    """
+    Crea un municipio sintético:
+    - `users` ciudadanos + 1 admin ({label}_admin), todos con `password`
+    - `communities` comunidades; `routes` rutas de `points` puntos, 1-3 comunidades c/u
+    - 2 días de servicio por ruta: RouteSchedule + RouteDate para `days` días
+    - `notifications` mensajes directos por ciudadano, `broadcasts` mensajes masivos
+    - `reports` reportes por ciudadano, `vehicles` vehículos asignados a rutas
+
+    Regresa {modelo: filas creadas}.
+    """
+    sizes = {**DEFAULTS, **sizes}
+    rng = random.Random(seed)
+    now = timezone.now()
+    counts = {}
+
+    with transaction.atomic():
+        # Un solo hash para todos: el hasher es lento a propósito
+        hashed = make_password(password)
+        admin = User.objects.create(
+            username=f"{label}_admin", email=f"{label}_admin@synthetic.local",
+            password=hashed, role="admin", is_staff=True,
+        )
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"{label}_{i:05d}", email=f"{label}_{i:05d}@synthetic.local",
+                    password=hashed, role="ciudadano",
+                )
+                for i in range(sizes["users"])
+            ],
+            batch_size=2000,
+        )
+        counts["users"] = len(users) + 1
+
+        communities = Community.objects.bulk_create(
+            [Community(name=f"{label} Comunidad {i:03d}") for i in range(sizes["communities"])]
+        )
+        counts["communities"] = len(communities)
+
+        routes = Route.objects.bulk_create(
+            [
+                Route(name=f"{label} Ruta {i:03d}", description="Ruta sintética")
+                for i in range(sizes["routes"])
+            ]
+        )
+        counts["routes"] = len(routes)
+
+        points = []
+        links = []
+        schedules = []
+        dates = []
+        first = date.today() - timedelta(days=sizes["days"] // 2)
+        for i, route in enumerate(routes):
+            for order, (lat, lng) in enumerate(_route_points(rng, sizes["points"])):
+                points.append(RoutePoint(route=route, latitude=lat, longitude=lng, order=order))
+
+            for community in rng.sample(communities, k=min(len(communities), rng.randint(1, 3))):
+                links.append(RouteCommunity(route=route, community=community))
+
+            service_days = rng.sample(DAYS, k=2)
+            start, end = rng.choice(SHIFTS)
+            for day in service_days:
+                schedules.append(RouteSchedule(route=route, day_of_week=day, start_time=start, end_time=end))
+            weekdays = {DAY_INDEX[day] for day in service_days}
+            for offset in range(sizes["days"]):
+                current = first + timedelta(days=offset)
+                if current.weekday() in weekdays:
+                    dates.append(RouteDate(route=route, date=current))
+
+        RoutePoint.objects.bulk_create(points, batch_size=5000)
+        RouteCommunity.objects.bulk_create(links)
+        RouteSchedule.objects.bulk_create(schedules)
+        RouteDate.objects.bulk_create(dates, batch_size=5000)
+        counts.update(points=len(points), route_communities=len(links), schedules=len(schedules), dates=len(dates))
+
+        # bulk_create no dispara signals: geometría, índice espacial y caches a mano
+        for route in routes:
+            build_route_geometries(route.pk)
+            rebuild_route_cells(route.pk)
+        transaction.on_commit(lambda: bump_version(COMMUNITIES, *ROUTE_RESOURCES))
+
+        notifications = []
+        for user in users:
+            for n in range(sizes["notifications"]):
+                deleted = rng.random() < 0.1
+                notifications.append(Notification(
+                    usuario=user, sender=admin,
+                    message=f"Aviso {n + 1}: el camión pasa mañana",
+                    estado="leida" if rng.random() < 0.5 else "pendiente",
+                    deleted_by_user=deleted,
+                    deleted_at=now if deleted else None,
+                ))
+        Notification.objects.bulk_create(notifications, batch_size=5000)
+        counts["notifications"] = len(notifications)
+
+        for n in range(sizes["broadcasts"]):
+            fan_out_broadcast(admin, f"Aviso general {n + 1}")
+        counts["broadcasts"] = sizes["broadcasts"]
+
+        reports = Report.objects.bulk_create(
+            [
+                Report(
+                    user=user, tipo=rng.choice(("incidencias", "rutas", "usuarios")),
+                    detalle="El camión no pasó por mi calle",
+                    status=rng.choice(("pending", "resolved", "unresolved")),
+                )
+                for user in users
+                for _ in range(sizes["reports"])
+            ],
+            batch_size=5000,
+        )
+        counts["reports"] = len(reports)
+
+        vehicles = Vehicle.objects.bulk_create(
+            [
+                Vehicle(
+                    name=f"{label} Camión {i + 1}", route=route,
+                    latitude=float(points[i * sizes["points"]].latitude) if sizes["points"] else 0,
+                    longitude=float(points[i * sizes["points"]].longitude) if sizes["points"] else 0,
+                )
+                for i, route in enumerate(routes[:sizes["vehicles"]])
+            ]
+        )
+        counts["vehicles"] = len(vehicles)
+
+    return counts
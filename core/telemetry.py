@@ -0,0 +1,245 @@
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .eta import track_fix
+from .models import Vehicle, VehiclePosition
+from .pubsub import hub, route_topic, vehicle_topic
+
+# Fixes con hora más de esto en el futuro se rechazan (reloj del teléfono mal configurado)
+MAX_FUTURE_SKEW = timedelta(minutes=5)
+# ... y con más de esto en el pasado (un lote offline de la jornada sí entra; 1970 no)
+MAX_PAST_AGE = timedelta(days=1)
+
+
+def _to_float(raw, name, required=False, low=None, high=None):
+    value = raw.get(name)
+    if value is None or value == "":
+        if required:
+            raise ValueError(f"{name} es obligatorio.")
+        return None
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} debe ser numérico.")
+    if not math.isfinite(value):  # NaN, inf, "Infinity"
+        raise ValueError(f"{name} debe ser numérico.")
+    if (low is not None and value < low) or (high is not None and value > high):
+        raise ValueError(f"{name} fuera de rango.")
+    return value
+
+
+def _parse_timestamp(value, now):
+    """
+    Acepta ISO 8601 ("2026-03-03T10:15:00Z") o epoch en segundos / milisegundos.
+    Sin valor => hora del servidor.
+    """
+    if value is None or value == "":
+        return now
+    if isinstance(value, bool):
+        raise ValueError("timestamp inválido.")
+
+    if isinstance(value, (int, float)) or str(value).replace(".", "", 1).isdigit():
+        try:
+            seconds = float(value)
+            if seconds > 1e11:  # viene en milisegundos
+                seconds /= 1000.0
+            return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            raise ValueError("timestamp inválido.")
+
+    try:
+        parsed = parse_datetime(str(value))
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError("timestamp inválido.")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def parse_fix(raw, now=None):
+    """
+    Normaliza un fix GPS del recolector. Lanza ValueError si algo no cuadra.
+    Acepta lat/lng cortos o latitude/longitude.
+    """
+    if not isinstance(raw, dict):
+        raise ValueError("Cada fix debe ser un objeto.")
+
+    now = now or timezone.now()
+
+    data = dict(raw)
+    if "latitude" not in data and "lat" in data:
+        data["latitude"] = data["lat"]
+    if "longitude" not in data and "lng" in data:
+        data["longitude"] = data["lng"]
+
+    recorded_at = _parse_timestamp(
+        data.get("timestamp", data.get("recorded_at", data.get("t"))),
+        now,
+    )
+    if recorded_at - now > MAX_FUTURE_SKEW:
+        raise ValueError("timestamp en el futuro.")
+    if now - recorded_at > MAX_PAST_AGE:
+        raise ValueError("timestamp demasiado antiguo.")
+
+    return {
+        "recorded_at": recorded_at,
+        "latitude": _to_float(data, "latitude", required=True, low=-90, high=90),
+        "longitude": _to_float(data, "longitude", required=True, low=-180, high=180),
+        "speed": _to_float(data, "speed", low=0),
+        "heading": _to_float(data, "heading", low=0, high=360),
+        "accuracy": _to_float(data, "accuracy", low=0),
+    }
+
+
+def ingest_fixes(vehicle_id, raw_fixes):
+    """
+    Guarda un lote de fixes de un vehículo:
+    - Inserta todo el historial con un solo bulk_create.
+    - Actualiza Vehicle solo con el fix más reciente y solo las columnas que cambian.
+
+    Lanza Vehicle.DoesNotExist si el vehículo no existe.
+    """
+    current = (
+        Vehicle.objects
+        .filter(pk=vehicle_id)
+        .values("latitude", "longitude", "last_update", "route_id")
+        .first()
+    )
+    if current is None:
+        raise Vehicle.DoesNotExist()
+
+    now = timezone.now()
+    positions = []
+    rejected = []
+
+    for idx, raw in enumerate(raw_fixes):
+        try:
+            fix = parse_fix(raw, now)
+        except ValueError as e:
+            rejected.append({"index": idx, "error": str(e)})
+            continue
+        positions.append(VehiclePosition(vehicle_id=vehicle_id, **fix))
+
+    result = {
+        "accepted": len(positions),
+        "rejected": rejected,
+        "latest": None,
+        "vehicle_updated": False,
+    }
+    if not positions:
+        return result
+
+    latest = max(positions, key=lambda p: p.recorded_at)
+
+    changes = {}
+    last_update = current["last_update"]
+    if last_update is None or latest.recorded_at >= last_update:
+        if latest.latitude != current["latitude"]:
+            changes["latitude"] = latest.latitude
+        if latest.longitude != current["longitude"]:
+            changes["longitude"] = latest.longitude
+        changes["last_update"] = latest.recorded_at
+
+    with transaction.atomic():
+        VehiclePosition.objects.bulk_create(
+            positions,
+            batch_size=getattr(settings, "TELEMETRY_MAX_BATCH", 500),
+        )
+        if changes:
+            # update() => UPDATE solo de esas columnas (sin save() completo)
+            Vehicle.objects.filter(pk=vehicle_id).update(**changes)
+
+    result["vehicle_updated"] = bool(changes)
+    result["latest"] = {
+        "latitude": latest.latitude,
+        "longitude": latest.longitude,
+        "recorded_at": latest.recorded_at,
+    }
+
+    if changes:
+        delta = {
+            "vehicle_id": vehicle_id,
+            "route_id": current["route_id"],
+            "lat": latest.latitude,
+            "lng": latest.longitude,
+            "speed": latest.speed,
+            "heading": latest.heading,
+            "last_update": latest.recorded_at.isoformat(),
+        }
+        transaction.on_commit(lambda: publish_position(delta))
+
+    return result
+
+
+def publish_position(delta):
+    """
+    Escribe la posición en el cache (write-through), avanza el progreso del
+    vehículo sobre su ruta (ETA) y avisa a los clientes suscritos (SSE, ver
+    core/streams.py) al vehículo y a su ruta. Sin stream, /position/ (304 si
+    no cambió).
+    """
+    progress = track_fix(
+        delta["vehicle_id"], delta["route_id"],
+        delta["lat"], delta["lng"], delta["last_update"], speed=delta["speed"],
+    )
+    if progress is not None:
+        delta["progress_m"] = round(progress["along_m"], 1)
+
+    cache.set(position_cache_key(delta["vehicle_id"]), delta, timeout=position_cache_ttl())
+    hub.publish(vehicle_topic(delta["vehicle_id"]), delta)
+    if delta.get("route_id"):
+        hub.publish(route_topic(delta["route_id"]), delta)
+
+
+# ==========================
+# POSICIÓN ACTUAL (cache caliente)
+# ==========================
+def position_cache_ttl():
+    # settings.POSITION_CACHE_TTL: 1 h con cache compartido, segundos con locmem
+    # (el write-through solo llega al worker que recibió la telemetría)
+    return getattr(settings, "POSITION_CACHE_TTL", 60 * 60)
+
+
+def position_cache_key(vehicle_id):
+    return f"sc:vehicle_pos:{vehicle_id}"
+
+
+def get_position(vehicle_id):
+    """
+    Posición actual {lat, lng, last_update, ...} desde el cache.
+    Solo en un miss consulta la base (y deja el valor cacheado).
+    Regresa None si el vehículo no existe.
+    """
+    key = position_cache_key(vehicle_id)
+    position = cache.get(key)
+    if position is not None:
+        return position
+
+    current = (
+        Vehicle.objects
+        .filter(pk=vehicle_id)
+        .values("id", "route_id", "latitude", "longitude", "last_update")
+        .first()
+    )
+    if current is None:
+        return None
+
+    position = {
+        "vehicle_id": current["id"],
+        "route_id": current["route_id"],
+        "lat": current["latitude"],
+        "lng": current["longitude"],
+        "speed": None,
+        "heading": None,
+        "last_update": current["last_update"].isoformat() if current["last_update"] else None,
+    }
+    cache.set(key, position, timeout=position_cache_ttl())
+    return position
@@ -1,3 +1,1555 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import date, time, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date, urlsafe_base64_encode
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import (
+    User, Route, RoutePoint, RouteDate, RouteSchedule,
+    Community, RouteCommunity, Vehicle, VehiclePosition, Report, RouteGeometry,
+    Notification, NotificationArchive, Broadcast, BroadcastRecipient, ExportJob,
+)
+from .authentication import tokens_for_user
+from .serializers import RouteDateSerializer, RouteScheduleSerializer, RouteSerializer
+from .cache import ROUTES, get_version, reset_cache_stats
+from .compression import brotli, choose_encoding
+from .instrumentation import percentile, reset_metrics
+from .pubsub import hub, vehicle_topic
+from .inbox import admin_feed_queryset, inbox_queryset, mark_read, visible_q
+from .fast_serializers import (
+    canonical_day, serialize_route_dates, serialize_route_schedules, serialize_routes,
+)
+from .geometry import build_route_geometries, decode_polyline, encode_polyline, simplify
+from .renderers import FastJSONRenderer
+from .retention import archive_notifications
+from .route_points import replace_route_points
+from .spatial import rebuild_route_cells
+from .telemetry import position_cache_key, publish_position
+from .synthetic import reset_municipality, seed_municipality
+
+
+# ==========================
+# HELPERS
+# ==========================
+def make_route(idx, n_points=3, communities=()):
+    route = Route.objects.create(name=f"Ruta {idx}")
+    RoutePoint.objects.bulk_create([
+        RoutePoint(route=route, latitude=14.8 + i / 1000, longitude=-91.5 - i / 1000, order=i)
+        for i in range(n_points)
+    ])
+    for c in communities:
+        RouteCommunity.objects.create(route=route, community=c)
+    return route
+
+
+def seed_routes(n_routes, start=0):
+    communities = [
+        Community.objects.get_or_create(name=f"Comunidad {i}")[0]
+        for i in range(2)
+    ]
+    for i in range(start, start + n_routes):
+        route = make_route(i, communities=communities)
+        RouteDate.objects.create(route=route, date=date(2026, 1, 1) + timedelta(days=i))
+        RouteSchedule.objects.create(
+            route=route, day_of_week="Martes",
+            start_time=time(8, 0), end_time=time(12, 0),
+        )
+
+
+# ==========================
+# N+1: QUERIES CONSTANTES EN LISTADOS
+# ==========================
+class ListEndpointQueryCountTests(TestCase):
+    ENDPOINTS = [
+        "/api/routes/",
+        "/api/calendar/?from=2026-01-01",
+        "/api/my-routes/?from=2026-01-01",
+        "/api/citizen/route-schedules/",
+        "/api/admin/routes/",
+    ]
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@test.local", password="x",
+            role="admin", is_staff=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _count(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200, url)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        seed_routes(1)
+        small = {url: self._count(url) for url in self.ENDPOINTS}
+
+        seed_routes(6, start=1)
+        for url in self.ENDPOINTS:
+            with self.subTest(url=url):
+                self.assertEqual(self._count(url), small[url])
+
+    def test_communities_are_read_from_prefetch(self):
+        seed_routes(2)
+        res = self.client.get("/api/routes/")
+        names = [c["name"] for c in res.json()[0]["communities"]]
+        self.assertEqual(names, ["Comunidad 0", "Comunidad 1"])
+
+
+# ==========================
+# SERIALIZACIÓN RÁPIDA = MISMA SALIDA QUE DRF
+# ==========================
+class FastSerializerTests(TestCase):
+    def setUp(self):
+        seed_routes(3)
+        route = Route.objects.order_by("id").first()
+        route.description = "Centro"
+        route.day_of_week = "Miércoles"
+        route.start_time = time(6, 30)
+        route.save()
+        RouteSchedule.objects.create(
+            route=route, day_of_week="Sábado", start_time=time(13, 0), end_time=time(17, 0),
+        )
+        build_route_geometries(route.pk)
+
+    def assertSameJson(self, fast, slow):
+        self.assertEqual(json.loads(JSONRenderer().render(fast)), json.loads(JSONRenderer().render(slow)))
+
+    def test_routes(self):
+        routes = Route.objects.order_by("id")
+        self.assertSameJson(serialize_routes(routes), RouteSerializer(routes, many=True).data)
+
+        geometry = {"geometry": "encoded", "zoom": 12}
+        self.assertSameJson(
+            serialize_routes(routes, geometry=geometry),
+            RouteSerializer(routes, many=True, context=geometry).data,
+        )
+
+    def test_dates_and_schedules(self):
+        dates = RouteDate.objects.order_by("date", "id")
+        self.assertSameJson(serialize_route_dates(dates), RouteDateSerializer(dates, many=True).data)
+
+        schedules = RouteSchedule.objects.order_by("id")
+        self.assertSameJson(
+            serialize_route_schedules(schedules), RouteScheduleSerializer(schedules, many=True).data,
+        )
+
+    def test_each_route_serialized_once(self):
+        for i in range(10):
+            RouteDate.objects.create(route=Route.objects.first(), date=date(2026, 3, 1) + timedelta(days=i))
+
+        # fechas + rutas + puntos + comunidades
+        with self.assertNumQueries(4):
+            data = serialize_route_dates(RouteDate.objects.all())
+        self.assertEqual(len(data), 13)
+
+    def test_canonical_day(self):
+        self.assertEqual(canonical_day("miercoles."), "Miércoles")
+        self.assertEqual(canonical_day(" SATURDAY "), "Sábado")
+        self.assertEqual(canonical_day("6"), "Domingo")
+        self.assertIsNone(canonical_day("7"))
+        self.assertIsNone(canonical_day(""))
+
+
+# ==========================
+# CACHE DE LECTURA (read-through + invalidación por signals)
+# ==========================
+class ReadCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_cache_stats()
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@test.local", password="x",
+            role="admin", is_staff=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        seed_routes(2)
+
+    def _get(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url)
+        self.assertEqual(res.status_code, 200, url)
+        return res.json(), len(ctx.captured_queries)
+
+    def test_second_read_skips_database(self):
+        for url in (
+            "/api/admin/communities/", "/api/admin/route-dates/", "/api/admin/route-schedules/",
+            "/api/citizen/route-schedules/", "/api/routes/",
+        ):
+            with self.subTest(url=url):
+                first, _ = self._get(url)
+                second, queries = self._get(url)
+                self.assertEqual(first, second)
+                self.assertEqual(queries, 0)
+
+    def test_model_changes_invalidate(self):
+        self._get("/api/admin/communities/")
+        Community.objects.create(name="Nueva")
+        data, queries = self._get("/api/admin/communities/")
+        self.assertIn("Nueva", [c["name"] for c in data])
+        self.assertGreater(queries, 0)
+
+        self._get("/api/routes/")
+        Route.objects.filter(name="Ruta 0").first().delete()
+        data, _ = self._get("/api/routes/")
+        self.assertEqual([r["name"] for r in data], ["Ruta 1"])
+
+    def test_stats_endpoint(self):
+        self._get("/api/admin/communities/")
+        self._get("/api/admin/communities/")
+        stats = self.client.get("/api/admin/cache/stats/").data["resources"]["communities"]
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_ratio"]), (1, 1, 0.5))
+
+    def test_per_user_keys_do_not_cull_versions(self):
+        version = get_version(ROUTES)
+        for user_id in range(2000):
+            cache.set(f"sc:auth_status:{user_id}", {"is_active": True})
+        self.assertEqual(get_version(ROUTES), version)
+        self.assertIsNotNone(cache.get("sc:auth_status:0"))
+
+    @override_settings(CACHE_STATS_FLUSH_EVERY=2)
+    def test_stats_are_kept_in_the_shared_cache(self):
+        self._get("/api/admin/communities/")
+        self._get("/api/admin/communities/")  # segundo acceso: se suman al cache
+        generation = cache.get("sc:cache_stats:generation")
+        self.assertEqual(cache.get(f"sc:cache_stats:{generation}:communities:hits"), 1)
+        self.assertEqual(cache.get(f"sc:cache_stats:{generation}:communities:misses"), 1)
+
+        # Lo que otro worker sumó al cache también aparece aquí
+        cache.set(f"sc:cache_stats:{generation}:communities:hits", 9, timeout=None)
+        stats = self.client.get("/api/admin/cache/stats/").data["resources"]["communities"]
+        self.assertEqual((stats["hits"], stats["misses"]), (9, 1))
+
+        self.client.delete("/api/admin/cache/stats/")
+        self.assertEqual(self.client.get("/api/admin/cache/stats/").data["resources"], {})
+
+
+# ==========================
+# JSON (orjson / stdlib) + COMPRESIÓN DE LA API
+# ==========================
+class ApiJsonCompressionTests(TestCase):
+    PAYLOAD = {
+        "when": timezone.now(),
+        "day": date(2026, 1, 1),
+        "at": time(8, 30),
+        "lat": Decimal("14.843000"),
+        "name": "Nahualá \u2028 ñ",
+        "items": [1, 2.5, None, True],
+    }
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username="c", email="c@test.local", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        seed_routes(3)
+
+    def test_renderer_matches_drf(self):
+        expected = JSONRenderer().render(self.PAYLOAD)
+        for backend in ("orjson", "stdlib"):
+            with self.subTest(backend=backend), override_settings(JSON_RENDERER=backend):
+                self.assertEqual(FastJSONRenderer().render(self.PAYLOAD), expected)
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding("gzip, deflate"), "gzip")
+        self.assertIsNone(choose_encoding("gzip;q=0, identity"))
+        self.assertIsNone(choose_encoding(""))
+        self.assertEqual(choose_encoding("*"), "br" if brotli else "gzip")
+
+    @override_settings(API_COMPRESSION_MIN_BYTES=200)
+    def test_large_api_response_is_gzipped(self):
+        plain = self.client.get("/api/routes/")
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        res = self.client.get("/api/routes/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(res["Content-Encoding"], "gzip")
+        self.assertLess(len(res.content), len(plain.content))
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+
+    @override_settings(API_COMPRESSION_MIN_BYTES=200)
+    def test_small_responses_untouched_and_etag_still_matches(self):
+        res = self.client.get("/api/health/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", res)
+
+        map_bundle = self.client.get("/api/citizen/map-bundle/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(map_bundle["Content-Encoding"], "gzip")
+        self.assertTrue(map_bundle["ETag"].startswith('W/"map-'))
+        cached = self.client.get(
+            "/api/citizen/map-bundle/", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=map_bundle["ETag"],
+        )
+        self.assertEqual(cached.status_code, 304)
+
+
+# ==========================
+# GET CONDICIONAL (ETag / Last-Modified => 304)
+# ==========================
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@test.local", password="x",
+            role="admin", is_staff=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        seed_routes(2)
+
+    def _revalidate(self, url, first, **headers):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"], **headers)
+
+    def test_cached_resource_answers_304_without_queries(self):
+        first = self.client.get("/api/admin/communities/")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first["Cache-Control"], "private, no-cache")
+
+        with self.assertNumQueries(0):
+            again = self._revalidate("/api/admin/communities/", first)
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.content, b"")
+
+        Community.objects.create(name="Nueva")
+        changed = self._revalidate("/api/admin/communities/", first)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+
+    def test_calendar_validators_follow_routes_points_and_links(self):
+        first = self.client.get("/api/calendar/")
+        # Hay borrados físicos: solo ETag (If-Modified-Since no los detectaría)
+        self.assertNotIn("Last-Modified", first)
+        # Solo las agregaciones: ni fechas ni rutas serializadas
+        with self.assertNumQueries(3):
+            self.assertEqual(self._revalidate("/api/calendar/", first).status_code, 304)
+
+        route = Route.objects.order_by("id").first()
+        with self.captureOnCommitCallbacks(execute=True):
+            replace_route_points(route, [{"latitude": 14.9, "longitude": -91.4, "order": 0}])
+        second = self._revalidate("/api/calendar/", first)
+        self.assertEqual(second.status_code, 200)
+
+        RouteCommunity.objects.filter(route=route).first().delete()
+        self.assertEqual(self._revalidate("/api/calendar/", second).status_code, 200)
+
+    def test_calendar_hard_delete_is_not_hidden_by_if_modified_since(self):
+        first = self.client.get("/api/calendar/?from=2026-01-01")
+        stamp = http_date(timezone.now().timestamp() + 60)
+        RouteDate.objects.order_by("id").first().delete()
+        res = self.client.get("/api/calendar/?from=2026-01-01", HTTP_IF_MODIFIED_SINCE=stamp)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data), len(first.data) - 1)
+
+    def test_calendar_etag_changes_with_the_day(self):
+        first = self.client.get("/api/calendar/")
+        with mock.patch("django.utils.timezone.localdate", return_value=timezone.localdate() + timedelta(days=1)):
+            self.assertEqual(self._revalidate("/api/calendar/", first).status_code, 200)
+
+    def test_notifications_are_per_user(self):
+        citizen = User.objects.create_user(username="c1", email="c1@test.local", password="x")
+        other = User.objects.create_user(username="c2", email="c2@test.local", password="x")
+        n = Notification.objects.create(usuario=citizen, sender=self.admin, message="Hola")
+
+        self.client.force_authenticate(citizen)
+        first = self.client.get("/api/my-notifications/")
+        self.assertEqual(self._revalidate("/api/my-notifications/", first).status_code, 304)
+
+        mark_read(citizen.id, ids=[n.id])
+        self.assertEqual(self._revalidate("/api/my-notifications/", first).status_code, 200)
+
+        self.client.force_authenticate(other)
+        latest = self.client.get("/api/my-notifications/")
+        self.client.force_authenticate(citizen)
+        self.assertEqual(self._revalidate("/api/my-notifications/", latest).status_code, 200)
+
+    def test_vehicle_detail(self):
+        vehicle = Vehicle.objects.create(name="Camión", route=Route.objects.first())
+        url = f"/api/vehicles/{vehicle.id}/"
+        first = self.client.get(url)
+        self.assertEqual(self._revalidate(url, first).status_code, 304)
+
+        route = vehicle.route
+        route.name = "Ruta renombrada"
+        route.save()
+        self.assertEqual(self._revalidate(url, first).status_code, 200)
+
+
+# ==========================
+# INSTRUMENTACIÓN (Server-Timing + percentiles por endpoint)
+# ==========================
+@override_settings(INSTRUMENTATION_SAMPLE_RATE=1.0)
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        reset_metrics()
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@test.local", password="x",
+            role="admin", is_staff=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        seed_routes(2)
+
+    def test_server_timing_and_metrics_endpoint(self):
+        route_id = Route.objects.values_list("id", flat=True).first()
+        for _ in range(3):
+            res = self.client.get(f"/api/admin/route-communities/?route_id={route_id}")
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("db;dur=", res["Server-Timing"])
+        self.assertIn("render;dur=", res["Server-Timing"])
+
+        endpoints = self.client.get("/api/admin/metrics/").data["endpoints"]
+        row = next(e for e in endpoints if e["pattern"] == "GET api/admin/route-communities/")
+        self.assertEqual(row["count"], 3)
+        self.assertGreater(row["queries"]["max"], 0)
+        self.assertGreater(row["bytes"]["p50"], 0)
+        self.assertLessEqual(row["total_ms"]["p50"], row["total_ms"]["p99"])
+
+    @override_settings(INSTRUMENTATION_SAMPLE_RATE=0)
+    def test_sampling_off(self):
+        res = self.client.get("/api/admin/communities/")
+        self.assertFalse(res.has_header("Server-Timing"))
+        self.assertEqual(self.client.get("/api/admin/metrics/").data["endpoints"], [])
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual([percentile(values, p) for p in (50, 95, 99)], [50, 95, 99])
+        self.assertIsNone(percentile([], 50))
+
+
+# ==========================
+# MUNICIPIO SINTÉTICO + BENCHMARK DE ENDPOINTS
+# ==========================
+class SyntheticBenchmarkTests(TestCase):
+    SIZES = {
+        "users": 5, "routes": 3, "points": 20, "communities": 2, "days": 14,
+        "notifications": 2, "broadcasts": 1, "reports": 1, "vehicles": 1,
+    }
+
+    def test_seed_and_reset(self):
+        counts = seed_municipality(label="t", **self.SIZES)
+        self.assertEqual(counts["points"], 60)
+        self.assertEqual(counts["schedules"], 6)
+        self.assertEqual(RouteDate.objects.count(), counts["dates"])
+        self.assertEqual(
+            RouteGeometry.objects.filter(route__name__startswith="t ").values("route").distinct().count(), 3
+        )
+        self.assertEqual(BroadcastRecipient.objects.count(), 6)
+
+        reset_municipality("t")
+        self.assertFalse(Route.objects.filter(name__startswith="t ").exists())
+        self.assertFalse(User.objects.filter(username__startswith="t_").exists())
+
+    def test_bench_endpoints_writes_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "endpoints.json")
+            call_command(
+                "bench_endpoints", output=output, repeat=1, only="api/admin/route",
+                stdout=io.StringIO(), **self.SIZES,
+            )
+            with open(output) as fh:
+                baseline = json.load(fh)
+
+        endpoints = baseline["endpoints"]
+        self.assertEqual(endpoints["GET api/admin/routes/"]["status"], 200)
+        self.assertIn("GET api/admin/route-communities/?route_id={route_id}", endpoints)
+        self.assertFalse([k for k, v in endpoints.items() if "error" in v or v.get("status") == 500])
+
+
+# ==========================
+# PAQUETE DEL MAPA (cache + ETag)
+# ==========================
+class MapBundleTests(TestCase):
+    URL = "/api/citizen/map-bundle/"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="vecino", email="vecino@test.local", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        seed_routes(3)
+
+    def test_bundle_contains_routes_dates_and_schedules(self):
+        data = self.client.get(self.URL).json()
+        self.assertEqual(len(data["routes"]), 3)
+        self.assertEqual(len(data["dates"]), 3)
+        self.assertEqual(len(data["schedules"]), 3)
+        self.assertEqual(len(data["routes"][0]["points"]), 3)
+
+    def test_cached_bundle_and_304(self):
+        first = self.client.get(self.URL)
+        etag = first["ETag"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.client.get(self.URL)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(again.content, first.content)
+
+        not_modified = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_write_changes_version(self):
+        etag = self.client.get(self.URL)["ETag"]
+        RouteDate.objects.create(route=Route.objects.first(), date=date(2027, 5, 1))
+
+        res = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res["ETag"], etag)
+        self.assertEqual(len(res.json()["dates"]), 4)
+
+    @override_settings(CACHE_VERSION_TTL=30, MAP_BUNDLE_TTL=30)
+    def test_worker_that_missed_the_write_recovers_after_ttl(self):
+        # Otro worker escribió: aquí no corrió ningún signal (update() no los dispara)
+        etag = self.client.get(self.URL)["ETag"]
+        RouteDate.objects.filter(route=Route.objects.first()).update(date=date(2027, 5, 1))
+
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        later = timezone.now().timestamp() + 31
+        with mock.patch("time.time", return_value=later):
+            res = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertIn("2027-05-01", [d["date"] for d in res.json()["dates"]])
+
+
+# ==========================
+# CALENDARIO: FILTROS Y CURSOR KEYSET
+# ==========================
+class CalendarPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="vecino", email="vecino@test.local", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        seed_routes(5)  # fechas 2026-01-01 .. 2026-01-05
+
+    def test_date_window(self):
+        data = self.client.get("/api/calendar/?from=2026-01-02&to=2026-01-03").json()
+        self.assertEqual([d["date"] for d in data], ["2026-01-02", "2026-01-03"])
+
+    def test_keyset_pages_cover_everything_once(self):
+        seen = []
+        url = "/api/my-routes/?from=2026-01-01&limit=2"
+        while url:
+            res = self.client.get(url)
+            seen += [d["id"] for d in res.json()]
+            cursor = res.headers.get("X-Next-Cursor")
+            url = f"/api/my-routes/?from=2026-01-01&limit=2&cursor={cursor}" if cursor else None
+        self.assertEqual(seen, list(RouteDate.objects.order_by("date", "id").values_list("id", flat=True)))
+
+    def test_default_window_around_today(self):
+        today = timezone.localdate()
+        route = Route.objects.first()
+        for days in (-30, -7, 0, 60, 61):
+            RouteDate.objects.create(route=route, date=today + timedelta(days=days))
+
+        data = self.client.get("/api/calendar/").json()
+        self.assertEqual(
+            [d["date"] for d in data],
+            [(today + timedelta(days=days)).isoformat() for days in (-7, 0, 60)],
+        )
+        # Con solo "to", la ventana llega 67 días hacia atrás (no todo el historial)
+        data = self.client.get(f"/api/calendar/?to={today.isoformat()}").json()
+        self.assertEqual(len(data), 3)
+
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get("/api/calendar/?from=ayer").status_code, 400)
+        self.assertEqual(self.client.get("/api/calendar/?cursor=xxx").status_code, 400)
+
+
+# ==========================
+# TELEMETRÍA DE VEHÍCULOS
+# ==========================
+class TelemetryTests(TestCase):
+    def setUp(self):
+        self.driver = User.objects.create_user(
+            username="chofer", email="chofer@test.local", password="x", role="recolector",
+        )
+        self.vehicle = Vehicle.objects.create(name="Camión 1")
+        self.client = APIClient()
+        self.client.force_authenticate(self.driver)
+
+    def _ts(self, seconds):
+        return (timezone.now() + timedelta(seconds=seconds)).isoformat()
+
+    def test_batch_is_stored_and_vehicle_gets_latest_fix(self):
+        fixes = [
+            {"lat": 14.1, "lng": -91.1, "timestamp": self._ts(1), "speed": 3},
+            {"lat": 14.3, "lng": -91.3, "timestamp": self._ts(5)},
+            {"lat": 14.2, "lng": -91.2, "timestamp": self._ts(3)},
+            {"lat": 200, "lng": -91.2},
+        ]
+        res = self.client.post(f"/api/vehicles/{self.vehicle.id}/telemetry/", {"fixes": fixes}, format="json")
+
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.json()["accepted"], 3)
+        self.assertEqual(len(res.json()["rejected"]), 1)
+        self.assertEqual(VehiclePosition.objects.filter(vehicle=self.vehicle).count(), 3)
+
+        self.vehicle.refresh_from_db()
+        self.assertEqual((self.vehicle.latitude, self.vehicle.longitude), (14.3, -91.3))
+
+    def test_older_fix_does_not_move_vehicle(self):
+        url = f"/api/vehicles/{self.vehicle.id}/telemetry/"
+        self.client.post(url, {"fixes": [{"lat": 14.3, "lng": -91.3, "timestamp": self._ts(5)}]}, format="json")
+        self.client.post(url, {"fixes": [{"lat": 14.1, "lng": -91.1, "timestamp": self._ts(1)}]}, format="json")
+
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.latitude, 14.3)
+
+    def test_implausible_timestamps_are_rejected(self):
+        url = f"/api/vehicles/{self.vehicle.id}/telemetry/"
+        for ts in (1e20, "1e20", True, 5, self._ts(-2 * 24 * 3600), "2026-13-45T10:00:00Z"):
+            res = self.client.post(url, {"fixes": [{"lat": 14.1, "lng": -91.1, "timestamp": ts}]}, format="json")
+            self.assertEqual(res.status_code, 400, ts)
+            self.assertEqual(res.json()["accepted"], 0, ts)
+        self.assertFalse(VehiclePosition.objects.exists())
+
+        # Epoch en milisegundos de hace un rato sí entra
+        ms = int((timezone.now() - timedelta(minutes=10)).timestamp() * 1000)
+        res = self.client.post(url, {"fixes": [{"lat": 14.1, "lng": -91.1, "timestamp": ms}]}, format="json")
+        self.assertEqual(res.status_code, 201)
+
+    def test_non_finite_numbers_are_rejected(self):
+        url = f"/api/vehicles/{self.vehicle.id}/telemetry/"
+        for field, value in (("speed", "inf"), ("accuracy", "Infinity"), ("heading", "nan"), ("lat", "-inf")):
+            fix = {"lat": 14.1, "lng": -91.1, field: value}
+            res = self.client.post(url, {"fixes": [fix]}, format="json")
+            self.assertEqual(res.status_code, 400, field)
+        self.assertFalse(VehiclePosition.objects.exists())
+
+    def test_update_location_keeps_history(self):
+        res = self.client.put(
+            f"/api/vehicles/{self.vehicle.id}/update-location/",
+            {"latitude": 14.5, "longitude": -91.5}, format="json",
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(VehiclePosition.objects.filter(vehicle=self.vehicle).count(), 1)
+
+
+# ==========================
+# POSICIÓN EN VIVO (SSE async)
+# ==========================
+@override_settings(SSE_HEARTBEAT_SECONDS=1, SSE_MAX_SECONDS=5, SSE_SYNC_SECONDS=0.05)
+class VehicleStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.route = Route.objects.create(name="Norte")
+        self.driver = User.objects.create_user(
+            username="chofer", email="chofer@test.local", password="x", role="recolector",
+        )
+        self.vehicle = Vehicle.objects.create(name="Camión 1", latitude=14.0, longitude=-91.0, route=self.route)
+        Vehicle.objects.filter(pk=self.vehicle.pk).update(last_update=timezone.now())
+        self.token = str(tokens_for_user(self.driver)[1])
+
+    def _delta(self, lat, minutes=1):
+        return {
+            "vehicle_id": self.vehicle.id, "route_id": self.route.id, "lat": lat, "lng": -91.0,
+            "speed": None, "heading": None,
+            "last_update": (timezone.now() + timedelta(minutes=minutes)).isoformat(),
+        }
+
+    async def _open(self, url, **kwargs):
+        """
+        Lee el stream en una tarea, como el handler ASGI; cancelarla = el cliente se fue.
+        """
+        res = await self.async_client.get(url, **kwargs)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res["Content-Type"], "text/event-stream")
+        chunks = asyncio.Queue()
+
+        async def read():
+            async for chunk in res:
+                await chunks.put(chunk)
+
+        return chunks, asyncio.ensure_future(read())
+
+    async def _next_event(self, chunks):
+        while True:
+            chunk = await asyncio.wait_for(chunks.get(), timeout=3)
+            if chunk.startswith(b"event:"):
+                return chunk
+
+    async def _close(self, reader):
+        reader.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await reader
+
+    async def test_stream_sends_snapshot_then_published_delta(self):
+        chunks, reader = await self._open(f"/api/vehicles/{self.vehicle.id}/stream/?token={self.token}")
+        self.assertTrue((await chunks.get()).startswith(b"retry:"))
+        self.assertIn(b'"lat":14.0', await self._next_event(chunks))
+
+        topic = vehicle_topic(self.vehicle.id)
+        self.assertEqual(hub.subscriber_count(topic), 1)
+        delta = self._delta(14.5)
+        await sync_to_async(publish_position)(delta)
+        await sync_to_async(publish_position)(dict(delta))  # repetido: no se reenvía
+        self.assertIn(b'"lat":14.5', await self._next_event(chunks))
+        await asyncio.sleep(0.1)
+        while not chunks.empty():
+            self.assertFalse(chunks.get_nowait().startswith(b"event:"))
+
+        await self._close(reader)
+        self.assertEqual(hub.subscriber_count(topic), 0)
+
+    @override_settings(CACHE_SHARED=True)
+    async def test_route_stream_picks_up_writes_from_other_workers(self):
+        chunks, reader = await self._open(
+            f"/api/routes/{self.route.id}/stream/", headers={"Authorization": f"Bearer {self.token}"},
+        )
+        await self._next_event(chunks)  # posición actual
+
+        # Otro worker solo deja la posición en el cache compartido (no publica aquí)
+        await sync_to_async(cache.set)(position_cache_key(self.vehicle.id), self._delta(14.7))
+        self.assertIn(b'"lat":14.7', await self._next_event(chunks))
+        await self._close(reader)
+
+    async def test_stream_requires_token(self):
+        res = await self.async_client.get(f"/api/vehicles/{self.vehicle.id}/stream/")
+        self.assertEqual(res.status_code, 401)
+        res = await self.async_client.get(f"/api/vehicles/{self.vehicle.id}/stream/?token=nope")
+        self.assertEqual(res.status_code, 401)
+
+
+# ==========================
+# POSICIÓN LIGERA (cache + 304)
+# ==========================
+class VehiclePositionTests(TestCase):
+    def setUp(self):
+        self.driver = User.objects.create_user(
+            username="chofer", email="chofer@test.local", password="x", role="recolector",
+        )
+        cache.clear()
+        self.vehicle = Vehicle.objects.create(name="Camión 1", latitude=14.0, longitude=-91.0)
+        self.client = APIClient()
+        self.client.force_authenticate(self.driver)
+        self.url = f"/api/vehicles/{self.vehicle.id}/position/"
+
+    def test_position_is_served_from_cache_and_revalidated(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()["lat"], 14.0)
+
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_telemetry_writes_through(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"/api/vehicles/{self.vehicle.id}/telemetry/",
+                {"fixes": [{"lat": 14.5, "lng": -91.5}]}, format="json",
+            )
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["lat"], 14.5)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    @override_settings(POSITION_CACHE_TTL=5)
+    def test_write_on_another_worker_shows_up_after_ttl(self):
+        self.client.get(self.url)
+        # Telemetría recibida por otro worker: la base cambia, este cache no
+        Vehicle.objects.filter(pk=self.vehicle.pk).update(latitude=14.5, last_update=timezone.now())
+        self.assertEqual(self.client.get(self.url).json()["lat"], 14.0)
+
+        with mock.patch("time.time", return_value=timezone.now().timestamp() + 6):
+            self.assertEqual(self.client.get(self.url).json()["lat"], 14.5)
+
+
+# ==========================
+# PDF DE REPORTES (streaming)
+# ==========================
+class ReportsPdfTests(TestCase):
+    URL = "/api/admin/reports/generate-pdf/"
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@test.local", password="x", role="admin", is_staff=True,
+        )
+        Report.objects.bulk_create(
+            [Report(user=self.admin, detalle=f"Detalle (#{i})", status="pending") for i in range(80)]
+            + [Report(user=self.admin, detalle="Resuelto", status="resolved", tipo="rutas")]
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _pdf(self, url):
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.streaming)
+        return b"".join(res.streaming_content)
+
+    def test_streamed_pdf_has_valid_xref(self):
+        pdf = self._pdf(self.URL)
+        self.assertTrue(pdf.startswith(b"%PDF-1.4"))
+        self.assertTrue(pdf.endswith(b"%%EOF\n"))
+
+        startxref = int(pdf.rsplit(b"startxref\n", 1)[1].split(b"\n", 1)[0])
+        entries = pdf[startxref:].split(b"\n")[3:]
+        for number, entry in enumerate(entries, start=1):
+            if not entry.endswith(b" n "):
+                break
+            offset = int(entry[:10])
+            self.assertTrue(pdf[offset:].startswith(b"%d 0 obj" % number))
+
+        # 81 líneas: 37 en la primera página + 38 en la segunda + 6 en la tercera
+        self.assertIn(b"/Count 3", pdf)
+
+    def test_filters(self):
+        pdf = self._pdf(self.URL + "?status=resolved&tipo=rutas")
+        self.assertIn(b"/Count 1", pdf)
+
+        res = self.client.get("/api/admin/reports/generate/?status=resolved")
+        self.assertEqual(res.json()["total"], 1)
+        self.assertEqual(self.client.get(self.URL + "?status=xx").status_code, 400)
+
+
+# ==========================
+# EXPORTACIONES EN SEGUNDO PLANO
+# ==========================
+@override_settings(EXPORT_JOBS_MODE="worker", MEDIA_ROOT=tempfile.mkdtemp(prefix="sc-test-media-"))
+class ExportJobTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@test.local", password="x", role="admin", is_staff=True,
+        )
+        Report.objects.bulk_create(
+            [Report(user=self.admin, detalle=f"Detalle {i}", status="pending") for i in range(5)]
+            + [Report(user=self.admin, detalle="Resuelto", status="resolved")]
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _submit(self, payload):
+        res = self.client.post("/api/admin/exports/", payload, format="json")
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual(res.json()["status"], "pending")
+        call_command("run_export_jobs", "--once", stdout=io.StringIO())
+        return self.client.get(f"/api/admin/exports/{res.json()['id']}/").json()
+
+    def test_csv_export_runs_in_worker_and_downloads(self):
+        job = self._submit({"format": "csv", "filters": {"status": "pending"}})
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["rows"], 5)
+
+        res = self.client.get(job["download_url"])
+        body = b"".join(res.streaming_content).decode("utf-8-sig")
+        self.assertEqual(len(body.strip().splitlines()), 6)  # encabezado + 5
+
+    def test_csv_export_escapes_formulas(self):
+        Report.objects.filter(status="resolved").update(detalle='=HYPERLINK("http://x","y")')
+        job = self._submit({"format": "csv", "filters": {"status": "resolved"}})
+        res = self.client.get(job["download_url"])
+        row = list(csv.reader(b"".join(res.streaming_content).decode("utf-8-sig").splitlines()))[1]
+        self.assertEqual(row[-1], '\'=HYPERLINK("http://x","y")')
+
+    def test_pdf_export(self):
+        job = self._submit({"format": "pdf"})
+        self.assertEqual(job["status"], "done")
+        res = self.client.get(job["download_url"])
+        self.assertTrue(b"".join(res.streaming_content).startswith(b"%PDF"))
+
+    def test_orphaned_running_job_is_requeued_then_failed(self):
+        res = self.client.post("/api/admin/exports/", {"format": "csv"}, format="json")
+        job = ExportJob.objects.get(pk=res.json()["id"])
+        long_ago = timezone.now() - timedelta(hours=2)
+
+        # Un worker lo tomó y murió a media exportación
+        ExportJob.objects.filter(pk=job.pk).update(status="running", started_at=long_ago, attempts=1)
+        call_command("run_export_jobs", "--once", stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.rows), ("done", 2, 6))
+
+        # Sin intentos restantes: fallido, no se reintenta para siempre
+        ExportJob.objects.filter(pk=job.pk).update(status="running", started_at=long_ago, attempts=3)
+        call_command("run_export_jobs", "--once", stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+
+    def test_invalid_request(self):
+        self.assertEqual(self.client.post("/api/admin/exports/", {"format": "xls"}, format="json").status_code, 400)
+        res = self.client.post("/api/admin/exports/", {"filters": {"status": "x"}}, format="json")
+        self.assertEqual(res.status_code, 400)
+
+
+# ==========================
+# PUNTOS DE RUTA EN BLOQUE (replace / diff)
+# ==========================
+class RoutePointWriteTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@test.local", password="x",
+            role="admin", is_staff=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _points(self, n):
+        return [
+            {"latitude": f"{14.8 + i / 1000:.6f}", "longitude": f"{-91.5 - i / 1000:.6f}", "order": i}
+            for i in range(n)
+        ]
+
+    def test_create_route_inserts_points_in_bulk(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.post(
+                "/api/admin/routes/",
+                {"name": "Nueva", "points": self._points(200)},
+                format="json",
+            )
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(len(res.data["points"]), 200)
+        inserts = [q for q in ctx.captured_queries if q["sql"].startswith("INSERT") and "core_routepoint" in q["sql"]]
+        self.assertEqual(len(inserts), 1)
+
+    def test_invalid_point_is_rejected_without_writing(self):
+        for bad in ("abc", "NaN", "sNaN", "Infinity", "-inf"):
+            points = self._points(3)
+            points[1]["latitude"] = bad
+            res = self.client.post("/api/admin/routes/", {"name": "Mala", "points": points}, format="json")
+            self.assertEqual(res.status_code, 400, bad)
+        self.assertFalse(Route.objects.filter(name="Mala").exists())
+
+    def test_diff_mode_only_touches_changed_points(self):
+        route = make_route(1, n_points=50)
+        before = dict(RoutePoint.objects.filter(route=route).values_list("order", "id"))
+
+        points = self._points(50)
+        points[10]["latitude"] = "15.000000"
+        points = points[:-1] + [{"latitude": "14.9", "longitude": "-91.6", "order": 99}]
+
+        res = self.client.patch(
+            f"/api/admin/routes/{route.id}/",
+            {"points": points, "points_mode": "diff"},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res.data["points_result"],
+            {"mode": "diff", "inserted": 1, "updated": 1, "deleted": 1},
+        )
+
+        after = dict(RoutePoint.objects.filter(route=route).values_list("order", "id"))
+        self.assertEqual(len(after), 50)
+        for order in range(49):
+            self.assertEqual(after[order], before[order])
+        self.assertEqual(len(res.data["points"]), 50)
+
+    def test_replace_mode_rewrites_all_points(self):
+        route = make_route(1, n_points=5)
+        res = self.client.put(
+            f"/api/admin/routes/{route.id}/",
+            {"name": route.name, "points": self._points(3)},
+            format="json",
+        )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data["points_result"]["mode"], "replace")
+        self.assertEqual(RoutePoint.objects.filter(route=route).count(), 3)
+        self.assertEqual(len(res.data["points"]), 3)
+
+
+# ==========================
+# GEOMETRÍA SIMPLIFICADA (encoded polyline)
+# ==========================
+class RouteGeometryTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@test.local", password="x",
+            role="admin", is_staff=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_polyline_encoding_matches_reference(self):
+        coords = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+        encoded = encode_polyline(coords)
+        self.assertEqual(encoded, "_p~iF~ps|U_ulLnnqC_mqNvxq`@")
+        self.assertEqual(decode_polyline(encoded), coords)
+
+    def test_simplify_drops_collinear_points(self):
+        line = [(14.8 + i / 1000, -91.5) for i in range(100)]
+        self.assertEqual(simplify(line, 0.0001), [line[0], line[-1]])
+
+    def test_encoded_geometry_replaces_points(self):
+        route = make_route(1, n_points=200)
+
+        res = self.client.get("/api/routes/?geometry=encoded&zoom=11")
+        self.assertEqual(res.status_code, 200)
+        item = res.json()[0]
+        self.assertNotIn("points", item)
+        self.assertEqual(item["geometry"]["zoom"], 12)
+        self.assertEqual(item["geometry"]["source_count"], 200)
+
+        coords = decode_polyline(item["geometry"]["polyline"])
+        self.assertEqual(len(coords), item["geometry"]["point_count"])
+        self.assertAlmostEqual(coords[0][0], 14.8, places=5)
+        self.assertTrue(RouteGeometry.objects.filter(route=route, zoom=12).exists())
+
+        # El formato normal no cambia
+        res = self.client.get("/api/routes/")
+        self.assertEqual(len(res.json()[0]["points"]), 200)
+
+    def test_geometry_is_rebuilt_when_points_change(self):
+        route = make_route(1, n_points=3)
+        self.client.get("/api/admin/routes/?geometry=encoded")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                f"/api/admin/routes/{route.id}/",
+                {"points": [{"latitude": 10, "longitude": -90}, {"latitude": 11, "longitude": -91}]},
+                format="json",
+            )
+
+        geometry = RouteGeometry.objects.get(route=route, zoom=18)
+        self.assertEqual(decode_polyline(geometry.encoded), [(10.0, -90.0), (11.0, -91.0)])
+
+    def test_invalid_params_return_400(self):
+        self.assertEqual(self.client.get("/api/routes/?geometry=svg").status_code, 400)
+        self.assertEqual(self.client.get("/api/routes/?geometry=encoded&zoom=x").status_code, 400)
+
+
+# ==========================
+# RUTAS CERCANAS (índice en cuadrícula)
+# ==========================
+class RoutesNearTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="vecino", email="vecino@test.local", password="x")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        # Ruta A: línea recta norte-sur en lng -91.5000; ruta B a ~1.1 km al este
+        self.near = Route.objects.create(name="Cerca")
+        self.far = Route.objects.create(name="Lejos")
+        for route, lng in ((self.near, -91.5), (self.far, -91.49)):
+            RoutePoint.objects.bulk_create([
+                RoutePoint(route=route, latitude=14.80 + i * 0.002, longitude=lng, order=i)
+                for i in range(6)
+            ])
+            call_command("rebuild_route_index", route=[route.id], stdout=io.StringIO())
+
+    def _near(self, **params):
+        query = "&".join(f"{k}={v}" for k, v in params.items())
+        return self.client.get(f"/api/citizen/routes/near/?{query}")
+
+    def test_returns_only_routes_within_radius(self):
+        # ~110 m al oeste de la ruta A, entre dos puntos (cae sobre un segmento, no un vértice)
+        res = self._near(lat=14.803, lng=-91.501, radius=200)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([r["route_id"] for r in res.data["routes"]], [self.near.id])
+        self.assertAlmostEqual(res.data["routes"][0]["distance_m"], 107.6, delta=2)
+
+        res = self._near(lat=14.803, lng=-91.501, radius=2000)
+        self.assertEqual([r["route_id"] for r in res.data["routes"]], [self.near.id, self.far.id])
+
+    def test_includes_next_date_and_schedule(self):
+        today = timezone.localdate()
+        RouteDate.objects.create(route=self.near, date=today - timedelta(days=1))
+        RouteDate.objects.create(route=self.near, date=today + timedelta(days=3))
+        day = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"][
+            (today.weekday() + 2) % 7
+        ]
+        RouteSchedule.objects.create(route=self.near, day_of_week=day, start_time=time(8, 0), end_time=time(10, 0))
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self._near(lat=14.803, lng=-91.5, radius=100)
+        # rutas marcadas + celdas + nombres + fechas + horarios
+        self.assertLessEqual(len(ctx.captured_queries), 5)
+
+        item = res.data["routes"][0]
+        self.assertEqual(item["next_date"], (today + timedelta(days=3)).isoformat())
+        self.assertEqual(item["next_schedule"]["date"], (today + timedelta(days=2)).isoformat())
+        self.assertEqual(item["next_schedule"]["day_of_week"], day)
+
+    def test_index_follows_point_edits(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.force_authenticate(
+                User.objects.create_user(username="adm", email="adm@test.local", password="x", is_staff=True)
+            )
+            res = self.client.patch(
+                f"/api/admin/routes/{self.near.id}/",
+                {"points": [{"latitude": 15.5, "longitude": -90.0}, {"latitude": 15.51, "longitude": -90.0}]},
+                format="json",
+            )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self._near(lat=14.803, lng=-91.5, radius=100).data["routes"], [])
+        self.assertEqual(len(self._near(lat=15.505, lng=-90.0, radius=100).data["routes"]), 1)
+
+    def test_single_point_saves_rebuild_once_on_next_search(self):
+        route = Route.objects.create(name="Punto a punto")
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(20):
+                RoutePoint.objects.create(route=route, latitude=15.5 + i * 0.001, longitude=-90.0, order=i)
+        route.refresh_from_db()
+        self.assertTrue(route.cells_dirty)
+
+        with mock.patch("core.spatial.rebuild_route_cells", wraps=rebuild_route_cells) as rebuild:
+            res = self._near(lat=15.505, lng=-90.0, radius=100)
+            self._near(lat=15.505, lng=-90.0, radius=100)
+        rebuild.assert_called_once_with(route.id)
+        self.assertEqual([r["route_id"] for r in res.data["routes"]], [route.id])
+
+    def test_invalid_params_return_400(self):
+        self.assertEqual(self._near(lat="x", lng=-91.5).status_code, 400)
+        self.assertEqual(self._near(lat=14.8, lng=-91.5, radius=999999).status_code, 400)
+
+
+# ==========================
+# ETA DEL CAMIÓN
+# ==========================
+class RouteEtaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Ruta recta hacia el norte: 11 puntos cada 0.001° (~110.5 m), ~1105 m en total
+        self.route = Route.objects.create(name="Norte")
+        RoutePoint.objects.bulk_create([
+            RoutePoint(route=self.route, latitude=14.8 + i * 0.001, longitude=-91.5, order=i * 10)
+            for i in range(11)
+        ])
+        call_command("rebuild_route_index", route=[self.route.id], stdout=io.StringIO())
+
+        self.vehicle = Vehicle.objects.create(name="Camión 1", route=self.route)
+        Vehicle.objects.filter(pk=self.vehicle.pk).update(last_update=timezone.now() - timedelta(hours=1))
+        self.driver = User.objects.create_user(
+            username="chofer", email="chofer@test.local", password="x", role="recolector",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.driver)
+
+    def _fix(self, lat, seconds_ago, **extra):
+        ts = (timezone.now() - timedelta(seconds=seconds_ago)).isoformat()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"/api/vehicles/{self.vehicle.id}/telemetry/",
+                {"fixes": [{"lat": lat, "lng": -91.5001, "timestamp": ts, **extra}]},
+                format="json",
+            )
+
+    def test_progress_and_speed_come_from_fixes(self):
+        self._fix(14.801, seconds_ago=20)
+        self._fix(14.802, seconds_ago=10)  # ~110 m en 10 s => ~11 m/s
+
+        res = self.client.get(f"/api/routes/{self.route.id}/eta/?point=100")
+        self.assertEqual(res.status_code, 200)
+        self.assertAlmostEqual(res.data["route_length_m"], 1105.4, delta=1)
+
+        eta = res.data["vehicles"][0]
+        self.assertAlmostEqual(eta["progress_m"], 221.1, delta=1)
+        self.assertAlmostEqual(eta["speed_mps"], 11.05, delta=0.2)
+        self.assertAlmostEqual(eta["remaining_m"], 884.3, delta=1)
+        # 884 m / 11 m/s ≈ 80 s desde el último fix (hace 10 s)
+        self.assertAlmostEqual(eta["eta_seconds"], 70, delta=3)
+        self.assertFalse(eta["passed"])
+        self.assertEqual(eta["status"], "on_route")
+
+    def test_target_by_location_and_passed_point(self):
+        self._fix(14.805, seconds_ago=5, speed=5)
+
+        res = self.client.get(f"/api/routes/{self.route.id}/eta/?lat=14.8025&lng=-91.5005")
+        self.assertAlmostEqual(res.data["target"]["along_m"], 276.4, delta=1)
+        self.assertAlmostEqual(res.data["target"]["offset_m"], 53.9, delta=1)
+        self.assertTrue(res.data["vehicles"][0]["passed"])
+        self.assertIsNone(res.data["vehicles"][0]["eta_seconds"])
+
+    def test_eta_lookup_does_not_read_points(self):
+        self._fix(14.801, seconds_ago=5)
+        self.client.get(f"/api/routes/{self.route.id}/eta/?point=50")
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(f"/api/routes/{self.route.id}/eta/?point=50")
+        self.assertEqual(res.status_code, 200)
+        self.assertFalse(any("core_routepoint" in q["sql"] for q in ctx.captured_queries))
+
+    def test_unknown_target_returns_404(self):
+        self.assertEqual(self.client.get(f"/api/routes/{self.route.id}/eta/?point=7").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/routes/{self.route.id}/eta/?lat=15.5&lng=-90").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/routes/{self.route.id}/eta/?lat=x").status_code, 400)
+
+    def test_non_finite_or_out_of_range_location_is_400(self):
+        for query in ("lat=14.8&lng=inf", "lat=nan&lng=-91.5", "lat=-inf&lng=-91.5", "lat=95&lng=-91.5"):
+            res = self.client.get(f"/api/routes/{self.route.id}/eta/?{query}")
+            self.assertEqual(res.status_code, 400, query)
+            res = self.client.get(f"/api/citizen/routes/near/?{query}")
+            self.assertEqual(res.status_code, 400, query)
+
+    def test_vehicle_off_route_has_no_eta(self):
+        self._fix(14.801, seconds_ago=20, speed=5)
+        self._fix(14.803, seconds_ago=10, speed=5)
+        # Desvío ~1 km al este: la proyección cae sobre la ruta, pero no es avance
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                f"/api/vehicles/{self.vehicle.id}/telemetry/",
+                {"fixes": [{"lat": 14.804, "lng": -91.49, "timestamp": timezone.now().isoformat(), "speed": 20}]},
+                format="json",
+            )
+
+        eta = self.client.get(f"/api/routes/{self.route.id}/eta/?point=100").data["vehicles"][0]
+        self.assertEqual(eta["status"], "off_route")
+        self.assertIsNone(eta["eta_seconds"])
+        self.assertIsNone(eta["eta"])
+        self.assertGreater(eta["offset_m"], 100)
+        # La velocidad del desvío no contamina el promedio
+        self.assertAlmostEqual(eta["speed_mps"], 5.0, delta=0.01)
+
+
+# ==========================
+# LOGIN (una query, email o username)
+# ==========================
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class LoginTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Maria", email="Maria@Test.local", password="secreta", role="ciudadano",
+        )
+        self.client = APIClient()
+
+    def _login(self, identifier, password="secreta"):
+        return self.client.post("/api/login/", {"identifier": identifier, "password": password}, format="json")
+
+    def test_email_or_username_in_one_query(self):
+        for identifier in ("maria@test.local", "MARIA"):
+            with self.subTest(identifier=identifier):
+                with CaptureQueriesContext(connection) as ctx:
+                    res = self._login(identifier)
+                self.assertEqual(res.status_code, 200)
+                self.assertEqual(len(ctx.captured_queries), 1)
+
+                token = RefreshToken(res.data["refresh"])
+                self.assertEqual(token["role"], "ciudadano")
+                self.assertEqual(token.access_token["username"], "Maria")
+
+    def test_email_match_wins_over_username(self):
+        User.objects.create_user(username="maria@test.local", email="otra@test.local", password="otra")
+        self.assertEqual(self._login("maria@test.local").data["user_id"], self.user.id)
+
+    def test_rejects_wrong_password_and_inactive_users(self):
+        self.assertEqual(self._login("maria", password="mala").status_code, 401)
+        self.assertEqual(self._login("nadie").status_code, 401)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self._login("maria").status_code, 401)
+
+    def test_hash_is_upgraded_to_configured_iterations(self):
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self._login("maria").status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$2000$"))
+
+
+# ==========================
+# AUTENTICACIÓN DESDE CLAIMS (sin query de usuario)
+# ==========================
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.driver = User.objects.create_user(
+            username="chofer", email="chofer@test.local", password="x", role="recolector",
+        )
+        self.vehicle = Vehicle.objects.create(name="Camión 1")
+        Vehicle.objects.filter(pk=self.vehicle.pk).update(last_update=timezone.now() - timedelta(hours=1))
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.driver)[1]}"
+        )
+
+    def _user_queries(self, method, url, **kwargs):
+        with CaptureQueriesContext(connection) as ctx:
+            res = getattr(self.client, method)(url, **kwargs)
+        return res, [q for q in ctx.captured_queries if 'FROM "core_user"' in q["sql"]]
+
+    def test_hot_endpoints_make_no_user_query_once_cached(self):
+        url = f"/api/vehicles/{self.vehicle.id}/telemetry/"
+        fixes = {"fixes": [{"lat": 14.8, "lng": -91.5}]}
+
+        res, queries = self._user_queries("post", url, data=fixes, format="json")
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(len(queries), 1)  # primer request: llena el cache
+
+        for method, target, kwargs in (
+            ("post", url, {"data": fixes, "format": "json"}),
+            ("get", "/api/my-notifications/", {}),
+            ("get", f"/api/vehicles/{self.vehicle.id}/position/", {}),
+        ):
+            with self.subTest(url=target):
+                res, queries = self._user_queries(method, target, **kwargs)
+                self.assertLess(res.status_code, 300)
+                self.assertEqual(queries, [])
+
+    def test_role_comes_from_cached_status(self):
+        self.driver.role = "ciudadano"
+        self.driver.save()
+        res = self.client.post(
+            f"/api/vehicles/{self.vehicle.id}/telemetry/", {"fixes": [{"lat": 1, "lng": 1}]}, format="json",
+        )
+        self.assertEqual(res.status_code, 403)
+
+    def test_deactivated_or_deleted_user_is_rejected(self):
+        url = "/api/my-notifications/"
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.driver.is_active = False
+        self.driver.save()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+        self.driver.delete()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+
+# ==========================
+# BUZÓN: NO LEÍDOS + SINCRONIZACIÓN INCREMENTAL
+# ==========================
+class InboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@test.local", password="x", role="admin", is_staff=True,
+        )
+        self.citizen = User.objects.create_user(username="vecino", email="vecino@test.local", password="x")
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(self.admin)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for_user(self.citizen)[1]}")
+
+    def _send(self, message, user_id=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_client.post(
+                "/api/admin/messages/", {"message": message, "user_id": user_id or self.citizen.id}, format="json",
+            )
+
+    def test_unread_counter_follows_create_read_delete(self):
+        self._send("uno")
+        self._send("dos")
+        self.assertEqual(self.client.get("/api/inbox/unread/").data["unread"], 2)
+
+        self._send("tres")
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get("/api/inbox/unread/").data["unread"], 3)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+        first = Notification.objects.get(message="uno")
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post("/api/inbox/mark-read/", {"ids": [first.id]}, format="json")
+        self.assertEqual(res.data["updated"], 1)
+        self.assertEqual(self.client.get("/api/inbox/unread/").data["unread"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f"/api/my-notifications/{Notification.objects.get(message='dos').id}/")
+        self.assertEqual(self.client.get("/api/inbox/unread/").data["unread"], 1)
+
+        # Mensaje masivo: invalida todos los contadores con un solo bump
+        self._send("para todos", user_id="all")
+        self.assertEqual(self.client.get("/api/inbox/unread/").data["unread"], 2)
+
+    def test_repeated_delete_decrements_unread_once(self):
+        self._send("uno")
+        self._send("dos")
+        self.assertEqual(self.client.get("/api/inbox/unread/").data["unread"], 2)
+
+        uno = Notification.objects.get(message="uno")
+        for _ in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(self.client.delete(f"/api/my-notifications/{uno.id}/").status_code, 200)
+        self.assertEqual(self.client.get("/api/inbox/unread/").data["unread"], 1)
+
+    def test_since_cursor_returns_only_changes(self):
+        self._send("uno")
+        self._send("dos")
+        snapshot = self.client.get("/api/inbox/").data
+        self.assertEqual([m["message"] for m in snapshot["results"]], ["dos", "uno"])
+        cursor = snapshot["next_cursor"]
+
+        # Sin cambios: una consulta por fuente (el índice no regresa filas) y el mismo cursor
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(f"/api/inbox/?since={cursor}")
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual((res.data["results"], res.data["deleted"]), ([], []))
+        self.assertEqual(res.data["next_cursor"], cursor)
+
+        self._send("tres")
+        uno = Notification.objects.get(message="uno")
+        self.client.delete(f"/api/my-notifications/{uno.id}/")
+
+        res = self.client.get(f"/api/inbox/?since={cursor}")
+        self.assertEqual([m["message"] for m in res.data["results"]], ["tres"])
+        self.assertEqual(res.data["deleted"], [uno.id])
+        self.assertEqual(self.client.get(f"/api/inbox/?since={res.data['next_cursor']}").data["results"], [])
+
+    def test_before_cursor_pages_through_older_messages(self):
+        for message in ("uno", "dos", "tres"):
+            self._send(message)
+        self._send("masivo", user_id="all")
+        self._send("cuatro")
+
+        page = self.client.get("/api/inbox/?limit=2").data
+        seen = [m["message"] for m in page["results"]]
+        self.assertTrue(page["has_more"])
+        while page["has_more"]:
+            page = self.client.get(f"/api/inbox/?limit=2&before={page['before']}").data
+            seen += [m["message"] for m in page["results"]]
+
+        self.assertEqual(seen, ["cuatro", "masivo", "tres", "dos", "uno"])
+        self.assertIsNone(page["before"])
+        self.assertEqual(self.client.get("/api/inbox/?before=nope").status_code, 400)
+
+    def test_mark_all_read_and_bad_cursor(self):
+        self._send("uno")
+        self._send("dos")
+        res = self.client.post("/api/inbox/mark-read/", {"all": True}, format="json")
+        self.assertEqual(res.data["updated"], 2)
+        self.assertEqual(self.client.get("/api/inbox/?since=nope").status_code, 400)
+        # Un cursor de una sola fuente (sin ";") también es inválido
+        single = urlsafe_base64_encode(f"{timezone.now().isoformat()}|1".encode())
+        self.assertEqual(self.client.get(f"/api/inbox/?since={single}").status_code, 400)
+
+    def test_broadcast_stores_message_once(self):
+        User.objects.create_user(username="otro", email="otro@test.local", password="x")
+        self._send("directo")
+        self._send("para todos", user_id="all")
+
+        broadcast = Broadcast.objects.get()
+        self.assertEqual(broadcast.recipient_count, 3)
+        self.assertEqual(BroadcastRecipient.objects.filter(broadcast=broadcast).count(), 3)
+        self.assertFalse(Notification.objects.filter(message="para todos").exists())
+
+        key = f"b{broadcast.id}"
+        inbox = self.client.get("/api/inbox/").data
+        self.assertEqual([m["id"] for m in inbox["results"]][0], key)
+        self.assertEqual(inbox["unread"], 2)
+        listed = self.client.get("/api/my-notifications/").data
+        self.assertEqual([m["message"] for m in listed], ["para todos", "directo"])
+
+        # El admin ve el masivo una sola vez
+        feed = self.admin_client.get("/api/admin/messages/").data
+        self.assertEqual([m["id"] for m in feed].count(key), 1)
+
+        cursor = inbox["next_cursor"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/inbox/mark-read/", {"ids": [key]}, format="json")
+        res = self.client.get(f"/api/inbox/?since={cursor}").data
+        self.assertEqual([(m["id"], m["estado"]) for m in res["results"]], [(key, "leida")])
+        self.assertEqual(res["unread"], 1)
+
+        self.client.delete(f"/api/my-notifications/{key}/")
+        res = self.client.get(f"/api/inbox/?since={res['next_cursor']}").data
+        self.assertEqual(res["deleted"], [key])
+
+    def test_admin_deletes_broadcast_for_everyone(self):
+        self._send("para todos", user_id="all")
+        broadcast = Broadcast.objects.get()
+        cursor = self.client.get("/api/inbox/").data["next_cursor"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin_client.delete(f"/api/admin/messages/b{broadcast.id}/")
+
+        res = self.client.get(f"/api/inbox/?since={cursor}").data
+        self.assertEqual(res["deleted"], [f"b{broadcast.id}"])
+        self.assertEqual(res["unread"], 0)
+        self.assertEqual(self.client.get("/api/my-notifications/").data, [])
+
+
+# ==========================
+# ÍNDICES PARCIALES DE NOTIFICACIONES (EXPLAIN)
+# ==========================
+class NotificationIndexTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="vecino", email="vecino@test.local", password="x")
+
+    def _plan(self, qs):
+        if connection.vendor == "postgresql":
+            # Con tablas de prueba casi vacías el planner prefiere un seq scan
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        return qs.explain()
+
+    def test_inbox_query_uses_partial_index(self):
+        plan = self._plan(inbox_queryset(self.user.id).select_related("sender")[:50])
+        self.assertIn("core_notif_inbox_visible_idx", plan)
+
+    def test_admin_feed_uses_partial_index(self):
+        plan = self._plan(admin_feed_queryset().select_related("usuario", "sender")[:50])
+        self.assertIn("core_notif_admin_feed_idx", plan)
+
+
+# ==========================
+# RETENCIÓN / ARCHIVO DE NOTIFICACIONES
+# ==========================
+class NotificationArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="vecino", email="vecino@test.local", password="x")
+        old = timezone.now() - timedelta(days=200)
+
+        def make(message, **kwargs):
+            n = Notification.objects.create(usuario=self.user, message=message, **kwargs)
+            Notification.objects.filter(id=n.id).update(created_at=old)
+            return n
+
+        self.deleted_old = make("borrada vieja", deleted_by_user=True, deleted_at=old)
+        self.deleted_recent = make("borrada reciente", deleted_globally=True, deleted_at=timezone.now())
+        self.read_old = [make(f"leida {i}", estado="leida") for i in range(3)]
+        self.unread_old = make("pendiente")
+
+    def test_moves_old_rows_in_batches(self):
+        stats = archive_notifications(batch_size=2)
+        self.assertEqual((stats["deleted"], stats["expired"], stats["read"], stats["batches"]), (1, 3, 0, 3))
+
+        # Las leídas antiguas quedan como lápida: fuera del buzón, todavía en la tabla
+        visible = set(Notification.objects.filter(visible_q()).values_list("message", flat=True))
+        self.assertEqual(visible, {"pendiente"})
+        self.assertFalse(Notification.objects.filter(deleted_by_user=True, expired=True).exists())
+        archived = dict(NotificationArchive.objects.values_list("original_id", "reason"))
+        self.assertEqual(archived, {self.deleted_old.id: "deleted"})
+
+        # Segunda corrida: nada que mover
+        self.assertEqual(archive_notifications()["batches"], 0)
+
+        # Pasado el plazo de las borradas, las lápidas se archivan
+        stats = archive_notifications(now=timezone.now() + timedelta(days=31))
+        self.assertEqual((stats["deleted"], stats["read"]), (1, 3))
+        remaining = set(Notification.objects.values_list("message", flat=True))
+        self.assertEqual(remaining, {"pendiente"})
+
+        # Se conserva el motivo: borradas por el usuario vs. leídas expiradas
+        archived = dict(NotificationArchive.objects.values_list("original_id", "reason"))
+        self.assertEqual(archived[self.deleted_old.id], "deleted")
+        self.assertEqual({archived[n.id] for n in self.read_old}, {"read"})
+
+    def test_expired_read_rows_reach_since_clients_as_deleted(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        cursor = self.client.get("/api/inbox/").data["next_cursor"]
+
+        archive_notifications()
+        res = self.client.get(f"/api/inbox/?since={cursor}").data
+        self.assertEqual(sorted(res["deleted"]), sorted(n.id for n in self.read_old))
+        self.assertEqual(res["results"], [])
+
+    def test_dry_run_and_max_batches(self):
+        stats = archive_notifications(dry_run=True)
+        self.assertEqual((stats["deleted"], stats["expired"]), (1, 3))
+        self.assertEqual(NotificationArchive.objects.count(), 0)
+
+        stats = archive_notifications(batch_size=1, max_batches=2)
+        self.assertEqual((stats["batches"], stats["deleted"], stats["expired"]), (2, 1, 1))
+        self.assertEqual(NotificationArchive.objects.count(), 1)
@@ -1,15 +1,22 @@
 import requests
 import logging
+import math
+import os
 
 from django.shortcuts import render, get_object_or_404
 from django.conf import settings
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse, FileResponse
+from django.db import transaction
+from django.db.models import Q
 
 # ✅ CAMBIO: usamos EmailMultiAlternatives para HTML y strip_tags para texto
 from django.core.mail import EmailMultiAlternatives
 from django.utils.html import strip_tags
 
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.utils.dateparse import parse_datetime
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import default_token_generator
 from django.template.loader import render_to_string
@@ -18,14 +25,13 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
 
 # ✅✅✅ FIX PDF: agregar renderer_classes
-from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.decorators import api_view, permission_classes, renderer_classes, authentication_classes
 
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
-from django.contrib.auth import update_session_auth_hash
+from django.contrib.auth import authenticate, update_session_auth_hash
 from google.auth.transport import requests as google_requests
 from google.oauth2 import id_token
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.utils import timezone
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
@@ -33,29 +39,102 @@ from django.core.files.base import ContentFile
 # 🚀 IMPORTS EXTRA PARA RENDER (PDF)
 from reportlab.pdfgen import canvas
 from io import BytesIO
+from .reports import REPORTS_PDF_TITLE, filter_reports, stream_reports_pdf
+from .exports import submit_export_job
+from .route_points import POINTS_MODES, parse_points, save_route_points
+from .geometry import parse_geometry_params
+from .spatial import nearby_routes_with_next_service
+from .inbox import (
+    INBOX_DEFAULT_LIMIT, INBOX_MAX_LIMIT, adjust_unread, admin_broadcasts_queryset,
+    admin_feed_queryset, broadcast_key, broadcast_sent, inbox_broadcasts_queryset,
+    inbox_changes, inbox_older, inbox_queryset, inbox_snapshot, mark_read, merge_newest, split_ids,
+    unread_count,
+)
+from .eta import estimate, get_progress, get_route_profile, target_from_location, target_from_order
 
 # ✅✅✅ FIX PDF: BaseRenderer para evitar 406 Accept header
 from rest_framework.renderers import BaseRenderer
 
 # ✅✅✅ FIX: para parsear HH:MM a time y evitar 500
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # MODELOS
 from .models import (
     Route, RoutePoint, Notification, Report, User,
     RouteDate, RouteSchedule, Vehicle,
-    Community, RouteCommunity
+    Community, RouteCommunity, ExportJob,
+    Broadcast, BroadcastRecipient,
+)
+
+# ✅ Fan-out de mensajes masivos
+from .broadcasts import fan_out_broadcast
+
+# ✅ Telemetría de vehículos + posición en vivo (SSE async, core/streams.py)
+from .telemetry import ingest_fixes, get_position
+from .streams import route_events, vehicle_events
+from .authentication import ClaimsJWTAuthentication, add_user_claims, tokens_for_user, user_from_raw_token
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import require_GET
+
+# ✅ Cache versionado (paquete del mapa ciudadano)
+from .cache import (
+    COMMUNITIES, MAP_BUNDLE, ROUTE_DATES, ROUTE_SCHEDULES, ROUTES,
+    cache_stats, cached_json, get_version, reset_cache_stats,
 )
+from .map_bundle import get_map_bundle, map_bundle_etag
+from .instrumentation import metrics_snapshot, reset_metrics
+from .conditional import aggregate_validator, conditional_get, version_validator
+from .renderers import FastJSONRenderer
 
 # SERIALIZERS
 from .serializers import (
     RouteSerializer, NotificationSerializer, ReportSerializer,
     UserSerializer, RouteDateSerializer, RouteScheduleSerializer,
-    VehicleSerializer, CommunitySerializer, RouteCommunitySerializer
+    VehicleSerializer, CommunitySerializer, RouteCommunitySerializer,
+    ExportJobSerializer
+)
+# ✅ Listados de solo lectura: dicts desde .values_list() (misma salida)
+from .fast_serializers import (
+    serialize_broadcast_recipients, serialize_notifications, serialize_route_dates,
+    serialize_route_schedules, serialize_routes,
 )
 
 logger = logging.getLogger(__name__)
 
+# ✅ GET condicional (core/conditional.py): 304 antes de serializar
+# Lo cacheado usa la versión del cache; lo demás, max(updated_at) + count().
+# Route.updated_at también cambia con sus puntos y sus comunidades asignadas.
+# Fechas, rutas y comunidades se borran físicamente (vistas de admin): sin
+# Last-Modified. El calendario sin from/to depende de hoy: la fecha va en el ETag.
+CALENDAR_VALIDATOR = aggregate_validator(
+    lambda request: (RouteDate.objects.all(), Route.objects.all(), Community.objects.all()),
+    last_modified=False,
+    salt=lambda request: timezone.localdate().isoformat(),
+)
+NOTIFICATIONS_VALIDATOR = aggregate_validator(
+    lambda request: (
+        Notification.objects.filter(usuario_id=request.user.id),
+        BroadcastRecipient.objects.filter(usuario_id=request.user.id),
+    ),
+    per_user=True,
+)
+VEHICLE_VALIDATOR = aggregate_validator(
+    lambda request, vehicle_id: (
+        (Vehicle.objects.filter(pk=vehicle_id), "last_update"),
+        Route.objects.filter(vehicles=vehicle_id),
+        Community.objects.filter(community_routes__route__vehicles=vehicle_id),
+    ),
+    last_modified=False,
+)
+
+# ✅ Paginación keyset del calendario ciudadano
+CALENDAR_DEFAULT_PAGE_SIZE = 100
+CALENDAR_MAX_PAGE_SIZE = 500
+# Ventana por defecto (días antes / después de hoy) si no llegan from/to
+CALENDAR_DEFAULT_PAST_DAYS = 7
+CALENDAR_DEFAULT_FUTURE_DAYS = 60
+
 # ====================================
 #   LOGIN Y REGISTRO
 # ====================================
@@ -63,11 +142,7 @@ logger = logging.getLogger(__name__)
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     @classmethod
     def get_token(cls, user):
-        token = super().get_token(user)
-        token["role"] = user.role
-        token["username"] = user.username
-        token["user_id"] = user.id
-        return token
+        return add_user_claims(super().get_token(user), user)
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -83,26 +158,12 @@ def login_view(request):
     if not identifier or not password:
         return Response({"error": "Todos los campos son obligatorios."}, status=400)
 
-    try:
-        user = User.objects.get(email__iexact=identifier)
-    except User.DoesNotExist:
-        try:
-            user = User.objects.get(username__iexact=identifier)
-        except User.DoesNotExist:
-            return Response({"error": "Credenciales inválidas."}, status=401)
-
-    if not user.check_password(password):
+    # ✅ Una sola query (LOWER(email) / LOWER(username) indexados), ver core/backends.py
+    user = authenticate(request, username=identifier, password=password)
+    if user is None:
         return Response({"error": "Credenciales inválidas."}, status=401)
 
-    refresh = RefreshToken.for_user(user)
-    refresh["role"] = user.role
-    refresh["username"] = user.username
-    refresh["user_id"] = user.id
-
-    access = refresh.access_token
-    access["role"] = user.role
-    access["username"] = user.username
-    access["user_id"] = user.id
+    refresh, access = tokens_for_user(user)
 
     return Response({
         "access": str(access),
@@ -274,15 +335,7 @@ def google_login(request):
             email=email, defaults={"username": username, "role": "ciudadano"}
         )
 
-        refresh = RefreshToken.for_user(user)
-        refresh["role"] = user.role
-        refresh["username"] = user.username
-        refresh["user_id"] = user.id
-
-        access = refresh.access_token
-        access["role"] = user.role
-        access["username"] = user.username
-        access["user_id"] = user.id
+        refresh, access = tokens_for_user(user)
 
         return JsonResponse({
             "access": str(access),
@@ -302,6 +355,7 @@ def google_login(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@conditional_get(VEHICLE_VALIDATOR)
 def vehicle_detail(request, vehicle_id):
     try:
         vehicle = Vehicle.objects.get(id=vehicle_id)
@@ -313,30 +367,144 @@ def vehicle_detail(request, vehicle_id):
 
 
 @api_view(["PUT"])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def vehicle_update(request, vehicle_id):
     if request.user.role != "recolector":
         return Response({"error": "Solo recolectores pueden actualizar."}, status=403)
 
-    try:
-        vehicle = Vehicle.objects.get(id=vehicle_id)
-    except Vehicle.DoesNotExist:
-        return Response({"error": "Vehículo no encontrado."}, status=404)
-
     latitude = request.data.get("latitude")
     longitude = request.data.get("longitude")
 
     if latitude is None or longitude is None:
         return Response({"error": "Latitud y longitud requeridas."}, status=400)
 
-    vehicle.latitude = latitude
-    vehicle.longitude = longitude
-    vehicle.last_update = timezone.now()
-    vehicle.save()
+    # ✅ Mismo camino que la telemetría: guarda historial + UPDATE solo de lo que cambió
+    try:
+        result = ingest_fixes(vehicle_id, [{"latitude": latitude, "longitude": longitude}])
+    except Vehicle.DoesNotExist:
+        return Response({"error": "Vehículo no encontrado."}, status=404)
+
+    if result["rejected"]:
+        return Response({"error": result["rejected"][0]["error"]}, status=400)
 
     return Response({"message": "Ubicación actualizada correctamente."})
 
 
+# ✅ Telemetría en lote: el recolector manda varios fixes en una sola petición
+# Body: {"fixes": [{"lat": .., "lng": .., "timestamp": .., "speed": .., "heading": .., "accuracy": ..}, ...]}
+@api_view(["POST"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def vehicle_telemetry_view(request, vehicle_id):
+    if request.user.role != "recolector":
+        return Response({"error": "Solo recolectores pueden enviar telemetría."}, status=403)
+
+    fixes = request.data.get("fixes") if isinstance(request.data, dict) else request.data
+    if not isinstance(fixes, list) or not fixes:
+        return Response({"error": "fixes debe ser una lista no vacía."}, status=400)
+
+    max_batch = getattr(settings, "TELEMETRY_MAX_BATCH", 500)
+    if len(fixes) > max_batch:
+        return Response({"error": f"Máximo {max_batch} fixes por petición."}, status=400)
+
+    try:
+        result = ingest_fixes(vehicle_id, fixes)
+    except Vehicle.DoesNotExist:
+        return Response({"error": "Vehículo no encontrado."}, status=404)
+
+    status_code = 201 if result["accepted"] else 400
+    return Response(
+        {
+            "accepted": result["accepted"],
+            "rejected": result["rejected"],
+            "vehicle_updated": result["vehicle_updated"],
+        },
+        status=status_code,
+    )
+
+
+# ✅ Posición "ligera": solo {lat, lng, last_update} desde cache caliente.
+# Con If-None-Match / If-Modified-Since responde 304 sin tocar la base.
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def vehicle_position_view(request, vehicle_id):
+    position = get_position(vehicle_id)
+    if position is None:
+        return Response({"error": "Vehículo no encontrado."}, status=404)
+
+    last_update = parse_datetime(position["last_update"]) if position["last_update"] else None
+    etag = f'"pos-{vehicle_id}-{position["last_update"]}"'
+    last_modified = int(last_update.timestamp()) if last_update else None
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        not_modified["ETag"] = etag
+        return not_modified
+
+    response = Response(position, status=200)
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+# ====================================
+#   🚚 POSICIÓN EN VIVO (SSE)
+# ====================================
+# Vistas async de Django (no DRF): bajo ASGI cada conexión abierta es una
+# corrutina en espera, no un hilo ni un worker ocupado.
+
+async def _stream_user(request):
+    # EventSource no permite mandar el header Authorization: el token va en ?token=
+    raw_token = request.GET.get("token")
+    header = request.headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        raw_token = header[len("Bearer "):]
+    if not raw_token:
+        return None
+    try:
+        return await sync_to_async(user_from_raw_token)(raw_token)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _sse_response(stream):
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # que el proxy no acumule el stream
+    return response
+
+
+@require_GET
+async def vehicle_stream_view(request, vehicle_id):
+    if await _stream_user(request) is None:
+        return JsonResponse({"detail": "Token inválido o ausente."}, status=401)
+
+    snapshot = await sync_to_async(get_position)(vehicle_id)
+    if snapshot is None:
+        return JsonResponse({"error": "Vehículo no encontrado."}, status=404)
+    return _sse_response(vehicle_events(vehicle_id, snapshot))
+
+
+@require_GET
+async def route_stream_view(request, route_id):
+    if await _stream_user(request) is None:
+        return JsonResponse({"detail": "Token inválido o ausente."}, status=401)
+    if not await Route.objects.filter(pk=route_id).aexists():
+        return JsonResponse({"error": "Ruta no encontrada."}, status=404)
+
+    vehicle_ids = [v async for v in Vehicle.objects.filter(route_id=route_id).values_list("id", flat=True)]
+    snapshots = []
+    for vehicle_id in vehicle_ids:
+        position = await sync_to_async(get_position)(vehicle_id)
+        if position is not None and position["last_update"]:
+            snapshots.append(position)
+    return _sse_response(route_events(route_id, snapshots))
+
+
 # ====================================
 #   ADMIN – USUARIOS Y REPORTES
 # ====================================
@@ -378,32 +546,36 @@ def admin_report_detail_view(request, pk):
 #   ADMIN – RUTAS
 # ====================================
 
+def _route_with_graph(pk):
+    # Releer con prefetch: la instancia original puede traer puntos viejos en cache
+    return _prefetch_route_communities(Route.objects.all(), prefix="").get(pk=pk)
+
+
 @api_view(["GET", "POST"])
 @permission_classes([IsAdminUser])
+@conditional_get(version_validator(ROUTES))
 def admin_routes_view(request):
 
     if request.method == "GET":
-        routes = Route.objects.prefetch_related("points").order_by("id")
-        serializer = RouteSerializer(routes, many=True)
-        return Response(serializer.data)
+        return _route_list_response(request, Route.objects.order_by("id"))
 
     if request.method == "POST":
         serializer = RouteSerializer(data=request.data)
 
         if serializer.is_valid():
-            route = serializer.save()
-
             points = request.data.get("points", [])
-            if isinstance(points, list):
-                for idx, p in enumerate(points):
-                    RoutePoint.objects.create(
-                        route=route,
-                        latitude=p.get("latitude"),
-                        longitude=p.get("longitude"),
-                        order=p.get("order", idx),
-                    )
+            try:
+                points = parse_points(points) if isinstance(points, list) else []
+            except ValueError as e:
+                return Response({"points": str(e)}, status=400)
 
-            return Response(RouteSerializer(route).data, status=201)
+            # ✅ Ruta + puntos en una sola transacción, puntos con bulk_create
+            with transaction.atomic():
+                route = serializer.save()
+                if points:
+                    save_route_points(route, points)
+
+            return Response(RouteSerializer(_route_with_graph(route.pk)).data, status=201)
 
         return Response(serializer.errors, status=400)
 
@@ -424,23 +596,29 @@ def admin_route_detail_view(request, pk):
         if not serializer.is_valid():
             return Response(serializer.errors, status=400)
 
-        route = serializer.save()
-
         points = request.data.get("points", None)
         if points is not None:
-            if not isinstance(points, list):
-                return Response({"points": "Debe ser una lista."}, status=400)
-
-            RoutePoint.objects.filter(route=route).delete()
-            for idx, p in enumerate(points):
-                RoutePoint.objects.create(
-                    route=route,
-                    latitude=p.get("latitude"),
-                    longitude=p.get("longitude"),
-                    order=p.get("order", idx),
-                )
+            try:
+                points = parse_points(points)
+            except ValueError as e:
+                return Response({"points": str(e)}, status=400)
+
+        # "replace" (default): borra e inserta todo en bloque
+        # "diff": solo INSERT/UPDATE/DELETE de los puntos que cambiaron (por order)
+        points_mode = request.data.get("points_mode") or request.query_params.get("points_mode") or "replace"
+        if points_mode not in POINTS_MODES:
+            return Response({"points_mode": "Debe ser replace o diff."}, status=400)
+
+        points_result = None
+        with transaction.atomic():
+            route = serializer.save()
+            if points is not None:
+                points_result = save_route_points(route, points, mode=points_mode)
 
-        return Response(RouteSerializer(route).data, status=200)
+        data = RouteSerializer(_route_with_graph(route.pk)).data
+        if points_result is not None:
+            data["points_result"] = points_result
+        return Response(data, status=200)
 
     if request.method == "DELETE":
         route.delete()
@@ -453,12 +631,14 @@ def admin_route_detail_view(request, pk):
 
 @api_view(["GET", "POST"])
 @permission_classes([IsAdminUser])
+@conditional_get(version_validator(ROUTE_DATES))
 def admin_route_dates_view(request):
 
     if request.method == "GET":
-        fechas = RouteDate.objects.select_related("route").order_by("date")
-        serializer = RouteDateSerializer(fechas, many=True)
-        return Response(serializer.data, status=200)
+        def build():
+            return serialize_route_dates(RouteDate.objects.order_by("date"))
+
+        return _cached_json_response(ROUTE_DATES, build, "admin")
 
     if request.method == "POST":
         route_id = request.data.get("route_id")
@@ -501,12 +681,14 @@ def admin_route_date_delete_view(request, pk):
 
 @api_view(["GET", "POST"])
 @permission_classes([IsAdminUser])
+@conditional_get(version_validator(ROUTE_SCHEDULES))
 def admin_route_schedules_view(request):
 
     if request.method == "GET":
-        horarios = RouteSchedule.objects.select_related("route").order_by("id")
-        serializer = RouteScheduleSerializer(horarios, many=True)
-        return Response(serializer.data, status=200)
+        def build():
+            return serialize_route_schedules(RouteSchedule.objects.order_by("id"))
+
+        return _cached_json_response(ROUTE_SCHEDULES, build, "admin")
 
     payload = request.data.copy()
 
@@ -682,11 +864,13 @@ def admin_route_schedule_delete_view(request, pk):
 
 @api_view(["GET", "POST"])
 @permission_classes([IsAdminUser])
+@conditional_get(version_validator(COMMUNITIES))
 def communities_view(request):
     if request.method == "GET":
-        communities = Community.objects.all().order_by("name")
-        serializer = CommunitySerializer(communities, many=True)
-        return Response(serializer.data, status=200)
+        return _cached_json_response(
+            COMMUNITIES,
+            lambda: CommunitySerializer(Community.objects.all().order_by("name"), many=True).data,
+        )
 
     name = request.data.get("name")
     if not name or not str(name).strip():
@@ -771,44 +955,181 @@ def route_community_delete_view(request, pk):
 #   CIUDADANO – CALENDARIO (RouteDate)
 # ====================================
 
-def _prefetch_route_communities(qs):
+def _prefetch_route_communities(qs, prefix="route__"):
+    """
+    Prefetch de todo lo que RouteSerializer necesita (puntos + comunidades).
+    - prefix="route__" para querysets de RouteDate / RouteSchedule / Vehicle
+    - prefix="" para querysets de Route
+    Así el número de queries es constante sin importar cuántas filas haya.
+    """
+    return qs.prefetch_related(
+        f"{prefix}points",
+        f"{prefix}route_communities__community",
+    )
+
+
+def _cached_json_response(resource, build, variant=""):
+    """
+    Respuesta JSON desde el cache de lectura (core/cache.py); build() solo
+    corre en un miss. Se invalida por versión desde core/signals.py.
+    """
+    return HttpResponse(cached_json(resource, build, variant), content_type="application/json")
+
+
+def _route_list_response(request, routes):
+    """
+    Listado de rutas (cacheado) con `points` completos (default) o, con
+    ?geometry=encoded&zoom=N, con la polilínea simplificada precalculada.
+    ⚠️ `routes` debe ser siempre el listado completo: la llave del cache solo
+    distingue el formato, no el queryset.
+    """
+    try:
+        geometry = parse_geometry_params(request.query_params)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    if geometry is None:
+        return _cached_json_response(ROUTES, lambda: serialize_routes(routes), "points")
+
+    def build_encoded():
+        return serialize_routes(routes, geometry=geometry)
+
+    return _cached_json_response(ROUTES, build_encoded, f"encoded:{geometry['zoom']}")
+
+
+def _encode_calendar_cursor(route_date):
+    # route_date = fila ya serializada ("date" en ISO)
+    raw = f"{route_date['date']}|{route_date['id']}"
+    return urlsafe_base64_encode(force_bytes(raw))
+
+
+def _decode_calendar_cursor(cursor):
+    """
+    Cursor opaco = base64("YYYY-MM-DD|id"). Lanza ValueError si no es válido.
+    """
     try:
-        return qs.prefetch_related("route__route_communities__community")
+        raw = urlsafe_base64_decode(cursor).decode()
+        date_str, id_str = raw.split("|", 1)
+        return datetime.strptime(date_str, "%Y-%m-%d").date(), int(id_str)
     except Exception:
-        return qs.prefetch_related("route__community_routes__community")
+        raise ValueError("cursor inválido")
+
+
+def _citizen_route_dates_response(request):
+    """
+    Lista de RouteDate para el ciudadano, con filtros opcionales:
+    - from / to (YYYY-MM-DD, inclusive)
+    - route (id de ruta) / community (id de comunidad)
+    - limit + cursor: paginación keyset sobre (date, id)
+
+    El cuerpo sigue siendo una lista (compatibilidad con el frontend);
+    el siguiente cursor va en el header X-Next-Cursor (y en Link).
+    Sin from/to la ventana es hoy-7 .. hoy+60 días; con solo uno de los dos,
+    el otro extremo queda a la misma distancia (67 días). Nunca se manda todo
+    el historial de una vez.
+    """
+    params = request.query_params
+
+    try:
+        date_from = params.get("from")
+        date_from = datetime.strptime(date_from, "%Y-%m-%d").date() if date_from else None
+
+        date_to = params.get("to")
+        date_to = datetime.strptime(date_to, "%Y-%m-%d").date() if date_to else None
+    except ValueError:
+        return Response({"error": "from/to deben tener formato YYYY-MM-DD."}, status=400)
+
+    span = timedelta(days=CALENDAR_DEFAULT_PAST_DAYS + CALENDAR_DEFAULT_FUTURE_DAYS)
+    if date_from is None and date_to is None:
+        today = timezone.localdate()
+        date_from = today - timedelta(days=CALENDAR_DEFAULT_PAST_DAYS)
+        date_to = today + timedelta(days=CALENDAR_DEFAULT_FUTURE_DAYS)
+    elif date_from is None:
+        date_from = date_to - span
+    elif date_to is None:
+        date_to = date_from + span
+
+    fechas = RouteDate.objects.filter(date__gte=date_from, date__lte=date_to).order_by("date", "id")
+
+    try:
+        route_id = params.get("route")
+        if route_id:
+            fechas = fechas.filter(route_id=int(route_id))
+
+        community_id = params.get("community")
+        if community_id:
+            fechas = fechas.filter(route__route_communities__community_id=int(community_id))
+    except ValueError:
+        return Response({"error": "route/community deben ser numéricos."}, status=400)
+
+    cursor = params.get("cursor")
+    if cursor:
+        try:
+            cursor_date, cursor_id = _decode_calendar_cursor(cursor)
+        except ValueError:
+            return Response({"error": "cursor inválido."}, status=400)
+        fechas = fechas.filter(
+            Q(date__gt=cursor_date) | Q(date=cursor_date, id__gt=cursor_id)
+        )
+
+    limit = params.get("limit")
+    if limit is None and cursor:
+        limit = CALENDAR_DEFAULT_PAGE_SIZE
+
+    next_cursor = None
+    if limit is not None:
+        try:
+            limit = max(1, min(int(limit), CALENDAR_MAX_PAGE_SIZE))
+        except ValueError:
+            return Response({"error": "limit debe ser numérico."}, status=400)
+
+        # Pedimos 1 de más para saber si hay otra página
+        data = serialize_route_dates(fechas[:limit + 1])
+        if len(data) > limit:
+            data = data[:limit]
+            next_cursor = _encode_calendar_cursor(data[-1])
+    else:
+        data = serialize_route_dates(fechas)
+
+    response = Response(data, status=200)
+
+    if next_cursor:
+        query = request.GET.copy()
+        query["cursor"] = next_cursor
+        query["limit"] = limit
+        response["X-Next-Cursor"] = next_cursor
+        response["Link"] = f'<{request.build_absolute_uri(request.path)}?{query.urlencode()}>; rel="next"'
+
+    return response
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@conditional_get(CALENDAR_VALIDATOR)
 def my_routes_view(request):
-    fechas = RouteDate.objects.select_related("route").order_by("date")
-    fechas = _prefetch_route_communities(fechas)
-    serializer = RouteDateSerializer(fechas, many=True)
-    return Response(serializer.data, status=200)
+    return _citizen_route_dates_response(request)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@conditional_get(CALENDAR_VALIDATOR)
 def citizen_calendar_view(request):
-    fechas = RouteDate.objects.select_related("route").order_by("date")
-    fechas = _prefetch_route_communities(fechas)
-    serializer = RouteDateSerializer(fechas, many=True)
-    return Response(serializer.data, status=200)
+    return _citizen_route_dates_response(request)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@conditional_get(version_validator(ROUTE_SCHEDULES))
 def citizen_route_schedules_view(request):
-    try:
-        horarios = (
+    def build():
+        return serialize_route_schedules(
             RouteSchedule.objects
-            .select_related("route")
             .filter(route__isnull=False)
             .order_by("route_id", "start_time")
         )
 
-        serializer = RouteScheduleSerializer(horarios, many=True)
-        return Response(serializer.data, status=200)
+    try:
+        return _cached_json_response(ROUTE_SCHEDULES, build, "citizen")
 
     except Exception as e:
         print("ERROR citizen_route_schedules_view:", repr(e))
@@ -817,10 +1138,107 @@ def citizen_route_schedules_view(request):
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@conditional_get(version_validator(ROUTES))
 def citizen_routes_with_points_view(request):
-    routes = Route.objects.prefetch_related("points").order_by("id")
-    serializer = RouteSerializer(routes, many=True)
-    return Response(serializer.data, status=200)
+    return _route_list_response(request, Route.objects.order_by("id"))
+
+
+# ✅ lat/lng de la query: float("inf") y float("nan") sí parsean, y math.floor(inf)
+# en cell_filter revienta con OverflowError; se rechazan aquí con 400.
+def _parse_lat_lng(params):
+    lat = float(params.get("lat", ""))
+    lng = float(params.get("lng", ""))
+    if not (math.isfinite(lat) and math.isfinite(lng)):
+        raise ValueError("lat/lng no finitos.")
+    return lat, lng
+
+
+def _lat_lng_in_range(lat, lng):
+    return -90 <= lat <= 90 and -180 <= lng <= 180
+
+
+# ✅ "¿Qué rutas pasan cerca de mí?" con índice espacial en cuadrícula
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def citizen_routes_near_view(request):
+    try:
+        lat, lng = _parse_lat_lng(request.query_params)
+    except ValueError:
+        return Response({"error": "lat y lng son obligatorios y numéricos."}, status=400)
+    if not _lat_lng_in_range(lat, lng):
+        return Response({"error": "lat/lng fuera de rango."}, status=400)
+
+    max_radius = getattr(settings, "SPATIAL_MAX_RADIUS_M", 5000)
+    try:
+        radius = float(request.query_params.get("radius", 300))
+        limit = int(request.query_params.get("limit", 10))
+    except ValueError:
+        return Response({"error": "radius y limit deben ser numéricos."}, status=400)
+    if not 0 < radius <= max_radius:
+        return Response({"error": f"radius debe estar entre 1 y {max_radius} metros."}, status=400)
+    limit = max(1, min(limit, 50))
+
+    routes = nearby_routes_with_next_service(lat, lng, radius, limit=limit)
+    return Response({"lat": lat, "lng": lng, "radius": radius, "routes": routes}, status=200)
+
+
+# ✅ ETA de los camiones de una ruta a un punto (?lat=&lng= o ?point=<order>)
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def route_eta_view(request, route_id):
+    if not Route.objects.filter(pk=route_id).exists():
+        return Response({"error": "Ruta no encontrada."}, status=404)
+
+    profile = get_route_profile(route_id)
+    params = request.query_params
+    try:
+        if params.get("point") not in (None, ""):
+            target = target_from_order(profile, int(params["point"]))
+        else:
+            lat, lng = _parse_lat_lng(params)
+            if not _lat_lng_in_range(lat, lng):
+                return Response({"error": "lat/lng fuera de rango."}, status=400)
+            target = target_from_location(profile, lat, lng)
+    except ValueError:
+        return Response({"error": "Envía point (order) o lat y lng numéricos."}, status=400)
+    if target is None:
+        return Response({"error": "El punto no está sobre la ruta."}, status=404)
+
+    vehicles = []
+    for vehicle_id in Vehicle.objects.filter(route_id=route_id).values_list("id", flat=True):
+        state = get_progress(vehicle_id, route_id, get_position(vehicle_id))
+        if state is not None:
+            vehicles.append(estimate(state, target))
+
+    return Response(
+        {
+            "route_id": route_id,
+            "route_length_m": round(profile["length_m"], 1),
+            "target": {k: round(v, 1) for k, v in target.items()},
+            "vehicles": vehicles,
+        },
+        status=200,
+    )
+
+
+# ✅ Paquete único para MapView (rutas + puntos + comunidades + fechas + horarios)
+# Se arma una sola vez por versión y se sirve desde cache con ETag/304.
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def citizen_map_bundle_view(request):
+    etag = map_bundle_etag(get_version(MAP_BUNDLE))
+
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified["ETag"] = etag
+        return not_modified
+
+    version, body = get_map_bundle()
+
+    response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = map_bundle_etag(version)
+    response["Cache-Control"] = "private, no-cache"
+    return response
 
 
 # ====================================
@@ -856,6 +1274,7 @@ def my_reports_view(request):
 
 
 @api_view(["DELETE"])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def my_report_delete_view(request, pk):
     try:
@@ -934,57 +1353,129 @@ def upload_profile_picture(request):
 # ====================================
 
 @api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])
+@conditional_get(NOTIFICATIONS_VALIDATOR)
 def my_notifications_view(request):
     user = request.user
 
-    mensajes = (
-        Notification.objects
-        .filter(
-            usuario=user,
-            deleted_globally=False,
-            deleted_by_user=False
-        )
-        .select_related("sender")
-        .order_by("-created_at")
-    )
+    # ✅ Mismo filtro que el índice parcial core_notif_inbox_visible_idx
+    directos = serialize_notifications(inbox_queryset(user.id))
+    # ✅ Mensajes masivos: texto en Broadcast, estado en BroadcastRecipient
+    difundidos = serialize_broadcast_recipients(inbox_broadcasts_queryset(user.id))
 
-    data = [
-        {
-            "id": m.id,
-            "message": m.message,
-            "estado": m.estado,
-            "created_at": m.created_at,
-            "sender": {
-                "id": m.sender.id,
-                "username": m.sender.username,
-                "email": m.sender.email
-            } if m.sender else None
-        }
-        for m in mensajes
-    ]
-
-    return Response(data, status=200)
+    return Response(merge_newest(directos, difundidos), status=200)
 
 
 @api_view(["DELETE"])
+@authentication_classes([ClaimsJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def my_notification_delete_view(request, pk):
     user = request.user
 
-    n = get_object_or_404(Notification, pk=pk, usuario=user)
+    n = get_object_or_404(Notification, pk=pk, usuario_id=user.id)
 
     if getattr(n, "deleted_globally", False):
         return Response({"message": "El mensaje ya fue eliminado por administración."}, status=200)
 
+    was_visible = not (n.deleted_by_user or n.expired)
     n.deleted_by_user = True
     if not n.deleted_at:
         n.deleted_at = timezone.now()
-    n.save(update_fields=["deleted_by_user", "deleted_at"])
+    n.save(update_fields=["deleted_by_user", "deleted_at", "updated_at"])
+    if was_visible and n.estado != "leida":
+        adjust_unread(n.usuario_id, -1)
+
+    return Response({"message": "Mensaje eliminado correctamente."}, status=200)
+
+
+@api_view(["DELETE"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def my_broadcast_delete_view(request, pk):
+    user = request.user
+
+    r = get_object_or_404(
+        BroadcastRecipient.objects.select_related("broadcast"), broadcast_id=pk, usuario_id=user.id,
+    )
+
+    if r.broadcast.deleted_globally:
+        return Response({"message": "El mensaje ya fue eliminado por administración."}, status=200)
+
+    was_visible = not r.deleted_by_user
+    r.deleted_by_user = True
+    if not r.deleted_at:
+        r.deleted_at = timezone.now()
+    r.save(update_fields=["deleted_by_user", "deleted_at", "updated_at"])
+    if was_visible and not r.read:
+        adjust_unread(user.id, -1)
 
     return Response({"message": "Mensaje eliminado correctamente."}, status=200)
 
 
+# ====================================
+#   📬 BUZÓN (contador + sincronización incremental)
+# ====================================
+
+# GET /api/inbox/               => últimas `limit` visibles + next_cursor
+# GET /api/inbox/?since=cursor  => solo lo nuevo/cambiado desde el cursor
+# GET /api/inbox/?before=cursor => la página anterior (más viejas) + before
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def inbox_view(request):
+    try:
+        limit = int(request.query_params.get("limit", INBOX_DEFAULT_LIMIT))
+    except ValueError:
+        return Response({"error": "limit debe ser un entero."}, status=400)
+    limit = max(1, min(limit, INBOX_MAX_LIMIT))
+
+    since = request.query_params.get("since")
+    before = request.query_params.get("before")
+    if since and before:
+        return Response({"error": "Envía since o before, no ambos."}, status=400)
+    if before:
+        try:
+            return Response(inbox_older(request.user.id, before, limit=limit), status=200)
+        except ValueError:
+            return Response({"error": "cursor inválido."}, status=400)
+    if not since:
+        return Response(inbox_snapshot(request.user.id, limit=limit), status=200)
+
+    try:
+        return Response(inbox_changes(request.user.id, since, limit=limit), status=200)
+    except ValueError:
+        return Response({"error": "cursor inválido."}, status=400)
+
+
+@api_view(["GET"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def inbox_unread_view(request):
+    return Response({"unread": unread_count(request.user.id)}, status=200)
+
+
+# Body: {"ids": [1, 2, "b3"]} o {"all": true}  ("b3" = mensaje masivo 3)
+@api_view(["POST"])
+@authentication_classes([ClaimsJWTAuthentication])
+@permission_classes([IsAuthenticated])
+def inbox_mark_read_view(request):
+    ids = request.data.get("ids")
+    broadcast_ids = None
+    if request.data.get("all") in (True, "true", "1", 1):
+        ids = None
+    elif not isinstance(ids, list) or not ids:
+        return Response({"error": "Envía ids (lista) o all=true."}, status=400)
+    else:
+        try:
+            ids, broadcast_ids = split_ids(ids)
+        except (TypeError, ValueError):
+            return Response({"error": "ids inválidos."}, status=400)
+
+    updated = mark_read(request.user.id, ids, broadcast_ids)
+    return Response({"updated": updated, "unread": unread_count(request.user.id)}, status=200)
+
+
 # ====================================
 #   🚀 FUNCIÓN EXTRA 1 — LISTA DE REPORTES
 # ====================================
@@ -993,6 +1484,10 @@ def my_notification_delete_view(request, pk):
 @permission_classes([IsAdminUser])
 def generate_reports_view(request):
     reports = Report.objects.select_related("user").order_by("-fecha")
+    try:
+        reports = filter_reports(reports, request.query_params)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
     serializer = ReportSerializer(reports, many=True)
     return Response({
         "message": "Reporte general generado correctamente.",
@@ -1020,12 +1515,21 @@ class PDFRenderer(BaseRenderer):
 @renderer_classes([PDFRenderer])
 def generate_reports_pdf_view(request):
     reports = Report.objects.select_related("user").order_by("-fecha")
+    try:
+        reports = filter_reports(reports, request.query_params)
+    except ValueError as e:
+        return HttpResponse(str(e), status=400, content_type="text/plain; charset=utf-8")
+
+    # ✅ Por defecto: PDF en streaming (memoria constante, la descarga empieza de inmediato)
+    # ?stream=0 conserva el armado clásico con reportlab en memoria.
+    if request.query_params.get("stream", "1") not in ("0", "false", "no"):
+        return _stream_reports_pdf(reports)
 
     buffer = BytesIO()
     p = canvas.Canvas(buffer)
 
     p.setFont("Helvetica-Bold", 14)
-    p.drawString(50, 800, "Reporte General – Smart Collector")
+    p.drawString(50, 800, REPORTS_PDF_TITLE)
     p.setFont("Helvetica", 10)
 
     y = 770
@@ -1047,6 +1551,79 @@ def generate_reports_pdf_view(request):
     return response
 
 
+def _stream_reports_pdf(reports):
+    response = StreamingHttpResponse(stream_reports_pdf(reports), content_type="application/pdf")
+    response["Content-Disposition"] = 'attachment; filename="reporte_smart_collector.pdf"'
+    return response
+
+
+# ====================================
+#   🚀 EXPORTACIONES EN SEGUNDO PLANO (CSV / PDF)
+# ====================================
+
+class CSVRenderer(BaseRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, media_type=None, renderer_context=None):
+        return data
+
+
+@api_view(["GET", "POST"])
+@permission_classes([IsAdminUser])
+def admin_exports_view(request):
+    if request.method == "GET":
+        jobs = ExportJob.objects.order_by("-created_at")[:20]
+        return Response(ExportJobSerializer(jobs, many=True).data, status=200)
+
+    formato = str(request.data.get("format") or request.data.get("formato") or "csv").lower()
+    if formato not in dict(ExportJob.FORMATOS):
+        return Response({"error": "format debe ser csv o pdf."}, status=400)
+
+    filters = request.data.get("filters") or {}
+    if not isinstance(filters, dict):
+        return Response({"error": "filters debe ser un objeto."}, status=400)
+    filters = {k: filters[k] for k in ("from", "to", "status", "tipo") if filters.get(k)}
+
+    # Validar filtros ahora (y no cuando ya corre el job)
+    try:
+        filter_reports(Report.objects.none(), filters)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    job = ExportJob.objects.create(formato=formato, filters=filters, requested_by=request.user)
+    submit_export_job(job)
+
+    return Response(ExportJobSerializer(job).data, status=202)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def admin_export_detail_view(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk)
+    return Response(ExportJobSerializer(job).data, status=200)
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+@renderer_classes([FastJSONRenderer, PDFRenderer, CSVRenderer])
+def admin_export_download_view(request, pk):
+    job = get_object_or_404(ExportJob, pk=pk)
+
+    if job.status != "done" or not job.file:
+        return HttpResponse("La exportación aún no está lista.", status=409, content_type="text/plain; charset=utf-8")
+
+    content_type = "application/pdf" if job.formato == "pdf" else "text/csv"
+    return FileResponse(
+        job.file.open("rb"),
+        as_attachment=True,
+        filename=f"reporte_smart_collector.{job.formato}",
+        content_type=content_type,
+    )
+
+
 # ====================================
 #   🚀 FUNCIÓN EXTRA 3 — ENVIAR MENSAJE (ADMIN)
 # ====================================
@@ -1060,12 +1637,10 @@ def send_message_view(request):
         except ValueError:
             limit = 50
 
-        mensajes = (
-            Notification.objects
-            .select_related("usuario", "sender")
-            .filter(deleted_globally=False)
-            .order_by("-created_at")[:limit]
-        )
+        # ✅ Índice parcial core_notif_admin_feed_idx (solo filas no borradas)
+        mensajes = admin_feed_queryset().select_related("usuario", "sender")[:limit]
+        # ✅ Un mensaje masivo aparece una sola vez (no una fila por destinatario)
+        masivos = admin_broadcasts_queryset().select_related("sender")[:limit]
 
         data = []
         for m in mensajes:
@@ -1092,7 +1667,26 @@ def send_message_view(request):
                 } if m.sender else None,
             })
 
-        return Response(data, status=200)
+        difundidos = [
+            {
+                "id": broadcast_key(b.id),
+                "user_id": None,
+                "username": None,
+                "usuario": None,
+                "message": b.message,
+                "estado": "enviada",
+                "created_at": b.created_at,
+                "recipients": b.recipient_count,
+                "sender": {
+                    "id": b.sender.id,
+                    "username": b.sender.username,
+                    "email": b.sender.email
+                } if b.sender else None,
+            }
+            for b in masivos
+        ]
+
+        return Response(merge_newest(data, difundidos, limit=limit), status=200)
 
     user_id = request.data.get("user_id")
     message = request.data.get("message")
@@ -1107,20 +1701,18 @@ def send_message_view(request):
     sender_user = request.user
 
     if user_id in [None, "", "all", "ALL", "todos", "TODOS"]:
-        users = User.objects.filter(is_active=True)
-
-        sent = 0
-        for u in users:
-            Notification.objects.create(
-                usuario=u,
-                sender=sender_user,
-                message=message,
-                estado="pendiente"
-            )
-            sent += 1
+        # ✅ Texto una sola vez + filas angostas por destinatario (por bloques)
+        result = fan_out_broadcast(sender_user, message)
+        broadcast_sent()
 
         return Response(
-            {"message": "Mensaje enviado a todos correctamente.", "sent_to": sent},
+            {
+                "message": "Mensaje enviado a todos correctamente.",
+                "id": broadcast_key(result["broadcast_id"]),
+                "sent_to": result["sent"],
+                "chunks": result["chunks"],
+                "total_ms": result["total_ms"],
+            },
             status=201
         )
 
@@ -1135,6 +1727,7 @@ def send_message_view(request):
         message=message,
         estado="pendiente"
     )
+    adjust_unread(user.id, 1)
 
     return Response({"message": "Mensaje enviado correctamente."}, status=201)
 
@@ -1144,14 +1737,73 @@ def send_message_view(request):
 def admin_message_delete_view(request, pk):
     n = get_object_or_404(Notification, pk=pk)
 
+    was_visible = not (n.deleted_globally or n.deleted_by_user or n.expired)
     n.deleted_globally = True
     if not n.deleted_at:
         n.deleted_at = timezone.now()
-    n.save(update_fields=["deleted_globally", "deleted_at"])
+    n.save(update_fields=["deleted_globally", "deleted_at", "updated_at"])
+    if was_visible and n.estado != "leida":
+        adjust_unread(n.usuario_id, -1)
 
     return Response({"message": "Mensaje eliminado globalmente."}, status=200)
 
 
+@api_view(["DELETE"])
+@permission_classes([IsAdminUser])
+def admin_broadcast_delete_view(request, pk):
+    b = get_object_or_404(Broadcast, pk=pk)
+
+    if not b.deleted_globally:
+        now = timezone.now()
+        with transaction.atomic():
+            b.deleted_globally = True
+            b.deleted_at = now
+            b.save(update_fields=["deleted_globally", "deleted_at"])
+            # Un solo UPDATE sobre filas angostas: los clientes con ?since= ven la baja
+            BroadcastRecipient.objects.filter(broadcast=b).update(updated_at=now)
+            broadcast_sent()
+
+    return Response({"message": "Mensaje eliminado globalmente."}, status=200)
+
+
+# ======================================================
+# ✅ ESTADÍSTICAS DEL CACHE DE LECTURA (monitoreo)
+# ======================================================
+# GET    => hits / misses / hit_ratio por recurso (todos los workers, vía cache)
+# DELETE => reinicia los contadores
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminUser])
+def cache_stats_view(request):
+    if request.method == "DELETE":
+        reset_cache_stats()
+        return Response({"message": "Contadores reiniciados."}, status=200)
+
+    return Response({
+        "backend": settings.CACHES["default"]["BACKEND"],
+        "pid": os.getpid(),
+        "resources": cache_stats(),
+    }, status=200)
+
+
+# ======================================================
+# ✅ TIEMPOS POR ENDPOINT (core/instrumentation.py)
+# ======================================================
+# GET    => p50/p95/p99 de tiempo total, base, render, queries y bytes por endpoint
+# DELETE => vacía las ventanas
+@api_view(["GET", "DELETE"])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    if request.method == "DELETE":
+        reset_metrics()
+        return Response({"message": "Métricas reiniciadas."}, status=200)
+
+    return Response({
+        "pid": os.getpid(),
+        "sample_rate": getattr(settings, "INSTRUMENTATION_SAMPLE_RATE", 1.0),
+        "endpoints": metrics_snapshot(),
+    }, status=200)
+
+
 # ======================================================
 # ✅✅✅ ENDPOINT DE SALUD (HEALTH CHECK)
 # ======================================================
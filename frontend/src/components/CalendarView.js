@@ -33,6 +33,18 @@ const CalendarView = () => {
     return new Date(y, m - 1, d); // ✅ local
   };
 
+  // ✅ Date local -> "YYYY-MM-DD" (para from/to del calendario)
+  const toLocalISO = (d) =>
+    `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, "0")}-${String(d.getDate()).padStart(2, "0")}`;
+
+  // ✅ Rango visible: una semana atrás y dos meses adelante (no todo el historial)
+  const visibleRange = () => {
+    const today = new Date();
+    const from = new Date(today.getFullYear(), today.getMonth(), today.getDate() - 7);
+    const to = new Date(today.getFullYear(), today.getMonth(), today.getDate() + 60);
+    return { from: toLocalISO(from), to: toLocalISO(to) };
+  };
+
   // ----------------------------
   // Cargar calendario (CIUDADANO)
   // ----------------------------
@@ -48,9 +60,10 @@ const CalendarView = () => {
           return;
         }
 
-        // ✅ ENDPOINT PARA CIUDADANO
+        // ✅ ENDPOINT PARA CIUDADANO (solo el rango visible)
         const res = await axios.get(`${API_URL}/calendar/`, {
           headers: { Authorization: `Bearer ${token}` },
+          params: visibleRange(),
         });
 
         const data = Array.isArray(res.data) ? res.data : [];
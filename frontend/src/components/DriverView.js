@@ -22,14 +22,23 @@ const DriverView = () => {
           return;
         }
 
-        // Llamada real al backend 🚛🔥
+        // Llamada real al backend 🚛🔥 (solo las rutas de hoy)
+        const now = new Date();
+        const today = `${now.getFullYear()}-${String(now.getMonth() + 1).padStart(2, "0")}-${String(now.getDate()).padStart(2, "0")}`;
         const res = await axios.get(`${API_URL}/my-routes/`, {
           headers: { Authorization: `Bearer ${token}` },
+          params: { from: today, to: today },
+        });
+
+        // Cada fila es una fecha con su ruta anidada; una ruta puede repetirse
+        const routes = new Map();
+        (Array.isArray(res.data) ? res.data : []).forEach((item) => {
+          if (item?.route) routes.set(item.route.id, item.route);
         });
 
         // Extraer puntos de todas las rutas
-        const points = res.data.flatMap((route) =>
-          route.points.map((p) => ({
+        const points = [...routes.values()].flatMap((route) =>
+          (route.points || []).map((p) => ({
             id: p.id,
             lat: parseFloat(p.latitude),
             lng: parseFloat(p.longitude),
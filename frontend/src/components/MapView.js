@@ -225,14 +225,29 @@ const MapView = () => {
 
         const headers = { Authorization: `Bearer ${token}` };
 
-        const calRes = await axios.get(buildURL("/my-routes/"), { headers });
-        setCalendarDates(Array.isArray(calRes.data) ? calRes.data : []);
-
-        const routesRes = await axios.get(buildURL("/routes/"), { headers });
-        setRoutesWithPoints(Array.isArray(routesRes.data) ? routesRes.data : []);
-
-        const schRes = await axios.get(buildURL("/citizen/route-schedules/"), { headers });
-        setRouteSchedules(Array.isArray(schRes.data) ? schRes.data : []);
+        // ✅ Una sola petición: rutas + fechas + horarios (cacheado en backend con ETag)
+        const bundleRes = await axios.get(buildURL("/citizen/map-bundle/"), { headers });
+        const bundle = bundleRes.data || {};
+
+        const routes = Array.isArray(bundle.routes) ? bundle.routes : [];
+        const routesById = new Map(routes.map((r) => [r.id, r]));
+
+        setRoutesWithPoints(routes);
+
+        // fechas y horarios vienen planos (route_id); se reconstruye "route" para el resto del componente
+        setCalendarDates(
+          (Array.isArray(bundle.dates) ? bundle.dates : []).map((d) => ({
+            ...d,
+            route: routesById.get(d.route_id) || { id: d.route_id },
+          }))
+        );
+
+        setRouteSchedules(
+          (Array.isArray(bundle.schedules) ? bundle.schedules : []).map((s) => ({
+            ...s,
+            route: routesById.get(s.route_id) || { id: s.route_id },
+          }))
+        );
       } catch (err) {
         const status = err?.response?.status;
         console.error("Error cargando datos de mapa:", err?.response?.data || err.message);
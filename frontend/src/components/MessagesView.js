@@ -1,11 +1,26 @@
-import React, { useState, useEffect, useMemo } from "react";
+import React, { useState, useEffect, useMemo, useRef } from "react";
 import axios from "axios";
 import "./MessagesView.css";
 
+// ✅ Cada cuánto se piden solo los cambios (?since=cursor)
+const POLL_MS = 30000;
+
+const formatMessage = (msg) => ({
+  id: msg.id,
+  title: "Mensaje del Administrador",
+  body: msg.message || msg.detalle || "Mensaje sin contenido",
+  date: msg.created_at ? new Date(msg.created_at).toLocaleString() : "Fecha no disponible",
+  createdAt: msg.created_at,
+  sender: msg.sender?.username || "Administración",
+});
+
 const MessagesView = () => {
   const [messages, setMessages] = useState([]);
   const [loading, setLoading] = useState(true);
   const [deletingId, setDeletingId] = useState(null);
+  const [olderCursor, setOlderCursor] = useState(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  const cursorRef = useRef(null);
 
   // ✅ Normalizar API_URL: evita /api/api y también evita crash si no existe env
   const API_URL = useMemo(() => {
@@ -23,25 +38,74 @@ const MessagesView = () => {
         return;
       }
 
-      const response = await axios.get(`${API_URL}/my-notifications/`, {
+      const since = cursorRef.current;
+      const response = await axios.get(`${API_URL}/inbox/`, {
         headers: { Authorization: `Bearer ${token}` },
+        params: since ? { since } : {},
         timeout: 15000,
       });
 
-      const formattedMessages = (Array.isArray(response.data) ? response.data : []).map((msg) => ({
-        id: msg.id,
-        title: "Mensaje del Administrador",
-        body: msg.message || msg.detalle || "Mensaje sin contenido",
-        date: msg.created_at ? new Date(msg.created_at).toLocaleString() : "Fecha no disponible",
-        sender: msg.sender?.username || "Administración",
-      }));
+      const { results = [], deleted = [], next_cursor: nextCursor } = response.data || {};
+      cursorRef.current = nextCursor || since;
 
-      setMessages(formattedMessages);
+      if (!since) {
+        setMessages(results.map(formatMessage));
+        setOlderCursor(response.data?.before || null);
+        // Al abrir el buzón solo se marcan como leídos los mensajes mostrados
+        markShownAsRead(results, token);
+      } else if (results.length || deleted.length) {
+        mergeMessages(results, deleted);
+      }
     } catch (error) {
       console.error("Error al cargar mensajes:", error);
     }
   };
 
+  // ✅ Mezcla sin duplicar: nuevos/modificados, borrados y páginas anteriores
+  const mergeMessages = (results, deleted = []) => {
+    setMessages((prev) => {
+      const byId = new Map(prev.map((m) => [m.id, m]));
+      deleted.forEach((id) => byId.delete(id));
+      results.forEach((msg) => byId.set(msg.id, formatMessage(msg)));
+      return [...byId.values()].sort((a, b) => new Date(b.createdAt) - new Date(a.createdAt));
+    });
+  };
+
+  // Una sola petición con los ids visibles; lo que no se ha cargado sigue sin leer
+  const markShownAsRead = (results, token) => {
+    const ids = results.filter((msg) => msg.estado !== "leida").map((msg) => msg.id);
+    if (!ids.length) return;
+    axios
+      .post(`${API_URL}/inbox/mark-read/`, { ids }, {
+        headers: { Authorization: `Bearer ${token}` },
+        timeout: 15000,
+      })
+      .catch(() => {});
+  };
+
+  // ✅ "Cargar anteriores": página siguiente con el cursor ?before=
+  const fetchOlder = async () => {
+    const token = localStorage.getItem("token");
+    if (!token || !olderCursor) return;
+
+    setLoadingOlder(true);
+    try {
+      const response = await axios.get(`${API_URL}/inbox/`, {
+        headers: { Authorization: `Bearer ${token}` },
+        params: { before: olderCursor },
+        timeout: 15000,
+      });
+      const { results = [], before = null } = response.data || {};
+      mergeMessages(results);
+      setOlderCursor(before);
+      markShownAsRead(results, token);
+    } catch (error) {
+      console.error("Error al cargar mensajes anteriores:", error);
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   useEffect(() => {
     const run = async () => {
       setLoading(true);
@@ -49,6 +113,9 @@ const MessagesView = () => {
       setLoading(false);
     };
     run();
+
+    const timer = setInterval(fetchMessages, POLL_MS);
+    return () => clearInterval(timer);
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [API_URL]);
 
@@ -130,6 +197,23 @@ const MessagesView = () => {
               </div>
             ))
           )}
+
+          {olderCursor && (
+            <button
+              type="button"
+              onClick={fetchOlder}
+              disabled={loadingOlder}
+              style={{
+                marginTop: "10px",
+                padding: "10px 14px",
+                borderRadius: "10px",
+                cursor: loadingOlder ? "not-allowed" : "pointer",
+                fontWeight: 700,
+              }}
+            >
+              {loadingOlder ? "Cargando..." : "Cargar mensajes anteriores"}
+            </button>
+          )}
         </div>
       )}
     </div>
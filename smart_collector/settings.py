@@ -79,6 +79,12 @@ MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
 
+    # ✅ gzip/br para respuestas grandes de /api/ (los estáticos ya los comprime WhiteNoise)
+    "core.compression.ApiCompressionMiddleware",
+
+    # ✅ Tiempos / queries por endpoint (Server-Timing + /api/admin/metrics/)
+    "core.instrumentation.RequestMetricsMiddleware",
+
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
 
@@ -127,6 +133,63 @@ DATABASES = {
     )
 }
 
+# ======================================================
+# ✅ CACHE (backend configurable)
+# ======================================================
+# - locmem (default en local): por proceso, cada worker tiene el suyo
+# - redis (default en producción): compartido, en memoria, incr atómico;
+#   render.yaml crea el servicio Key Value y pasa CACHE_LOCATION
+# - db: compartido pero cada hit es un round-trip a PostgreSQL, cada set corre
+#   un COUNT(*) sobre la tabla (culling) e incr no es atómico; requiere
+#   `manage.py createcachetable`. Solo como respaldo sin redis.
+# - file: compartido entre workers de la misma máquina
+#
+# Llaves que viven aquí: versiones y listados cacheados, paquete del mapa,
+# posición y progreso por vehículo, perfiles de ruta, y dos por usuario
+# (sc:auth_status, sc:inbox_unread). Con el MAX_ENTRIES por defecto de Django
+# (300) el culling sacaría versiones y respuestas calientes todo el tiempo:
+# locmem/file/db usan CACHE_MAX_ENTRIES (dimensionado para ~2 llaves por
+# usuario activo + lo compartido). redis no usa MAX_ENTRIES: expulsa por LRU
+# (maxmemoryPolicy en render.yaml).
+_CACHE_BACKENDS = {
+    "locmem": ("django.core.cache.backends.locmem.LocMemCache", "smart-collector"),
+    "file": ("django.core.cache.backends.filebased.FileBasedCache", str(BASE_DIR / ".cache")),
+    "db": ("django.core.cache.backends.db.DatabaseCache", "sc_cache"),
+    "redis": ("django.core.cache.backends.redis.RedisCache", "redis://127.0.0.1:6379/1"),
+}
+CACHE_BACKEND = config("CACHE_BACKEND", default="redis" if IS_PRODUCTION else "locmem")
+if CACHE_BACKEND not in _CACHE_BACKENDS:
+    raise ValueError(f"CACHE_BACKEND debe ser uno de: {', '.join(_CACHE_BACKENDS)}")
+
+CACHES = {
+    "default": {
+        "BACKEND": _CACHE_BACKENDS[CACHE_BACKEND][0],
+        "LOCATION": config("CACHE_LOCATION", default=_CACHE_BACKENDS[CACHE_BACKEND][1]),
+        "TIMEOUT": config("CACHE_DEFAULT_TIMEOUT", default=300, cast=int),
+    }
+}
+if CACHE_BACKEND != "redis":
+    CACHES["default"]["OPTIONS"] = {
+        "MAX_ENTRIES": config("CACHE_MAX_ENTRIES", default=50000, cast=int),
+        # Al llenarse se borra 1/CULL_FREQUENCY de las llaves (default de Django: 1/3)
+        "CULL_FREQUENCY": config("CACHE_CULL_FREQUENCY", default=10, cast=int),
+    }
+
+# Con locmem, invalidar (subir la versión) solo llega al worker que escribió:
+# los TTL de lo cacheado por versión bajan a segundos para que los demás no
+# sirvan datos viejos por horas.
+CACHE_SHARED = CACHE_BACKEND != "locmem"
+_VERSIONED_TTL = 60 * 60 * 24 if CACHE_SHARED else 30
+# Los contadores de versión también expiran con locmem: un worker que no vio
+# la escritura arranca una versión nueva (y un ETag nuevo) al vencer.
+CACHE_VERSION_TTL = None if CACHE_SHARED else _VERSIONED_TTL
+
+# Listados de solo lectura (comunidades, fechas, horarios, rutas): se invalidan
+# por versión al cambiar los modelos, el TTL es solo un tope (segundos con locmem).
+READ_CACHE_TTL = config("READ_CACHE_TTL", default=_VERSIONED_TTL, cast=int)
+# Hits/misses de /api/admin/cache/stats/: cada worker los suma al cache cada N accesos
+CACHE_STATS_FLUSH_EVERY = config("CACHE_STATS_FLUSH_EVERY", default=50, cast=int)
+
 # ======================================================
 # CORS / CSRF
 # ======================================================
@@ -201,6 +264,10 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "core.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
     ),
@@ -213,11 +280,29 @@ SIMPLE_JWT = {
     "SIGNING_KEY": SECRET_KEY,
 }
 
+# Endpoints de alta frecuencia arman request.user desde el token (core/authentication.py);
+# solo el estado activo/rol se consulta, y se cachea estos segundos.
+AUTH_STATUS_TTL = config("AUTH_STATUS_TTL", default=30, cast=int)
+
 # ======================================================
 # CUSTOM USER
 # ======================================================
 AUTH_USER_MODEL = "core.User"
 
+# Login por email o username (una sola query, ver core/backends.py)
+AUTHENTICATION_BACKENDS = ["core.backends.EmailOrUsernameModelBackend"]
+
+# Costo del hash: más iteraciones = más seguro pero más lento en el login.
+# Medir con `manage.py bench_login --iterations ...` antes de cambiarlo.
+PASSWORD_PBKDF2_ITERATIONS = config("PASSWORD_PBKDF2_ITERATIONS", default=1_000_000, cast=int)
+PASSWORD_HASHERS = [
+    "core.hashers.ConfigurablePBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
 # ======================================================
 # GOOGLE LOGIN
 # ======================================================
@@ -272,6 +357,91 @@ else:
 # Opcional: prefijo de asunto
 EMAIL_SUBJECT_PREFIX = config("EMAIL_SUBJECT_PREFIX", default="[Smart Collector] ")
 
+# ======================================================
+# ✅ MENSAJES MASIVOS (fan-out por bloques)
+# ======================================================
+BROADCAST_CHUNK_SIZE = config("BROADCAST_CHUNK_SIZE", default=2000, cast=int)
+
+# Archivo de notificaciones (manage.py archive_notifications).
+# Las borradas esperan unos días antes de salir: los clientes que sincronizan
+# el buzón con ?since= necesitan ver la baja antes de que desaparezca la fila.
+NOTIFICATIONS_ARCHIVE_DELETED_DAYS = config("NOTIFICATIONS_ARCHIVE_DELETED_DAYS", default=30, cast=int)
+NOTIFICATIONS_ARCHIVE_READ_DAYS = config("NOTIFICATIONS_ARCHIVE_READ_DAYS", default=90, cast=int)
+NOTIFICATIONS_ARCHIVE_BATCH = config("NOTIFICATIONS_ARCHIVE_BATCH", default=1000, cast=int)
+
+# ======================================================
+# ✅ PAQUETE DEL MAPA CIUDADANO (cache versionado)
+# ======================================================
+MAP_BUNDLE_TTL = config("MAP_BUNDLE_TTL", default=_VERSIONED_TTL, cast=int)
+
+# Geometría simplificada (?geometry=encoded&zoom=N): tolerancia en pixeles
+GEOMETRY_TOLERANCE_PX = config("GEOMETRY_TOLERANCE_PX", default=1.0, cast=float)
+
+# "Rutas cerca de mí": tamaño de celda (~550 m) y radio máximo permitido
+SPATIAL_CELL_DEGREES = config("SPATIAL_CELL_DEGREES", default=0.005, cast=float)
+SPATIAL_MAX_RADIUS_M = config("SPATIAL_MAX_RADIUS_M", default=5000, cast=int)
+
+# ETA del camión: velocidad por defecto / mínima (m/s), suavizado y tolerancias (m)
+ETA_DEFAULT_SPEED_MPS = config("ETA_DEFAULT_SPEED_MPS", default=4.0, cast=float)
+ETA_MIN_SPEED_MPS = config("ETA_MIN_SPEED_MPS", default=1.0, cast=float)
+ETA_SPEED_ALPHA = config("ETA_SPEED_ALPHA", default=0.3, cast=float)
+ETA_OFF_ROUTE_M = config("ETA_OFF_ROUTE_M", default=100, cast=int)
+ETA_TARGET_MAX_OFFSET_M = config("ETA_TARGET_MAX_OFFSET_M", default=300, cast=int)
+
+# ======================================================
+# ✅ TELEMETRÍA DE VEHÍCULOS
+# ======================================================
+TELEMETRY_MAX_BATCH = config("TELEMETRY_MAX_BATCH", default=500, cast=int)
+
+# Posición en vivo (SSE bajo ASGI, core/streams.py)
+SSE_HEARTBEAT_SECONDS = config("SSE_HEARTBEAT_SECONDS", default=15, cast=int)
+SSE_MAX_SECONDS = config("SSE_MAX_SECONDS", default=300, cast=int)
+# Cada cuánto un worker lee del cache compartido lo que llegó por otro worker
+SSE_SYNC_SECONDS = config("SSE_SYNC_SECONDS", default=2, cast=float)
+
+# Posición actual en cache (write-through desde la telemetría). Con locmem los
+# demás workers no ven la escritura: el TTL baja a segundos.
+POSITION_CACHE_TTL = config("POSITION_CACHE_TTL", default=60 * 60 if CACHE_SHARED else 5, cast=int)
+
+# ======================================================
+# ✅ INFORMES PDF (streaming)
+# ======================================================
+REPORTS_PDF_CHUNK_SIZE = config("REPORTS_PDF_CHUNK_SIZE", default=500, cast=int)
+
+# Exportaciones en segundo plano:
+# "thread" = pool de hilos en el proceso web | "worker" = manage.py run_export_jobs
+EXPORT_JOBS_MODE = config("EXPORT_JOBS_MODE", default="thread")
+EXPORT_JOBS_THREADS = config("EXPORT_JOBS_THREADS", default=1, cast=int)
+# Un job "running" más viejo que esto se da por huérfano (debe pasar a la exportación más larga)
+EXPORT_JOBS_LEASE_MINUTES = config("EXPORT_JOBS_LEASE_MINUTES", default=30, cast=int)
+EXPORT_JOBS_MAX_ATTEMPTS = config("EXPORT_JOBS_MAX_ATTEMPTS", default=3, cast=int)
+
+# ======================================================
+# ✅ INSTRUMENTACIÓN POR PETICIÓN (core/instrumentation.py)
+# ======================================================
+# Fracción de peticiones medidas (0 = apagado). En producción basta una muestra.
+INSTRUMENTATION_SAMPLE_RATE = config(
+    "INSTRUMENTATION_SAMPLE_RATE", default=1.0 if DEBUG else 0.1, cast=float
+)
+INSTRUMENTATION_SERVER_TIMING = config("INSTRUMENTATION_SERVER_TIMING", default=True, cast=bool)
+# Muestras que se guardan por endpoint para calcular p50/p95/p99
+INSTRUMENTATION_WINDOW = config("INSTRUMENTATION_WINDOW", default=1000, cast=int)
+INSTRUMENTATION_SLOW_MS = config("INSTRUMENTATION_SLOW_MS", default=1000, cast=int)
+
+# ======================================================
+# ✅ JSON Y COMPRESIÓN DE LA API (core/renderers.py, core/compression.py)
+# ======================================================
+# "orjson" (si está instalado; misma salida, varias veces más rápido) | "stdlib"
+JSON_RENDERER = config("JSON_RENDERER", default="orjson")
+if JSON_RENDERER not in ("orjson", "stdlib"):
+    raise ValueError("JSON_RENDERER debe ser orjson o stdlib")
+
+# Respuestas /api/ de al menos estos bytes salen con gzip (o br si está el paquete brotli)
+API_COMPRESSION_MIN_BYTES = config("API_COMPRESSION_MIN_BYTES", default=1024, cast=int)
+API_COMPRESSION_BROTLI_QUALITY = config("API_COMPRESSION_BROTLI_QUALITY", default=5, cast=int)
+# Respuestas comprimidas que se recuerdan por proceso (hits del cache de lectura); 0 = no
+API_COMPRESSION_MEMO = config("API_COMPRESSION_MEMO", default=32, cast=int)
+
 # ======================================================
 # ✅ LOGGING (para ver el error real de correo en Render)
 # ======================================================
@@ -22,6 +22,9 @@ from core.views import (
     my_notifications_view,
     citizen_routes_with_points_view,
     citizen_calendar_view,
+    citizen_map_bundle_view,
+    citizen_routes_near_view,
+    route_eta_view,
 
     # ✅✅✅ NUEVO: borrar reporte (ciudadano: solo propios / admin: cualquiera)
     my_report_delete_view,
@@ -31,6 +34,10 @@ from core.views import (
 
     # ✅✅✅ NUEVO: borrar notificación para el usuario (soft delete)
     my_notification_delete_view,
+    my_broadcast_delete_view,
+    inbox_view,
+    inbox_unread_view,
+    inbox_mark_read_view,
 
     # Admin (API)
     admin_users_view,
@@ -38,6 +45,9 @@ from core.views import (
     admin_report_detail_view,
     generate_reports_view,
     generate_reports_pdf_view,
+    admin_exports_view,
+    admin_export_detail_view,
+    admin_export_download_view,
     admin_routes_view,
     admin_route_detail_view,
     admin_route_dates_view,
@@ -51,6 +61,9 @@ from core.views import (
 
     # ✅✅✅ NUEVO: borrar mensaje global (admin)
     admin_message_delete_view,
+    admin_broadcast_delete_view,
+    cache_stats_view,
+    metrics_view,
 
     # ✅✅✅ NUEVO: Comunidades y asignación a rutas
     communities_view,
@@ -61,6 +74,10 @@ from core.views import (
     # Vehículos
     vehicle_detail,
     vehicle_update,
+    vehicle_telemetry_view,
+    vehicle_position_view,
+    vehicle_stream_view,
+    route_stream_view,
 
     # Home / Dashboard
     home_view,
@@ -121,6 +138,12 @@ urlpatterns = [
 
     # ✅✅✅ NUEVO: borrar notificación para el usuario (soft delete)
     path("api/my-notifications/<int:pk>/", my_notification_delete_view),
+    path("api/my-notifications/b<int:pk>/", my_broadcast_delete_view),
+
+    # ✅ BUZÓN: contador de no leídos, sincronización incremental y marcar leídos
+    path("api/inbox/", inbox_view),
+    path("api/inbox/unread/", inbox_unread_view),
+    path("api/inbox/mark-read/", inbox_mark_read_view),
 
     # ✅ RUTAS CON PUNTOS (para mapa ciudadano)
     path("api/routes/", citizen_routes_with_points_view),
@@ -128,6 +151,15 @@ urlpatterns = [
     # ✅ HORARIOS DEFINIDOS POR ADMIN (para HoursView y selector)
     path("api/citizen/route-schedules/", citizen_route_schedules_view),
 
+    # ✅ PAQUETE DEL MAPA (una sola petición, cacheada con ETag)
+    path("api/citizen/map-bundle/", citizen_map_bundle_view),
+
+    # ✅ RUTAS CERCANAS (?lat=&lng=&radius=) con próxima fecha/horario
+    path("api/citizen/routes/near/", citizen_routes_near_view),
+
+    # ✅ ETA del camión a un punto de la ruta
+    path("api/routes/<int:route_id>/eta/", route_eta_view),
+
     # ======================
     #     ADMIN (API)
     # ======================
@@ -141,6 +173,11 @@ urlpatterns = [
     # 🔥 Generar PDF
     path("api/admin/reports/generate-pdf/", generate_reports_pdf_view),
 
+    # 🔥 Exportaciones en segundo plano (CSV / PDF)
+    path("api/admin/exports/", admin_exports_view),
+    path("api/admin/exports/<int:pk>/", admin_export_detail_view),
+    path("api/admin/exports/<int:pk>/download/", admin_export_download_view),
+
     # 🔥 Rutas
     path("api/admin/routes/", admin_routes_view),
     path("api/admin/routes/<int:pk>/", admin_route_detail_view),
@@ -160,6 +197,13 @@ urlpatterns = [
 
     # ✅✅✅ NUEVO: borrar mensaje global (admin)
     path("api/admin/messages/<int:pk>/", admin_message_delete_view),
+    path("api/admin/messages/b<int:pk>/", admin_broadcast_delete_view),
+
+    # ✅ Cache de lectura: hits/misses por recurso
+    path("api/admin/cache/stats/", cache_stats_view),
+
+    # ✅ Tiempos por endpoint (p50/p95/p99)
+    path("api/admin/metrics/", metrics_view),
 
     # ======================
     # ✅✅✅ NUEVO: COMUNIDADES (ADMIN)
@@ -178,6 +222,16 @@ urlpatterns = [
     path("api/vehicles/<int:vehicle_id>/", vehicle_detail),
     path("api/vehicles/<int:vehicle_id>/update-location/", vehicle_update),
 
+    # ✅ Telemetría en lote (historial de posiciones)
+    path("api/vehicles/<int:vehicle_id>/telemetry/", vehicle_telemetry_view),
+
+    # ✅ Posición ligera (cache + 304)
+    path("api/vehicles/<int:vehicle_id>/position/", vehicle_position_view),
+
+    # ✅ Posición en vivo (Server-Sent Events, vistas async bajo ASGI)
+    path("api/vehicles/<int:vehicle_id>/stream/", vehicle_stream_view),
+    path("api/routes/<int:route_id>/stream/", route_stream_view),
+
     # Crear vehículo por defecto
     path("api/admin/create-default-vehicle/", create_default_vehicle),
 